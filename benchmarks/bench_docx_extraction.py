@@ -0,0 +1,127 @@
+"""
+Compara a extração de parágrafos de DOCX em streaming (docx_stream) com o python-docx.
+
+Uso:
+    python benchmarks/bench_docx_extraction.py                 # briefings sintéticos
+    python benchmarks/bench_docx_extraction.py briefing.docx ... # arquivos reais
+
+Para cada arquivo verifica se os parágrafos do corpo são os mesmos do python-docx, conta o que
+o streaming extrai a mais (tabelas, caixas de texto, cabeçalhos e rodapés) e mede tempo e pico de memória.
+A memória é o quanto o pico de RSS cresce durante a extração, medido em um processo novo
+(o tracemalloc não enxerga as alocações do libxml2 usadas pelo python-docx).
+"""
+import io
+import os
+import sys
+import time
+import multiprocessing
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from src.utils.docx_stream import iter_docx_paragraphs, BODY
+
+REPEAT = int(os.environ.get('BENCH_REPEAT', 3))
+
+
+def synthetic_brief(pages):
+    """
+    Gera um briefing de SEO com ~`pages` páginas: tabela de metadados, cabeçalho, rodapé,
+    seções com títulos, parágrafos longos, listas e uma tabela de características por página.
+    """
+    doc = Document()
+    section = doc.sections[0]
+    section.header.paragraphs[0].text = "PURINA - SEO - Content Enrichment"
+    section.footer.paragraphs[0].text = "Confidencial"
+    meta = doc.add_table(rows=4, cols=2)
+    for row, (key, value) in zip(meta.rows, [
+        ("Recommended Meta Title", "Todo sobre el perro Pitbull | Purina"),
+        ("Recommended Meta Description", "Te contamos todo lo que necesitas saber"),
+        ("Recommended H1", "Pitbull Terrier Americano"),
+        ("Recommended canonical", "/find-a-pet/dog-breeds/american-pitbull-terrier"),
+    ]):
+        row.cells[0].text = key
+        row.cells[1].text = value
+    for page in range(pages):
+        doc.add_heading(f"Sección {page}", level=2)
+        for i in range(4):
+            doc.add_paragraph(
+                f"Párrafo {i} de la sección {page}. El pitbull es un perro leal, enérgico y "
+                f"cariñoso que necesita ejercicio diario y una socialización temprana. " * 3
+            )
+        doc.add_paragraph(f"Alt-tag: foto del pitbull {page}")
+        for i in range(3):
+            doc.add_paragraph(f"Característica {i} de la sección {page}", style='List Bullet')
+        table = doc.add_table(rows=3, cols=2)
+        for r, row in enumerate(table.rows):
+            row.cells[0].text = f"Dato {r}"
+            row.cells[1].text = f"Valor {r} de la sección {page}"
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def with_python_docx(data):
+    return [p.text for p in Document(io.BytesIO(data)).paragraphs]
+
+
+def with_stream(data):
+    return list(iter_docx_paragraphs(data))
+
+
+def _rss_kb(field):
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _peak_growth_mb(extract, data):
+    """
+    Roda em um processo novo: quanto o pico de RSS cresce durante uma extração.
+    Uma primeira extração aquece imports e caches; o pico (VmHWM) é zerado antes da medida (Linux).
+    """
+    extract(data)
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    before = _rss_kb('VmRSS')
+    extract(data)
+    return (_rss_kb('VmHWM') - before) / 1024
+
+
+def measure(extract, data):
+    best = None
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = extract(data)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        peak = pool.submit(_peak_growth_mb, extract, data).result()
+    return result, best * 1000, peak
+
+
+def main():
+    if len(sys.argv) > 1:
+        files = []
+        for path in sys.argv[1:]:
+            with open(path, 'rb') as f:
+                files.append((os.path.basename(path)[:26], f.read()))
+    else:
+        files = [(f"sintético {n} páginas", synthetic_brief(n)) for n in (10, 100, 300)]
+
+    print(f"{'arquivo':<28}{'python-docx ms':>15}{'MB':>7}{'stream ms':>11}{'MB':>7}{'ganho':>8}  corpo     extras")
+    for name, data in files:
+        old, old_ms, old_mb = measure(with_python_docx, data)
+        new, new_ms, new_mb = measure(with_stream, data)
+        same = [text for origin, text in new if origin == BODY] == old
+        extras = Counter(origin for origin, text in new if origin != BODY and text.strip())
+        print(f"{name:<28}{old_ms:>15.1f}{old_mb:>7.1f}{new_ms:>11.1f}{new_mb:>7.1f}{old_ms / new_ms:>7.1f}x  "
+              f"{'igual' if same else 'DIFERENTE':<10}{dict(extras)}")
+
+
+if __name__ == '__main__':
+    main()
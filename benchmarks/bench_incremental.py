@@ -0,0 +1,97 @@
+"""
+Compara a comparação completa com a incremental (incremental=1) no reenvio de um briefing revisado.
+
+Uso:
+    python benchmarks/bench_incremental.py              # briefing sintético
+    python benchmarks/bench_incremental.py briefing.docx
+
+Compara o documento com uma página sintética, altera alguns parágrafos e mede o tempo de
+recomparar tudo e de recomparar só o que mudou, verificando que os dois resultados são iguais.
+"""
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.cpu_tasks import compare_texts, extract_docx_text
+from src.utils.incremental import status_delta, page_snapshot
+
+REPEAT = int(os.environ.get('BENCH_REPEAT', 3))
+EDITS = [int(n) for n in os.environ.get('BENCH_EDITS', '1,2,10,50').split(',')]
+
+
+def synthetic_brief(paragraphs, seed=1):
+    rng = random.Random(seed)
+    vocabulary = [f"palavra{i}" for i in range(3000)]
+    return [' '.join(rng.choice(vocabulary) for _ in range(rng.randint(8, 40))) for _ in range(paragraphs)]
+
+
+def synthetic_page(doc_texts, seed=2):
+    """
+    Página com parte dos parágrafos iguais, parte alterada e bastante texto que não está no briefing.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for text in doc_texts:
+        words = text.split()
+        roll = rng.random()
+        if roll < 0.4:
+            texts.append(text)
+        elif roll < 0.8:
+            texts.append(' '.join(words[:max(1, len(words) * 3 // 4)] + ['extra']))
+    texts.extend(synthetic_brief(len(doc_texts) * 3, seed=seed + 1))
+    rng.shuffle(texts)
+    return texts
+
+
+def edited(doc_texts, count, seed=3):
+    rng = random.Random(seed)
+    revised = list(doc_texts)
+    for position in rng.sample(range(len(revised)), min(count, len(revised))):
+        revised[position] = revised[position] + ' revisado'
+    return revised
+
+
+def rows(results):
+    return [(r['doc_text'], r['web_text'], r['status'], r['similarity']) for r in results]
+
+
+def timed(fn):
+    best = None
+    result = None
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best * 1000
+
+
+def main():
+    if len(sys.argv) > 1:
+        doc_texts = extract_docx_text(sys.argv[1])
+    else:
+        doc_texts = synthetic_brief(2000)
+    web_texts = synthetic_page(doc_texts)
+
+    # Primeira comparação: preenche os resultados por parágrafo e os índices da página
+    snapshot = page_snapshot(web_texts, os.environ.get('MATCH_MODE', 'exact'))
+    matches = {}
+    base = rows(compare_texts(doc_texts, web_texts, matches=matches, snapshot=snapshot))
+
+    print(f"{len(doc_texts)} parágrafos, {len(web_texts)} textos na página")
+    print(f"{'alterados':>10}{'completa ms':>14}{'incremental ms':>16}{'ganho':>8}  resultado")
+    for count in EDITS:
+        revised = edited(doc_texts, count)
+        full, full_ms = timed(lambda: rows(compare_texts(revised, web_texts)))
+        incremental, incremental_ms = timed(lambda: rows(compare_texts(revised, web_texts, matches=dict(matches), snapshot=snapshot)))
+        delta = status_delta(incremental, base, 'base')
+        verdict = 'igual' if full == incremental else 'DIFERENTE'
+        print(f"{count:>10}{full_ms:>14.1f}{incremental_ms:>16.1f}{full_ms / incremental_ms:>7.1f}x  "
+              f"{verdict} (delta: {len(delta['added'])} novos, {len(delta['removed'])} removidos)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Compara a extração de páginas com lxml (travessia única) e com BeautifulSoup (html.parser).
+
+Uso:
+    python benchmarks/bench_page_parsing.py                 # páginas sintéticas
+    python benchmarks/bench_page_parsing.py pagina.html ... # HTML salvo de páginas reais
+
+Para cada página verifica se os dois caminhos produzem o mesmo resultado e mede o tempo médio.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.web_scraper import _parse_with_lxml, _parse_with_soup, _add_vet_ratings
+from src.utils.dom_walker import element_text
+
+REPEAT = int(os.environ.get('BENCH_REPEAT', 5))
+
+
+def synthetic_page(sections):
+    """
+    Gera uma página parecida com as páginas de raça: acordeões, tabela de avaliação,
+    blocos aninhados, scripts, noscript e footer dentro do main.
+    """
+    parts = [
+        '<!DOCTYPE html><html><head><title> Pitbull | Purina </title>',
+        '<meta name="description" content=" Tudo sobre o Pitbull ">',
+        '<meta property="og:title" content="Pitbull">',
+        '<meta property="og:description" content="Raça de cão">',
+        '<script>var x = "<p>não é texto</p>";</script></head><body>',
+        '<header><a href="/">Início</a></header><main>',
+        '<h1>Pitbull</h1><noscript><img alt="pixel" src="p.gif"><p>Ative o JavaScript</p></noscript>',
+        '<table class="breed-table"><tbody>',
+    ]
+    for key in ["Perro familiar", "Necesidad de ejercicio", "Fácil de adiestrar", "Muda"]:
+        parts.append(f'<tr><td><span>{key}</span></td><td>4/5</td></tr>')
+    parts.append('</tbody></table>')
+    for i in range(sections):
+        parts.append(
+            f'<div class="field field--{i}"><a class="accordion--text-v2" href="#s{i}">Seção {i}</a>'
+            f'<div class="text-image"><h2>Título {i}</h2>'
+            f'<p>Parágrafo <strong>importante {i}</strong> com <em>ênfase</em> e '
+            f'<a href="https://www.purina.es/x/{i}">link</a>.</p>'
+            f'<ul><li>Item <b>{i}</b></li><li>Outro <i>item</i> {i}</li></ul>'
+            f'<img src="/img/{i}.jpg" alt=" Foto {i} "><span>Legenda&nbsp;{i}</span>'
+            f'<style>.x{i}{{color:red}}</style><script>track({i})</script>'
+            f'<!-- comentário {i} --><div>Anterior Siguiente</div></div></div>'
+        )
+    parts.append('<footer><p>Rodapé <strong>legal</strong></p></footer></main>')
+    parts.append('<footer><p>Rodapé global</p></footer></body></html>')
+    return ''.join(parts)
+
+
+def normalized(page):
+    texts, main, metadata, alt_tags, title, elements = page
+    return texts, element_text(main), metadata, alt_tags, title, elements
+
+
+def timed(parser, html):
+    best = None
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        page = _add_vet_ratings(*parser(html))
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return page, best * 1000
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = []
+        for path in sys.argv[1:]:
+            with open(path, encoding='utf-8') as f:
+                pages.append((os.path.basename(path), f.read()))
+    else:
+        pages = [(f"sintética {n} seções", synthetic_page(n)) for n in (10, 200, 2000)]
+
+    print(f"{'página':<28}{'KB':>8}{'html.parser ms':>16}{'lxml ms':>10}{'ganho':>8}  resultado")
+    for name, html in pages:
+        soup_page, soup_ms = timed(_parse_with_soup, html)
+        lxml_page, lxml_ms = timed(_parse_with_lxml, html)
+        same = normalized(soup_page) == normalized(lxml_page)
+        print(f"{name:<28}{len(html) / 1024:>8.0f}{soup_ms:>16.1f}{lxml_ms:>10.1f}"
+              f"{soup_ms / lxml_ms:>7.1f}x  {'igual' if same else 'DIFERENTE'}")
+        if not same:
+            for label, a, b in zip(['texts', 'main', 'metadata', 'alt_tags', 'title', 'elements'],
+                                   normalized(soup_page), normalized(lxml_page)):
+                if a != b:
+                    print(f"    {label} difere")
+
+
+if __name__ == '__main__':
+    main()
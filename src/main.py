@@ -1,332 +1,722 @@
 import os
-import re
+import sys
+# Permite executar `python src/main.py` e importar o pacote `src`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import time
 import json
-from flask import Flask, render_template, request, jsonify, send_from_directory, current_app
-from werkzeug.utils import secure_filename
-import html5lib
-from bs4 import BeautifulSoup
+import uuid
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, render_template, request, jsonify, send_from_directory, send_file, current_app, Response, stream_with_context
 import requests
-from playwright.sync_api import sync_playwright
-import openpyxl
-from openpyxl.styles import PatternFill, Font, Alignment
-from openpyxl.utils import get_column_letter
-from docx import Document
+from src.utils.browser_pool import get_browser_pool
+from src.utils.request_blocking import install_request_blocking, install_request_blocking_async, REQUEST_BLOCKING
+from src.utils.page_cache import get_page_cache, cache_validators
+from src.utils.static_fetcher import fetch_static, escalation_reason, STATIC_FETCH, STATIC_MIN_TEXT_CHARS
+from src.utils.async_scraper import scrape_many, get_async_browser, SCRAPE_CONCURRENCY, SCRAPE_URL_TIMEOUT
+from src.utils.lsh import MATCH_MODE
+from src.utils.jobs import get_job_manager, register_job, JOB_CANCEL_POLL
+from src.utils.cpu_pool import submit_cpu, run_cpu
+from src.utils.docx_cache import get_docx_cache, docx_key, docx_hash, read_docx_bytes
+from src.utils.report_store import get_report_store
+from src.utils.batch_export import iter_zip, iter_file
+from src.utils.uploads import SpooledUploadRequest, read_upload, persist_upload, upload_source, discard_upload, UPLOAD_PERSIST
+from src.utils.history import init_history, record_comparison, latest_report_id
+from src.utils.incremental import get_match_cache, paragraph_key, page_snapshot, status_delta
+from src.routes.history import history_bp
+from src.routes.comparator import comparator_bp
+from src.utils.compact import columnar, page_size, parse_cursor, SECTIONS, COMPACT_PAGE_SIZE
+from src.utils.compression import install_compression
+# Funções executadas no pool de processos; ficam fora deste módulo para que os processos do pool
+# não importem o app (ver src/utils/cpu_tasks.py)
+from src.utils.cpu_tasks import (
+    extract_docx_text, _page_texts, extract_static_page, generate_summary, generate_summary_table, compare_and_store,
+    write_report, _pair_number, write_batch_report
+)
 
 # Configuração do aplicativo Flask
 app = Flask(__name__, static_folder='static')
-app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(__file__), 'static', 'uploads')
+# Uploads são lidos direto do buffer da requisição (ver src/utils/uploads.py)
+app.request_class = SpooledUploadRequest
+# Relatórios Excel gerados antes da geração sob demanda (os novos ficam em report_store)
 app.config['RESULTS_FOLDER'] = os.path.join(os.path.dirname(__file__), 'static', 'results')
+app.config['SCRAPE_CONCURRENCY'] = SCRAPE_CONCURRENCY
+app.config['SCRAPE_URL_TIMEOUT'] = SCRAPE_URL_TIMEOUT
+app.config['MATCH_MODE'] = MATCH_MODE
 
 # Garantir que os diretórios existam
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['RESULTS_FOLDER'], exist_ok=True)
 
-# Funções de processamento de texto
-def clean_text(text):
-    """Limpa o texto removendo espaços extras e caracteres especiais."""
-    if not text:
-        return ""
-    text = re.sub(r'\s+', ' ', text)
-    text = text.strip()
-    return text
-
-def extract_docx_text(docx_path):
-    """Extrai texto de um arquivo DOCX."""
-    doc = Document(docx_path)
-    texts = []
-    for para in doc.paragraphs:
-        if para.text.strip():
-            texts.append(clean_text(para.text))
-    return texts
-
-def load_url_text(url):
-    """Carrega texto de uma URL usando Playwright para renderizar JavaScript."""
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(url, wait_until="networkidle")
+# Histórico das comparações em banco (consultas em /history, ver src/routes/history.py).
+# Só no processo web: um processo filho do multiprocessing (ex.: do pool de CPU) que importe
+# este módulo não configura o banco nem roda create_all
+if multiprocessing.parent_process() is None:
+    init_history(app)
+app.register_blueprint(history_bp)
+# Comparador TF-IDF com a extração do web_scraper (HTML estático ou navegador com settle adaptativo)
+app.register_blueprint(comparator_bp, url_prefix='/comparator')
+# Respostas JSON comprimidas com br/gzip conforme o Accept-Encoding
+install_compression(app)
+
+def load_docx_texts(upload, stats=None):
+    """
+    Textos do DOCX enviado, extraídos uma única vez por conteúdo (SHA-256, ver docx_cache):
+    reenvios do mesmo arquivo e lotes que repetem o briefing não o leem de novo.
+    Na primeira vez, a extração roda no pool de processos. `stats` recebe a origem em 'docx_cache'
+    e o SHA-256 do arquivo em 'docx_hash'.
+    """
+    data = read_docx_bytes(upload_source(upload))
+    digest = docx_hash(data)
+    if stats is not None:
+        stats['docx_hash'] = digest
+    return get_docx_cache().get_or_compute(docx_key(data, 'main', digest), lambda: run_cpu(extract_docx_text, data), stats)
+
+# Versão da extração das páginas, parte da chave do cache: incrementar ao mudar o EXTRACT_SCRIPT,
+# o _page_texts ou os dados gravados, para que páginas extraídas pela versão anterior não sejam reaproveitadas
+EXTRACT_VERSION = 1
+
+# Script injetado na página que extrai tudo em uma única ida e volta ao Chromium.
+# Produz exatamente os mesmos dados que antes eram lidos elemento por elemento.
+EXTRACT_SCRIPT = """
+() => {
+    const text = el => (el.innerText || '').trim();
+
+    // Metadados
+    const metadata = {};
+    for (const tag of document.querySelectorAll('meta')) {
+        const name = tag.getAttribute('name') || tag.getAttribute('property');
+        const content = tag.getAttribute('content');
+        if (name && content) {
+            metadata[name] = content;
+        }
+    }
+
+    // Alt tags de imagens (a numeração considera todas as imagens)
+    const altTags = {};
+    document.querySelectorAll('img').forEach((img, i) => {
+        const alt = img.getAttribute('alt');
+        const src = img.getAttribute('src');
+        if (alt && src) {
+            altTags[`Image ${i + 1}`] = {alt: alt, src: src};
+        }
+    });
+
+    const elements = [];
+
+    // Tabela de avaliação veterinária
+    for (const table of document.querySelectorAll('.breed-table')) {
+        for (const row of table.querySelectorAll('tr')) {
+            const cells = row.querySelectorAll('td');
+            if (cells.length >= 2) {
+                elements.push(['Puntuación Veterinaria', 'table', `${text(cells[0])}: ${text(cells[1])}`, '']);
+            }
+        }
+    }
+
+    for (const h of document.querySelectorAll('h1, h2, h3, h4, h5, h6')) {
+        const tagName = h.tagName.toLowerCase();
+        elements.push([`Heading ${tagName}`, tagName, text(h), '']);
+    }
+
+    for (const p of document.querySelectorAll('p')) {
+        elements.push(['Paragraph', 'p', text(p), '']);
+    }
+
+    for (const link of document.querySelectorAll('a')) {
+        elements.push(['Link', 'a', text(link), link.getAttribute('href') || '']);
+    }
+
+    // Texto principal
+    const main = document.querySelector('main') || document.querySelector('article') || document.body;
+
+    return {
+        title: document.title,
+        metadata: metadata,
+        alt_tags: altTags,
+        elements: elements,
+        main_text: main ? main.innerText : ''
+    };
+}
+"""
+
+def _extracted_tuple(data, html_content):
+    """Converte o resultado de EXTRACT_SCRIPT na tupla usada por _finish_page."""
+    return data['title'], html_content, data['metadata'], data['alt_tags'], data['elements'], data['main_text']
+
+def _try_static(url):
+    """
+    Primeira camada: GET simples + extração do HTML estático no pool de processos (extract_static_page).
+    Retorna (extracted, texts, render_stats, validators); extracted é None quando o HTML estático
+    parece incompleto e é preciso escalar para o navegador (o motivo vai em render_stats).
+    """
+    if not STATIC_FETCH:
+        return None, None, {'tier': 'browser'}, None
+    started = time.time()
+    try:
+        html_content, headers = fetch_static(url)
+        data, texts = run_cpu(extract_static_page, html_content)
+        reason = escalation_reason(html_content, data['main_text'])
+    except requests.RequestException as e:
+        return None, None, {'tier': 'browser', 'escalation_reason': f"http_error: {e}"}, None
+    except Exception as e:
+        return None, None, {'tier': 'browser', 'escalation_reason': f"parse_error: {e}"}, None
+    static_ms = round((time.time() - started) * 1000, 1)
+    if reason:
+        return None, None, {'tier': 'browser', 'escalation_reason': reason, 'static_ms': static_ms}, None
+    return _extracted_tuple(data, html_content), texts, {'tier': 'static', 'static_ms': static_ms}, cache_validators(headers)
+
+def load_url_text(url, stats=None, use_cache=True):
+    """
+    Carrega texto de uma URL: primeiro o HTML estático (GET simples) e, se ele parecer incompleto
+    (aplicação JS, pouco texto, tabela de avaliação ausente), o Playwright para renderizar JavaScript.
+    O resultado fica no cache em disco; use_cache=False força uma nova renderização.
+    Se `stats` for um dicionário, recebe o status do cache, a camada usada (tier, escalation_reason)
+    e os contadores de requisições bloqueadas.
+    """
+    if use_cache:
+        page = _cached_page(url, stats)
+        if page is not None:
+            return page
+    
+    extracted, texts, tier_stats, validators = _try_static(url)
+    if extracted is not None:
+        return _store_page(url, extracted, tier_stats, validators, use_cache, stats, texts=texts)
+    
+    def _extract(context):
+        render_stats = dict(tier_stats)
+        page = context.new_page()
+        # Imagens, fontes, mídia e trackers não são baixados (ver request_blocking)
+        install_request_blocking(page, url, render_stats)
+        response = page.goto(url, wait_until="networkidle")
         
-        # Extrair título
-        title = page.title()
+        # Extrair título, metadados, alt tags, elementos e texto principal em uma única chamada
+        data = page.evaluate(EXTRACT_SCRIPT)
         
         # Extrair conteúdo HTML
         html_content = page.content()
         
-        # Extrair metadados
-        metadata = {}
-        meta_tags = page.query_selector_all('meta')
-        for tag in meta_tags:
-            name = tag.get_attribute('name') or tag.get_attribute('property')
-            content = tag.get_attribute('content')
-            if name and content:
-                metadata[name] = content
-        
-        # Extrair alt tags de imagens
-        alt_tags = {}
-        images = page.query_selector_all('img')
-        for i, img in enumerate(images):
-            alt = img.get_attribute('alt')
-            src = img.get_attribute('src')
-            if alt and src:
-                alt_tags[f"Image {i+1}"] = {"alt": alt, "src": src}
-        
-        # Extrair elementos da página
-        elements = []
-        
-        # Extrair tabela de avaliação veterinária
-        vet_tables = page.query_selector_all('.breed-table')
-        for table in vet_tables:
-            rows = table.query_selector_all('tr')
-            for row in rows:
-                cells = row.query_selector_all('td')
-                if len(cells) >= 2:
-                    label = cells[0].inner_text().strip()
-                    value = cells[1].inner_text().strip()
-                    elements.append(["Puntuación Veterinaria", "table", f"{label}: {value}", ""])
-        
-        # Extrair outros elementos
-        headings = page.query_selector_all('h1, h2, h3, h4, h5, h6')
-        for h in headings:
-            elements.append([f"Heading {h.evaluate('node => node.tagName').lower()}", h.evaluate('node => node.tagName').lower(), h.inner_text().strip(), ""])
-        
-        paragraphs = page.query_selector_all('p')
-        for p in paragraphs:
-            elements.append(["Paragraph", "p", p.inner_text().strip(), ""])
-        
-        links = page.query_selector_all('a')
-        for link in links:
-            href = link.get_attribute('href')
-            elements.append(["Link", "a", link.inner_text().strip(), href or ""])
-        
-        # Extrair texto principal
-        main_content = page.query_selector('main') or page.query_selector('article') or page.query_selector('body')
-        main_text = main_content.inner_text() if main_content else ""
-        
-        # Extrair todos os textos visíveis
-        all_text = page.inner_text('body')
-        
-        # Fechar o navegador
-        browser.close()
-        
-        # Processar o HTML com BeautifulSoup para extração adicional
-        soup = BeautifulSoup(html_content, 'html5lib')
-        
-        # Extrair textos de elementos específicos
-        texts = []
-        for element in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li']):
-            text = clean_text(element.get_text())
-            if text:
-                texts.append(text)
-        
-        return texts, main_text, metadata, alt_tags, title, elements
+        validators = cache_validators(response.headers if response else None)
+        return _extracted_tuple(data, html_content), render_stats, validators
+    
+    # O navegador é compartilhado pelo worker; o contexto é fechado ao final de cada chamada
+    extracted, render_stats, validators = get_browser_pool().run(_extract)
+    return _store_page(url, extracted, render_stats, validators, use_cache, stats)
 
-def compare_texts(doc_texts, web_texts):
-    """Compara textos do documento com textos da web."""
-    results = []
+async def _extract_async(context, url):
+    """Versão assíncrona da extração de load_url_text, usada no processamento em lote."""
+    render_stats = {}
+    page = await context.new_page()
+    await install_request_blocking_async(page, url, render_stats)
+    response = await page.goto(url, wait_until="networkidle")
     
-    for doc_text in doc_texts:
-        best_match = None
-        best_similarity = 0
-        
-        for web_text in web_texts:
-            # Calcular similaridade simples baseada em palavras comuns
-            doc_words = set(doc_text.lower().split())
-            web_words = set(web_text.lower().split())
-            
-            if not doc_words or not web_words:
-                continue
-                
-            common_words = doc_words.intersection(web_words)
-            similarity = len(common_words) / max(len(doc_words), len(web_words))
-            
-            if similarity > best_similarity:
-                best_similarity = similarity
-                best_match = web_text
-        
-        # Determinar status baseado na similaridade
-        if best_similarity >= 0.9:
-            status = "Exato"
-        elif best_similarity >= 0.7:
-            status = "Similar"
-        elif best_similarity >= 0.5:
-            status = "Parcial"
-        else:
-            status = "Não encontrado"
-            best_match = None
-            best_similarity = None
-        
-        results.append({
-            "doc_text": doc_text,
-            "web_text": best_match,
-            "status": status,
-            "similarity": best_similarity
-        })
+    data = await page.evaluate(EXTRACT_SCRIPT)
+    html_content = await page.content()
     
-    return results
+    validators = cache_validators(response.headers if response else None)
+    return _extracted_tuple(data, html_content), render_stats, validators
 
-def generate_summary(comparison_results):
-    """Gera um resumo dos resultados da comparação."""
-    counts = {
-        "exact": 0,
-        "similar": 0,
-        "partial": 0,
-        "missing": 0
+def _finish_page(title, html_content, metadata, alt_tags, elements, main_text, texts=None):
+    """Complementa os dados extraídos do navegador com os textos obtidos via BeautifulSoup."""
+    if texts is None:
+        texts = run_cpu(_page_texts, html_content)
+    return texts, main_text, metadata, alt_tags, title, elements
+
+def _cache_settings():
+    """Configurações que influenciam a extração e fazem parte da chave do cache de páginas."""
+    return {
+        'scraper': 'main',
+        'extract_version': EXTRACT_VERSION,
+        'request_blocking': REQUEST_BLOCKING,
+        'static_fetch': STATIC_FETCH,
+        'static_min_text_chars': STATIC_MIN_TEXT_CHARS
     }
-    
-    for result in comparison_results:
-        if result["status"] == "Exato":
-            counts["exact"] += 1
-        elif result["status"] == "Similar":
-            counts["similar"] += 1
-        elif result["status"] == "Parcial":
-            counts["partial"] += 1
+
+def _cached_page(url, stats):
+    """Busca a página no cache em disco. Retorna a mesma tupla de load_url_text ou None."""
+    entry = get_page_cache().get(url, _cache_settings())
+    if entry is None:
+        return None
+    data = entry['data']
+    if stats is not None:
+        stats.update(data['render_stats'])
+        stats['cache'] = entry['cache_status']
+    return data['texts'], data['main_text'], data['metadata'], data['alt_tags'], data['title'], data['elements']
+
+def _store_page(url, extracted, render_stats, validators, use_cache, stats, texts=None):
+    """
+    Finaliza a extração, grava o resultado no cache e preenche `stats`.
+    `texts` recebe os textos da página quando o parsing já foi feito no pool de processos.
+    """
+    page = _finish_page(*extracted, texts=texts)
+    texts, main_text, metadata, alt_tags, title, elements = page
+    get_page_cache().put(url, _cache_settings(), {
+        'html': extracted[1],
+        'texts': texts,
+        'main_text': main_text,
+        'metadata': metadata,
+        'alt_tags': alt_tags,
+        'title': title,
+        'elements': elements,
+        'render_stats': render_stats
+    }, validators)
+    if stats is not None:
+        stats.update(render_stats)
+        stats['cache'] = 'miss' if use_cache else 'bypass'
+    return page
+
+def iter_urls_text(urls, use_cache=True, stop=None):
+    """
+    Carrega várias URLs em paralelo (ver SCRAPE_CONCURRENCY e SCRAPE_URL_TIMEOUT) e gera
+    (índice, página, métricas) na ordem em que cada uma fica pronta: primeiro as do cache,
+    depois as que o HTML estático resolve (ver _try_static) e as renderizadas no navegador,
+    assim que cada uma termina.
+    URLs que falharam vêm com uma Exception no lugar da página.
+    `stop` (threading.Event) interrompe o carregamento: nenhuma URL nova é renderizada nem enviada
+    ao parsing. Ele é sinalizado também quando o gerador é fechado antes do fim (cliente desconectado,
+    erro ou cancelamento de quem consome).
+    """
+    if stop is None:
+        stop = threading.Event()
+    pending = {}
+    for i, url in enumerate(urls):
+        url_stats = {}
+        page = _cached_page(url, url_stats) if use_cache else None
+        if page is not None:
+            yield i, page, url_stats
         else:
-            counts["missing"] += 1
-    
-    return counts
-
-def generate_summary_table(comparison_results):
-    """Gera uma tabela de resumo para os resultados da comparação."""
-    counts = {
-        "Exato": 0,
-        "Similar": 0,
-        "Parcial": 0,
-        "Não encontrado": 0
-    }
+            pending.setdefault(url, []).append(i)
+    if not pending or stop.is_set():
+        return
     
-    for result in comparison_results:
-        counts[result["status"]] += 1
+    # A renderização roda em outra thread; cada página chega pela fila assim que termina.
+    # O parsing do HTML vai para o pool de processos e a página volta pela mesma fila quando fica pronta.
+    ready = queue.Queue()
     
-    total = sum(counts.values())
+    # Métricas da camada estática das URLs escaladas para o navegador
+    tier_stats = {}
     
-    summary_table = {}
-    for status, count in counts.items():
-        percent = (count / total * 100) if total > 0 else 0
-        summary_table[status] = {"count": count, "percent": percent}
+    def _static(url):
+        if stop.is_set():
+            return None
+        return _try_static(url)
     
-    summary_table["TOTAL"] = {"count": total, "percent": 100}
+    def _render():
+        try:
+            escalated = []
+            with ThreadPoolExecutor(max_workers=max(1, app.config['SCRAPE_CONCURRENCY'])) as executor:
+                futures = {executor.submit(_static, url): url for url in pending}
+                for future in as_completed(futures):
+                    url = futures[future]
+                    attempt = future.result()
+                    if attempt is None:
+                        continue
+                    if attempt[0] is not None:
+                        ready.put(('static', url, attempt))
+                    else:
+                        tier_stats[url] = attempt[2]
+                        escalated.append(url)
+            if stop.is_set():
+                return
+            scrape_many(
+                escalated,
+                _extract_async,
+                concurrency=app.config['SCRAPE_CONCURRENCY'],
+                timeout=app.config['SCRAPE_URL_TIMEOUT'],
+                on_result=lambda url, result: ready.put(('rendered', url, result)),
+                stop=stop
+            )
+        except Exception as e:
+            ready.put(('rendered', None, e))
+        finally:
+            ready.put(None)
     
-    return summary_table
+    threading.Thread(target=_render, daemon=True).start()
+    rendering = True
+    parsing = 0
+    try:
+        while rendering or parsing:
+            item = ready.get()
+            if stop.is_set():
+                return
+            if item is None:
+                rendering = False
+                continue
+            kind, url, result = item
+            if url is None:
+                # Falha do lote inteiro (ex.: o navegador não abriu)
+                raise result
+            if kind == 'static':
+                extracted, texts, static_stats, validators = result
+                url_stats = {}
+                page = _store_page(url, extracted, static_stats, validators, use_cache, url_stats, texts=texts)
+                for i in pending.pop(url):
+                    yield i, page, dict(url_stats)
+                continue
+            if kind == 'rendered':
+                if isinstance(result, Exception):
+                    for i in pending.pop(url):
+                        yield i, result, dict(tier_stats.get(url, {}))
+                    continue
+                result[1].update(tier_stats.get(url, {}))
+                parsing += 1
+                future = submit_cpu(_page_texts, result[0][1])
+                future.add_done_callback(lambda f, url=url, result=result: ready.put(('parsed', url, (result, f))))
+                continue
+            
+            parsing -= 1
+            rendered, future = result
+            indexes = pending.pop(url)
+            try:
+                texts = future.result()
+            except Exception as e:
+                for i in indexes:
+                    yield i, e, {}
+                continue
+            url_stats = {}
+            page = _store_page(url, *rendered, use_cache, url_stats, texts=texts)
+            for i in indexes:
+                yield i, page, dict(url_stats)
+    finally:
+        # Gerador fechado ou com erro: a thread de renderização não abre mais nenhuma URL
+        stop.set()
 
-def create_excel_report(excel_path, comparison_results, summary_table, elements, docx_path, web_url):
-    """Cria um relatório Excel com os resultados da comparação."""
-    wb = openpyxl.Workbook()
-    
-    # Criar aba de comparação
-    ws_comparison = wb.active
-    ws_comparison.title = "Comparacao"
-    
-    # Adicionar cabeçalhos
-    headers = ["Document Text", "Webpage Match", "Status", "Similarity"]
-    for col_num, header in enumerate(headers, 1):
-        cell = ws_comparison.cell(row=1, column=col_num)
-        cell.value = header
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
-    
-    # Adicionar dados de comparação
-    for row_num, result in enumerate(comparison_results, 2):
-        ws_comparison.cell(row=row_num, column=1).value = result["doc_text"]
-        ws_comparison.cell(row=row_num, column=2).value = result["web_text"] if result["web_text"] else "Não encontrado"
-        ws_comparison.cell(row=row_num, column=3).value = result["status"]
-        
-        if result["similarity"] is not None:
-            ws_comparison.cell(row=row_num, column=4).value = f"{result['similarity']:.2%}"
-        else:
-            ws_comparison.cell(row=row_num, column=4).value = "N/A"
-        
-        # Adicionar cores baseadas no status
-        if result["status"] == "Exato":
-            fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-        elif result["status"] == "Similar":
-            fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-        elif result["status"] == "Parcial":
-            fill = PatternFill(start_color="FFCC99", end_color="FFCC99", fill_type="solid")
-        else:
-            fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-        
-        for col in range(1, 5):
-            ws_comparison.cell(row=row_num, column=col).fill = fill
-    
-    # Ajustar largura das colunas
-    for col in range(1, 5):
-        ws_comparison.column_dimensions[get_column_letter(col)].width = 40
-    
-    # Criar aba de resumo
-    ws_summary = wb.create_sheet(title="Resumo")
+def load_urls_text(urls, stats=None, use_cache=True, stop=None):
+    """
+    Carrega várias URLs em paralelo; apenas as URLs ausentes do cache são renderizadas.
+    Retorna uma lista na ordem de `urls`; URLs que falharam vêm como Exception.
+    Se `stats` for uma lista, recebe um dicionário de métricas por URL.
+    `stop` interrompe o carregamento (ver iter_urls_text); as URLs que faltavam ficam como None.
+    """
+    results = [None] * len(urls)
+    url_stats = [{} for _ in urls]
+    for i, page, page_stats in iter_urls_text(urls, use_cache=use_cache, stop=stop):
+        results[i] = page
+        url_stats[i] = page_stats
     
-    # Adicionar cabeçalhos do resumo
-    summary_headers = ["Status", "Quantidade", "Porcentagem"]
-    for col_num, header in enumerate(summary_headers, 1):
-        cell = ws_summary.cell(row=1, column=col_num)
-        cell.value = header
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
+    if stats is not None:
+        stats.extend(url_stats)
+    return results
+
+# Rotas do aplicativo
+@app.route('/')
+def index():
+    return send_from_directory('static', 'index.html')
+
+def _render_report(data, excel_path):
+    """Gera o relatório Excel de um resultado guardado no pool de processos (ver ReportStore.workbook)."""
+    return run_cpu(write_report, data, excel_path)
+
+def submit_comparison(upload, web_url, page, report_id, incremental=False):
+    """
+    Envia a comparação do DOCX enviado com a página carregada ao pool de processos e retorna o Future.
+    Com `incremental`, os parágrafos já comparados com esta mesma versão da página são reaproveitados
+    (ver src/utils/incremental.py) e só os novos ou alterados são comparados.
+    """
+    web_texts, main, metadata, alt_tags, title, elements = page
+    match_stats = {}
+    docx_texts = load_docx_texts(upload, match_stats)
+    matches = None
+    if incremental:
+        snapshot = page_snapshot(web_texts, app.config['MATCH_MODE'])
+        match_stats['page_snapshot'] = snapshot
+        matches = get_match_cache().known(snapshot, {paragraph_key(text) for text in docx_texts})
+    return submit_cpu(
+        compare_and_store,
+        docx_texts,
+        upload['filename'],
+        list(web_texts),
+        [tuple(elem) for elem in elements],
+        get_report_store().data_path(report_id),
+        web_url,
+        app.config['MATCH_MODE'],
+        match_stats,
+        matches
+    )
+
+def comparison_payload(page, report_id, compared, render_stats=None, compact=False):
+    """
+    Monta o resultado para a resposta JSON a partir do retorno de compare_and_store.
+    Com `compact`, `comparison` e `elements` vêm em formato colunar (ver src/utils/compact.py),
+    só com a primeira página; as seguintes são lidas em /results/<report_id>/<seção>?cursor=.
+    """
+    web_texts, main, metadata, alt_tags, title, elements = page
+    rows, match_stats, _ = compared
+    comparison_results = [
+        {
+            'doc_text': doc_text,
+            'web_text': web_text,
+            'status': status,
+            'similarity': similarity
+        }
+        for doc_text, web_text, status, similarity in rows
+    ]
     
-    # Adicionar dados do resumo
-    row_num = 2
-    for status, info in summary_table.items():
-        ws_summary.cell(row=row_num, column=1).value = status
-        ws_summary.cell(row=row_num, column=2).value = info["count"]
-        ws_summary.cell(row=row_num, column=3).value = f"{info['percent']:.2f}%"
-        
-        # Adicionar cores baseadas no status
-        if status == "Exato":
-            fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-        elif status == "Similar":
-            fill = PatternFill(start_color="FFEB9C", end_color="FFEB9C", fill_type="solid")
-        elif status == "Parcial":
-            fill = PatternFill(start_color="FFCC99", end_color="FFCC99", fill_type="solid")
-        elif status == "Não encontrado":
-            fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-        else:
-            fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-        
-        for col in range(1, 4):
-            ws_summary.cell(row=row_num, column=col).fill = fill
-        
-        row_num += 1
+    # Extrair avaliações veterinárias
+    vet_ratings = []
+    for element in elements:
+        if element[0] == 'Puntuación Veterinaria':
+            vet_ratings.append(element[2])
     
-    # Ajustar largura das colunas do resumo
-    for col in range(1, 4):
-        ws_summary.column_dimensions[get_column_letter(col)].width = 20
+    if compact:
+        sections = {
+            'comparison': columnar('comparison', rows, 0, COMPACT_PAGE_SIZE),
+            'elements': columnar('elements', elements, 0, COMPACT_PAGE_SIZE),
+            'pages_url': {section: f"/results/{report_id}/{section}" for section in SECTIONS}
+        }
+    else:
+        sections = {
+            'comparison': comparison_results,
+            'elements': [
+                {
+                    'definition': elem[0],
+                    'tag': elem[1],
+                    'text': elem[2],
+                    'link': elem[3]
+                }
+                for elem in elements
+            ]
+        }
     
-    # Criar aba de elementos da página
-    ws_elements = wb.create_sheet(title="Elementos da Página")
+    return {
+        'summary': generate_summary(comparison_results),
+        'summary_table': generate_summary_table(comparison_results),
+        **sections,
+        'vet_ratings': vet_ratings,
+        # URL para download do Excel (gerado só quando for baixado)
+        'excel_url': f"/download/{report_id}.xlsx",
+        'metadata': metadata,
+        'render_stats': render_stats or {},
+        'match_stats': match_stats
+    }
+
+def finish_comparison(upload, web_url, page, report_id, compared, render_stats=None, batch_id=None, compact=False,
+                      base_report_id=None):
+    """
+    Grava a comparação concluída no histórico e monta o resultado para a resposta JSON.
+    No modo incremental guarda os resultados por parágrafo e acrescenta `delta`: o que mudou de status
+    em relação a `base_report_id` ou, se não informado, à última comparação registrada da mesma URL
+    com o mesmo documento, fora do lote atual. Sem comparação anterior, `delta` é None.
+    """
+    rows, match_stats, matches = compared
+    delta = None
+    if matches is not None:
+        get_match_cache().update(match_stats['page_snapshot'], matches)
+        base_report_id = base_report_id or latest_report_id(app, web_url, upload['filename'], batch_id)
+        base = get_report_store().load(base_report_id) if base_report_id else None
+        if base is not None:
+            delta = status_delta(rows, base['rows'], base_report_id)
+    run_id = record_comparison(
+        app, report_id, upload['filename'], web_url, rows, page[5], match_stats.get('docx_hash', ''), batch_id
+    )
+    result = {**comparison_payload(page, report_id, compared, render_stats, compact), 'history_run_id': run_id}
+    if matches is not None:
+        result['delta'] = delta
+    return result
+
+def build_comparison_result(upload, web_url, page, report_id, render_stats=None, compact=False, incremental=False,
+                            base_report_id=None):
+    """Compara o DOCX com a página carregada, guarda o resultado para o Excel e monta o resultado para a resposta JSON."""
+    compared = submit_comparison(upload, web_url, page, report_id, incremental).result()
+    return finish_comparison(
+        upload, web_url, page, report_id, compared, render_stats, compact=compact, base_report_id=base_report_id
+    )
+
+def _read_docx(docx_file):
+    """
+    Lê o DOCX enviado em memória. Jobs em segundo plano (async=1) e keep_upload=1 (ou UPLOAD_PERSIST)
+    gravam o arquivo no armazenamento de artefatos, fora de static/.
+    """
+    upload = read_upload(docx_file)
+    keep = UPLOAD_PERSIST or request.form.get('keep_upload') == '1'
+    if keep or request.form.get('async') == '1':
+        return persist_upload(upload, keep=keep)
+    return upload
+
+def _report_id(suffix=''):
+    """Id único do relatório Excel (jobs em paralelo podem terminar no mesmo segundo)."""
+    return f"comparison{suffix}_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+def _batch_id():
+    """Id único do lote; os relatórios dos pares são <batch_id>_<par> (ver ReportStore.batch)."""
+    return f"batch_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+
+def _export_urls(batch_id):
+    """URLs da exportação consolidada do lote: um zip com os relatórios ou um Excel com uma aba por par."""
+    return {
+        'zip': f"/export/{batch_id}.zip",
+        'xlsx': f"/export/{batch_id}.xlsx"
+    }
+
+def run_single_comparison(params, job=None):
+    """
+    Executa uma comparação singular. `job` (JobContext) recebe o progresso quando
+    a comparação roda em segundo plano.
+    """
+    try:
+        if job:
+            job.stage('render', 1)
+        render_stats = {}
+        page = load_url_text(params['web_url'], stats=render_stats, use_cache=params['use_cache'])
+        if job:
+            job.advance('render')
+            job.stage('compare', 1)
+        result = build_comparison_result(
+            params['docx'], params['web_url'], page, _report_id(), render_stats, params.get('compact', False),
+            params.get('incremental', False), params.get('base_report_id')
+        )
+        if job:
+            job.advance('compare')
+        return {'success': True, **result}
+    finally:
+        discard_upload(params['docx'])
+
+def _pair_title(upload, web_url):
+    return f"{upload['filename']} e {web_url}"
+
+def iter_batch_results(params, job=None):
+    """
+    Gera (posição do par, resultado) na ordem em que os pares ficam prontos.
+    As páginas são carregadas em outra thread e cada par vai para o pool de processos assim que
+    a sua página chega, então vários pares são comparados ao mesmo tempo enquanto os demais renderizam.
+    Uma URL com erro ou timeout não interrompe o restante do lote.
+    """
+    pairs = params['pairs']
+    if job:
+        job.stage('render', len(pairs))
     
-    # Adicionar cabeçalhos dos elementos
-    element_headers = ["Definition", "Tag", "Text", "Link"]
-    for col_num, header in enumerate(element_headers, 1):
-        cell = ws_elements.cell(row=1, column=col_num)
-        cell.value = header
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal='center')
+    # Páginas carregadas e comparações concluídas chegam pela mesma fila
+    events = queue.Queue()
+    # Sinalizado quando o lote é interrompido: a thread de carregamento para de abrir URLs
+    stop = threading.Event()
     
-    # Adicionar dados dos elementos
-    for row_num, element in enumerate(elements, 2):
-        for col_num, value in enumerate(element, 1):
-            ws_elements.cell(row=row_num, column=col_num).value = value
+    def _load():
+        try:
+            for item in iter_urls_text([web_url for _, _, web_url in pairs], use_cache=params['use_cache'], stop=stop):
+                events.put(('page', item))
+        except Exception as e:
+            events.put(('error', e))
+        finally:
+            events.put(('loaded', None))
     
-    # Ajustar largura das colunas dos elementos
-    ws_elements.column_dimensions[get_column_letter(1)].width = 20
-    ws_elements.column_dimensions[get_column_letter(2)].width = 10
-    ws_elements.column_dimensions[get_column_letter(3)].width = 60
-    ws_elements.column_dimensions[get_column_letter(4)].width = 40
+    threading.Thread(target=_load, daemon=True).start()
+    compare_started = False
+    loading = True
+    comparing = {}
+    try:
+        while loading or comparing:
+            try:
+                kind, item = events.get(timeout=JOB_CANCEL_POLL if job else None)
+            except queue.Empty:
+                # Nenhuma página ou comparação concluída no intervalo: o cancelamento vale durante a renderização
+                job.check_cancelled()
+                continue
+            if kind == 'loaded':
+                loading = False
+                continue
+            if kind == 'error':
+                raise item
+            
+            if kind == 'page':
+                position, page, page_stats = item
+                if job:
+                    job.advance('render')
+                    if not compare_started:
+                        job.stage('compare', len(pairs))
+                        compare_started = True
+                    job.check_cancelled()
+                i, upload, web_url = pairs[position]
+                if isinstance(page, Exception):
+                    yield position, {'title': _pair_title(upload, web_url), 'error': str(page)}
+                    if job:
+                        job.advance('compare')
+                    continue
+                report_id = f"{params['batch_id']}_{i}"
+                future = submit_comparison(upload, web_url, page, report_id, params.get('incremental', False))
+                comparing[position] = (future, page, page_stats, report_id)
+                future.add_done_callback(lambda f, position=position: events.put(('compared', position)))
+                continue
+            
+            future, page, page_stats, report_id = comparing.pop(item)
+            i, upload, web_url = pairs[item]
+            result = finish_comparison(
+                upload, web_url, page, report_id, future.result(), page_stats, params['batch_id'], params.get('compact', False),
+                params.get('base_report_ids', {}).get(str(i))
+            )
+            yield item, {'title': _pair_title(upload, web_url), **result}
+            if job:
+                job.advance('compare')
+    finally:
+        # Lote interrompido (erro, cancelamento ou cliente desconectado): descarta o que ainda não começou
+        stop.set()
+        for future, *_ in comparing.values():
+            future.cancel()
+        for _, upload, _ in pairs:
+            discard_upload(upload)
+
+def run_batch_comparison(params, job=None):
+    """
+    Executa uma comparação em lote e retorna os resultados na ordem dos pares.
+    """
+    results = [None] * len(params['pairs'])
+    for position, result in iter_batch_results(params, job):
+        results[position] = result
     
-    # Salvar o arquivo Excel
-    wb.save(excel_path)
-    return excel_path
+    return {
+        'success': True,
+        'results': results,
+        'batch_id': params['batch_id'],
+        'export_urls': _export_urls(params['batch_id'])
+    }
 
-# Rotas do aplicativo
-@app.route('/')
-def index():
-    return send_from_directory('static', 'index.html')
+def stream_batch_results(params):
+    """
+    Versão em streaming do lote (NDJSON): uma linha JSON por par, com o campo `index`,
+    enviada assim que o par fica pronto, e uma linha final {"done": true} com as URLs de exportação do lote.
+    Nenhum resultado fica guardado no servidor depois de enviado.
+    """
+    try:
+        for position, result in iter_batch_results(params):
+            yield json.dumps({'index': position, **result}) + '\n'
+        yield json.dumps({
+            'done': True,
+            'count': len(params['pairs']),
+            'batch_id': params['batch_id'],
+            'export_urls': _export_urls(params['batch_id'])
+        }) + '\n'
+    except Exception as e:
+        yield json.dumps({'error': str(e)}) + '\n'
+
+def _discard_pair_uploads(params):
+    """Apaga os uploads persistidos dos pares de um lote cancelado antes de começar."""
+    for _, upload, _ in params['pairs']:
+        discard_upload(upload)
+
+register_job('comparison', lambda job: run_single_comparison(job.params, job),
+             cleanup=lambda params: discard_upload(params['docx']))
+register_job('batch_comparison', lambda job: run_batch_comparison(job.params, job), cleanup=_discard_pair_uploads)
+
+# Só no processo web: reenfileira já na inicialização os jobs interrompidos por um reinício ou deploy,
+# sem esperar a primeira requisição a /upload ou /jobs
+if multiprocessing.parent_process() is None:
+    get_job_manager()
+
+def _respond(kind, params, run):
+    """
+    Executa a comparação na própria requisição ou, com async=1, enfileira um job
+    e responde imediatamente com o id para consulta em /jobs/<id>.
+    """
+    if request.form.get('async') == '1':
+        job_id = get_job_manager().submit(kind, params)
+        return jsonify({'success': True, 'job_id': job_id, 'status_url': f"/jobs/{job_id}"}), 202
+    return jsonify(run(params))
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """
     Processa um único par de documento DOCX e URL para comparação.
+    Com async=1 a comparação roda em segundo plano (ver /jobs/<id>).
     """
     try:
         # Verificar se o arquivo foi enviado
@@ -339,72 +729,19 @@ def upload_file():
         if not docx_file or not web_url:
             return jsonify({'error': 'Arquivo DOCX e URL são obrigatórios'}), 400
         
-        # Salvar arquivo temporário
-        temp_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(int(time.time())))
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        docx_path = os.path.join(temp_dir, secure_filename(docx_file.filename))
-        docx_file.save(docx_path)
-        
-        # Processar comparação
-        docx_texts = extract_docx_text(docx_path)
-        web_texts, main, metadata, alt_tags, title, elements = load_url_text(web_url)
-        
-        # Calcular similaridades
-        comparison_results = compare_texts(docx_texts, web_texts)
-        
-        # Gerar resumo
-        summary = generate_summary(comparison_results)
-        summary_table = generate_summary_table(comparison_results)
-        
-        # Extrair avaliações veterinárias
-        vet_ratings = []
-        for element in elements:
-            if element[0] == 'Puntuación Veterinaria':
-                vet_ratings.append(element[2])
-        
-        # Gerar Excel
-        excel_filename = f"comparison_{int(time.time())}.xlsx"
-        excel_path = os.path.join(app.config['RESULTS_FOLDER'], excel_filename)
-        
-        create_excel_report(
-            excel_path,
-            comparison_results,
-            summary_table,
-            elements,
-            docx_path,
-            web_url
-        )
-        
-        # URL para download do Excel
-        excel_url = f"/download/{excel_filename}"
-        
-        return jsonify({
-            'success': True,
-            'summary': summary,
-            'summary_table': summary_table,
-            'comparison': [
-                {
-                    'doc_text': item['doc_text'],
-                    'web_text': item['web_text'],
-                    'status': item['status'],
-                    'similarity': item['similarity']
-                }
-                for item in comparison_results
-            ],
-            'elements': [
-                {
-                    'definition': elem[0],
-                    'tag': elem[1],
-                    'text': elem[2],
-                    'link': elem[3]
-                }
-                for elem in elements
-            ],
-            'vet_ratings': vet_ratings,
-            'excel_url': excel_url,
-            'metadata': metadata
-        })
+        params = {
+            'docx': _read_docx(docx_file),
+            'web_url': web_url,
+            # no_cache=1 força uma nova renderização da página
+            'use_cache': request.form.get('no_cache') != '1',
+            # compact=1 troca as listas de dicionários por colunas paginadas
+            'compact': request.form.get('compact') == '1',
+            # incremental=1 só recompara os parágrafos novos ou alterados e devolve o `delta`
+            # em relação a base_report_id (ou à última comparação da mesma URL com o mesmo documento)
+            'incremental': request.form.get('incremental') == '1',
+            'base_report_id': request.form.get('base_report_id')
+        }
+        return _respond('comparison', params, run_single_comparison)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -413,14 +750,17 @@ def upload_file():
 def batch_upload():
     """
     Processa múltiplos pares de documento DOCX e URL para comparação em lote.
-    Usa a mesma lógica da comparação singular para cada par.
+    Com async=1 o lote roda em segundo plano (ver /jobs/<id>); com stream=1 os resultados
+    são enviados par a par em NDJSON.
     """
     try:
         pair_count = int(request.form.get('pair_count', 0))
         if pair_count <= 0:
             return jsonify({'error': 'Nenhum par de comparação fornecido'}), 400
         
-        results = []
+        pairs = []
+        # Base do delta de cada par no modo incremental (chave: número do par em texto, como no JSON do job)
+        base_report_ids = {}
         
         for i in range(pair_count):
             docx_file = request.files.get(f'docx_file_{i}')
@@ -429,88 +769,137 @@ def batch_upload():
             if not docx_file or not web_url:
                 continue
             
-            # Salvar arquivo temporário
-            temp_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(int(time.time())))
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            docx_path = os.path.join(temp_dir, secure_filename(docx_file.filename))
-            docx_file.save(docx_path)
-            
-            # Processar comparação - mesma lógica da comparação singular
-            docx_texts = extract_docx_text(docx_path)
-            web_texts, main, metadata, alt_tags, title, elements = load_url_text(web_url)
-            
-            # Calcular similaridades
-            comparison_results = compare_texts(docx_texts, web_texts)
-            
-            # Gerar resumo
-            summary = generate_summary(comparison_results)
-            summary_table = generate_summary_table(comparison_results)
-            
-            # Extrair avaliações veterinárias
-            vet_ratings = []
-            for element in elements:
-                if element[0] == 'Puntuación Veterinaria':
-                    vet_ratings.append(element[2])
-            
-            # Gerar Excel com formatação condicional e cores
-            excel_filename = f"comparison_{i}_{int(time.time())}.xlsx"
-            excel_path = os.path.join(app.config['RESULTS_FOLDER'], excel_filename)
-            
-            create_excel_report(
-                excel_path,
-                comparison_results,
-                summary_table,
-                elements,
-                docx_path,
-                web_url
-            )
-            
-            # URL para download do Excel
-            excel_url = f"/download/{excel_filename}"
-            
-            # Adicionar resultado ao lote com informações detalhadas
-            results.append({
-                'title': f"{os.path.basename(docx_path)} e {web_url}",
-                'summary': summary,
-                'summary_table': summary_table,
-                'comparison': [
-                    {
-                        'doc_text': item['doc_text'],
-                        'web_text': item['web_text'],
-                        'status': item['status'],
-                        'similarity': item['similarity']
-                    }
-                    for item in comparison_results
-                ],
-                'elements': [
-                    {
-                        'definition': elem[0],
-                        'tag': elem[1],
-                        'text': elem[2],
-                        'link': elem[3]
-                    }
-                    for elem in elements
-                ],
-                'vet_ratings': vet_ratings,
-                'excel_url': excel_url,
-                'metadata': metadata
-            })
-        
-        return jsonify({
-            'success': True,
-            'results': results
-        })
+            pairs.append((i, _read_docx(docx_file), web_url))
+            if request.form.get(f'base_report_id_{i}'):
+                base_report_ids[str(i)] = request.form.get(f'base_report_id_{i}')
+        
+        params = {
+            'pairs': pairs,
+            'batch_id': _batch_id(),
+            'use_cache': request.form.get('no_cache') != '1',
+            'compact': request.form.get('compact') == '1',
+            'incremental': request.form.get('incremental') == '1',
+            'base_report_ids': base_report_ids
+        }
+        # stream=1 envia cada par assim que fica pronto (NDJSON)
+        if request.form.get('stream') == '1':
+            return Response(stream_with_context(stream_batch_results(params)), mimetype='application/x-ndjson')
+        return _respond('batch_comparison', params, run_batch_comparison)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """
+    Estado de um job: status (queued, running, done, failed, cancelled),
+    etapa atual, progresso por etapa e, ao final, o mesmo resultado da rota síncrona.
+    """
+    status = get_job_manager().status(job_id)
+    if status is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """
+    Cancela um job na fila ou em execução (o job em execução para na próxima etapa ou par).
+    """
+    manager = get_job_manager()
+    if manager.status(job_id) is None:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    if not manager.cancel(job_id):
+        return jsonify({'error': 'Job já finalizado'}), 409
+    return jsonify(manager.status(job_id))
+
+@app.route('/health/browser', methods=['GET'])
+def browser_health():
+    """
+    Verifica o estado do pool de navegadores do worker e do navegador dos lotes (async_browser).
+    Use ?probe=1 para abrir uma página de teste no navegador.
+    """
+    status = get_browser_pool().health(probe=request.args.get('probe') == '1')
+    status['async_browser'] = get_async_browser().health()
+    return jsonify(status), (200 if status['healthy'] else 503)
+
 @app.route('/download/<filename>', methods=['GET'])
 def download_file(filename):
     """
     Rota para download do arquivo Excel com os resultados.
+    O Excel é gerado no primeiro download a partir do resultado guardado na comparação e depois
+    reaproveitado; a resposta leva ETag e Last-Modified, então downloads repetidos podem receber 304.
+    """
+    report_id = filename[:-len('.xlsx')] if filename.endswith('.xlsx') else filename
+    path = get_report_store().workbook(report_id, _render_report)
+    if path is None:
+        # Relatórios gerados antes da geração sob demanda ficam em RESULTS_FOLDER
+        return send_from_directory(app.config['RESULTS_FOLDER'], filename, as_attachment=True)
+    return send_file(path, as_attachment=True, download_name=filename, conditional=True, etag=True)
+
+@app.route('/results/<report_id>/<section>', methods=['GET'])
+def result_page(report_id, section):
+    """
+    Próximas páginas de `comparison` ou `elements` de uma resposta compacta (compact=1).
+    Use o `next_cursor` da página anterior em ?cursor= e, opcionalmente, ?limit= para o tamanho.
     """
-    return send_from_directory(app.config['RESULTS_FOLDER'], filename, as_attachment=True)
+    if section not in SECTIONS:
+        return jsonify({'error': 'Seção não encontrada'}), 404
+    try:
+        offset = parse_cursor(request.args.get('cursor'))
+        limit = page_size(request.args.get('limit'))
+    except ValueError:
+        return jsonify({'error': 'cursor ou limit inválido'}), 400
+    data = get_report_store().load(report_id)
+    if data is None:
+        return jsonify({'error': 'Resultado não encontrado'}), 404
+    records = data['rows'] if section == 'comparison' else data['elements']
+    return jsonify(columnar(section, records, offset, limit))
+
+@app.route('/export/<filename>', methods=['GET'])
+def export_batch(filename):
+    """
+    Exportação consolidada de um lote em uma única requisição:
+    - <batch_id>.zip: zip com o relatório Excel de cada par
+    - <batch_id>.xlsx: um Excel com uma aba por par e uma aba de resumo entre os pares
+    A resposta é enviada em blocos (chunked), sem montar o arquivo inteiro em memória.
+    """
+    batch_id, _, fmt = filename.rpartition('.')
+    store = get_report_store()
+    report_ids = store.batch(batch_id)
+    if fmt not in ('zip', 'xlsx') or not report_ids:
+        return jsonify({'error': 'Lote não encontrado'}), 404
+    
+    if fmt == 'zip':
+        def _entries():
+            # Cada relatório é gerado (se ainda não foi baixado) só quando chega a sua vez no zip
+            for report_id in report_ids:
+                path = store.workbook(report_id, _render_report)
+                if path is not None:
+                    yield f"par_{_pair_number(report_id):02d}.xlsx", path
+        
+        body = iter_zip(_entries())
+        mimetype = 'application/zip'
+    else:
+        def _consolidated():
+            # O xlsx também é um zip, com o índice no final: é gravado em um arquivo temporário
+            # no modo write-only e enviado em blocos
+            path = os.path.join(store.directory, f"{batch_id}.{uuid.uuid4().hex}.tmp.xlsx")
+            try:
+                run_cpu(write_batch_report, report_ids, path)
+                yield from iter_file(path)
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+        
+        body = _consolidated()
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=False)
@@ -0,0 +1,114 @@
+import hashlib
+from datetime import datetime, timezone
+from src.models.user import db
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def url_hash(web_url):
+    """SHA-1 da URL em hexadecimal: chave de tamanho fixo indexada no lugar da URL (até 2048 caracteres)."""
+    return hashlib.sha1(web_url.encode('utf-8')).hexdigest()
+
+
+class ComparisonRun(db.Model):
+    """Uma comparação concluída (DOCX x página), com os totais por status."""
+    __tablename__ = 'comparison_run'
+    __table_args__ = (
+        # Índice pelo hash: o MySQL não indexa uma coluna VARCHAR(2048) inteira
+        db.Index('ix_comparison_run_url_hash_created', 'web_url_hash', 'created_at'),
+        db.Index('ix_comparison_run_hash_created', 'docx_hash', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    report_id = db.Column(db.String(80), unique=True, nullable=False)
+    batch_id = db.Column(db.String(64), index=True)
+    web_url = db.Column(db.String(2048), nullable=False)
+    web_url_hash = db.Column(db.String(40), nullable=False)
+    docx_name = db.Column(db.String(255), nullable=False)
+    docx_hash = db.Column(db.String(64), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=_now, index=True)
+    exact = db.Column(db.Integer, nullable=False, default=0)
+    similar = db.Column(db.Integer, nullable=False, default=0)
+    partial = db.Column(db.Integer, nullable=False, default=0)
+    missing = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    # Média da similaridade dos parágrafos (sem correspondência conta como 0)
+    avg_similarity = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f'<ComparisonRun {self.report_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'report_id': self.report_id,
+            'batch_id': self.batch_id,
+            'web_url': self.web_url,
+            'docx_name': self.docx_name,
+            'docx_hash': self.docx_hash,
+            'created_at': self.created_at.isoformat(),
+            'summary': {
+                'exact': self.exact,
+                'similar': self.similar,
+                'partial': self.partial,
+                'missing': self.missing,
+                'total': self.total
+            },
+            'avg_similarity': self.avg_similarity,
+            'excel_url': f"/download/{self.report_id}.xlsx"
+        }
+
+
+class ComparisonRow(db.Model):
+    """Um parágrafo do DOCX e o seu melhor trecho correspondente na página."""
+    __tablename__ = 'comparison_row'
+    __table_args__ = (
+        db.Index('ix_comparison_row_run_position', 'run_id', 'position'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('comparison_run.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    doc_text = db.Column(db.Text, nullable=False)
+    web_text = db.Column(db.Text)
+    status = db.Column(db.String(20), nullable=False, index=True)
+    similarity = db.Column(db.Float)
+    run = db.relationship(ComparisonRun)
+
+    def to_dict(self):
+        return {
+            'run_id': self.run_id,
+            'position': self.position,
+            'doc_text': self.doc_text,
+            'web_text': self.web_text,
+            'status': self.status,
+            'similarity': self.similarity
+        }
+
+
+class PageElement(db.Model):
+    """Um elemento extraído da página na comparação (título, parágrafo, link...)."""
+    __tablename__ = 'page_element'
+    __table_args__ = (
+        db.Index('ix_page_element_run_position', 'run_id', 'position'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('comparison_run.id', ondelete='CASCADE'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    definition = db.Column(db.String(80), nullable=False)
+    tag = db.Column(db.String(20), nullable=False)
+    text = db.Column(db.Text)
+    link = db.Column(db.Text)
+
+    def to_dict(self):
+        return {
+            'run_id': self.run_id,
+            'position': self.position,
+            'definition': self.definition,
+            'tag': self.tag,
+            'text': self.text,
+            'link': self.link
+        }
@@ -1,15 +1,71 @@
 import os
 import uuid
-import time
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from flask import Blueprint, request, jsonify, send_from_directory, abort
 from werkzeug.utils import secure_filename
-from src.utils.text_processing import compare_texts, generate_summary, generate_summary_table
-from src.utils.web_scraper import load_url_text
-from src.utils.file_processing import extract_docx_text, create_excel_report
+from src.utils.web_scraper import load_url_text, load_urls_text
+from src.utils.uploads import read_upload, ARTIFACTS_DIR
 
-# Criar blueprint para as rotas do comparador
+# Comparador com TF-IDF (text_processing) sobre a extração do web_scraper: HTML estático quando
+# possível, navegador com settle adaptativo quando não. Registrado em /comparator (ver main.py).
 comparator_bp = Blueprint('comparator', __name__)
 
+# Relatórios Excel do comparador, servidos por /comparator/download/<arquivo>
+COMPARATOR_REPORTS_DIR = os.path.join(ARTIFACTS_DIR, 'comparator')
+
+
+def _compare_pair(upload, web_url, page, render_stats):
+    """
+    Compara o DOCX enviado com a página carregada, grava o Excel e monta o resultado para a resposta JSON.
+    """
+    # pandas e scikit-learn só são carregados no worker quando o comparador é usado
+    from src.utils.text_processing import compare_texts, generate_summary
+    from src.utils.file_processing import load_docx_text, save_to_excel
+
+    docx_texts = load_docx_text(upload['data'])
+    web_texts, main, metadata, alt_tags, title, elements = page
+
+    # Calcular similaridades
+    match_stats = {}
+    df_compare = compare_texts(docx_texts, web_texts, metadata, alt_tags, stats=match_stats)
+    df_summary = generate_summary(df_compare)
+
+    # Extrair avaliações veterinárias
+    vet_ratings = [element[2] for element in elements if element[0] == 'Puntuación Veterinaria']
+
+    # Gerar Excel
+    os.makedirs(COMPARATOR_REPORTS_DIR, exist_ok=True)
+    excel_filename = f"comparison_{uuid.uuid4().hex}.xlsx"
+    save_to_excel(df_compare, df_summary, elements, os.path.join(COMPARATOR_REPORTS_DIR, excel_filename))
+
+    return {
+        'title': f"{upload['filename']} e {web_url}",
+        'summary': df_summary.astype(object).to_dict('records'),
+        'comparison': [
+            {
+                'doc_text': row['Document Text'],
+                'web_text': row['Webpage Match'],
+                'status': row['Status'],
+                'similarity': row['Similarity']
+            }
+            for row in df_compare.to_dict('records')
+        ],
+        'elements': [
+            {
+                'definition': elem[0],
+                'tag': elem[1],
+                'text': elem[2],
+                'link': elem[3]
+            }
+            for elem in elements
+        ],
+        'vet_ratings': vet_ratings,
+        'excel_url': f"/comparator/download/{excel_filename}",
+        'metadata': metadata,
+        # tier (static/browser), escalation_reason, settle_ms, scrolls, accordions, settled, cache...
+        'render_stats': render_stats,
+        'match_stats': match_stats
+    }
+
 @comparator_bp.route('/upload', methods=['POST'])
 def upload_file():
     """
@@ -19,80 +75,21 @@ def upload_file():
         # Verificar se o arquivo foi enviado
         if 'docx_file' not in request.files:
             return jsonify({'error': 'Nenhum arquivo DOCX enviado'}), 400
-        
+
         docx_file = request.files['docx_file']
         web_url = request.form.get('web_url')
-        
+
         if not docx_file or not web_url:
             return jsonify({'error': 'Arquivo DOCX e URL são obrigatórios'}), 400
-        
-        # Salvar arquivo temporário
-        temp_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], str(uuid.uuid4()))
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        docx_path = os.path.join(temp_dir, secure_filename(docx_file.filename))
-        docx_file.save(docx_path)
-        
-        # Processar comparação
-        docx_texts = extract_docx_text(docx_path)
-        web_texts, main, metadata, alt_tags, title, elements = load_url_text(web_url)
-        
-        # Calcular similaridades
-        comparison_results = compare_texts(docx_texts, web_texts)
-        
-        # Gerar resumo
-        summary = generate_summary(comparison_results)
-        summary_table = generate_summary_table(comparison_results)
-        
-        # Extrair avaliações veterinárias
-        vet_ratings = []
-        for element in elements:
-            if element[0] == 'Puntuación Veterinaria':
-                vet_ratings.append(element[2])
-        
-        # Gerar Excel
-        excel_filename = f"comparison_{int(time.time())}.xlsx"
-        excel_path = os.path.join(temp_dir, excel_filename)
-        
-        create_excel_report(
-            excel_path,
-            comparison_results,
-            summary_table,
-            elements,
-            docx_path,
-            web_url
-        )
-        
-        # URL para download do Excel
-        excel_url = f"/download/{os.path.basename(temp_dir)}/{excel_filename}"
-        
-        return jsonify({
-            'success': True,
-            'summary': summary,
-            'summary_table': summary_table,
-            'comparison': [
-                {
-                    'doc_text': item['doc_text'],
-                    'web_text': item['web_text'],
-                    'status': item['status'],
-                    'similarity': item['similarity']
-                }
-                for item in comparison_results
-            ],
-            'elements': [
-                {
-                    'definition': elem[0],
-                    'tag': elem[1],
-                    'text': elem[2],
-                    'link': elem[3]
-                }
-                for elem in elements
-            ],
-            'vet_ratings': vet_ratings,
-            'excel_url': excel_url,
-            'metadata': metadata
-        })
-    
+
+        upload = read_upload(docx_file)
+        # no_cache=1 força uma nova renderização da página
+        use_cache = request.form.get('no_cache') != '1'
+        render_stats = {}
+        page = load_url_text(web_url, stats=render_stats, use_cache=use_cache)
+
+        return jsonify({'success': True, **_compare_pair(upload, web_url, page, render_stats)})
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -100,102 +97,55 @@ def upload_file():
 def batch_upload():
     """
     Processa múltiplos pares de documento DOCX e URL para comparação em lote.
-    Usa a mesma lógica da comparação singular para cada par.
+    As URLs são carregadas em paralelo; cada par usa a mesma lógica da comparação singular.
     """
     try:
         pair_count = int(request.form.get('pair_count', 0))
         if pair_count <= 0:
             return jsonify({'error': 'Nenhum par de comparação fornecido'}), 400
-        
-        results = []
-        
+
+        pairs = []
+
         for i in range(pair_count):
             docx_file = request.files.get(f'docx_file_{i}')
             web_url = request.form.get(f'web_url_{i}')
-            
+
             if not docx_file or not web_url:
                 continue
-            
-            # Salvar arquivo temporário
-            temp_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], str(uuid.uuid4()))
-            os.makedirs(temp_dir, exist_ok=True)
-            
-            docx_path = os.path.join(temp_dir, secure_filename(docx_file.filename))
-            docx_file.save(docx_path)
-            
-            # Processar comparação - mesma lógica da comparação singular
-            docx_texts = extract_docx_text(docx_path)
-            web_texts, main, metadata, alt_tags, title, elements = load_url_text(web_url)
-            
-            # Calcular similaridades
-            comparison_results = compare_texts(docx_texts, web_texts)
-            
-            # Gerar resumo
-            summary = generate_summary(comparison_results)
-            summary_table = generate_summary_table(comparison_results)
-            
-            # Extrair avaliações veterinárias
-            vet_ratings = []
-            for element in elements:
-                if element[0] == 'Puntuación Veterinaria':
-                    vet_ratings.append(element[2])
-            
-            # Gerar Excel com formatação condicional e cores
-            excel_filename = f"comparison_{i}_{int(time.time())}.xlsx"
-            excel_path = os.path.join(temp_dir, excel_filename)
-            
-            create_excel_report(
-                excel_path,
-                comparison_results,
-                summary_table,
-                elements,
-                docx_path,
-                web_url
-            )
-            
-            # URL para download do Excel
-            excel_url = f"/download/{os.path.basename(temp_dir)}/{excel_filename}"
-            
-            # Adicionar resultado ao lote com informações detalhadas
-            results.append({
-                'title': f"{os.path.basename(docx_path)} e {web_url}",
-                'summary': summary,
-                'summary_table': summary_table,
-                'comparison': [
-                    {
-                        'doc_text': item['doc_text'],
-                        'web_text': item['web_text'],
-                        'status': item['status'],
-                        'similarity': item['similarity']
-                    }
-                    for item in comparison_results
-                ],
-                'elements': [
-                    {
-                        'definition': elem[0],
-                        'tag': elem[1],
-                        'text': elem[2],
-                        'link': elem[3]
-                    }
-                    for elem in elements
-                ],
-                'vet_ratings': vet_ratings,
-                'excel_url': excel_url,
-                'metadata': metadata
-            })
-        
+
+            pairs.append((i, read_upload(docx_file), web_url))
+
+        # Carregar todas as URLs do lote em paralelo, na ordem dos pares
+        use_cache = request.form.get('no_cache') != '1'
+        render_stats = []
+        pages = load_urls_text([web_url for _, _, web_url in pairs], stats=render_stats, use_cache=use_cache)
+
+        results = []
+
+        for (i, upload, web_url), page, page_stats in zip(pairs, pages, render_stats):
+            # Uma URL com erro ou timeout não interrompe o restante do lote
+            if isinstance(page, Exception):
+                results.append({
+                    'title': f"{upload['filename']} e {web_url}",
+                    'error': str(page),
+                    'render_stats': page_stats
+                })
+                continue
+            results.append(_compare_pair(upload, web_url, page, page_stats))
+
         return jsonify({
             'success': True,
             'results': results
         })
-    
+
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@comparator_bp.route('/download/<folder>/<filename>', methods=['GET'])
-def download_file(folder, filename):
+@comparator_bp.route('/download/<filename>', methods=['GET'])
+def download_file(filename):
     """
     Rota para download do arquivo Excel com os resultados.
     """
-    directory = os.path.join(current_app.config['UPLOAD_FOLDER'], folder)
-    return send_from_directory(directory, filename, as_attachment=True)
+    if secure_filename(filename) != filename or not filename.endswith('.xlsx'):
+        abort(404)
+    return send_from_directory(COMPARATOR_REPORTS_DIR, filename, as_attachment=True)
@@ -0,0 +1,149 @@
+import os
+from datetime import datetime
+from flask import Blueprint, jsonify, request
+from sqlalchemy.orm import contains_eager
+from src.models.user import db
+from src.models.comparison import ComparisonRun, ComparisonRow, PageElement, url_hash
+
+# Maior página aceita em ?per_page= nas consultas do histórico
+HISTORY_MAX_PER_PAGE = int(os.environ.get('HISTORY_MAX_PER_PAGE', 500))
+
+# Também aceita os nomes usados no resumo da resposta (exact, similar, partial, missing)
+STATUS_ALIASES = {
+    'exact': 'Exato',
+    'similar': 'Similar',
+    'partial': 'Parcial',
+    'missing': 'Não encontrado'
+}
+
+history_bp = Blueprint('history', __name__)
+
+
+def _status(value):
+    return STATUS_ALIASES.get(value.lower(), value)
+
+
+def _date(name):
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+
+def _filter_runs(query):
+    """
+    Filtros comuns das execuções: url, docx_hash, batch_id, since e until (datas ISO 8601).
+    """
+    if request.args.get('url'):
+        # A busca usa o índice do hash; a comparação da URL descarta colisões
+        query = query.where(
+            ComparisonRun.web_url_hash == url_hash(request.args['url']),
+            ComparisonRun.web_url == request.args['url']
+        )
+    if request.args.get('docx_hash'):
+        query = query.where(ComparisonRun.docx_hash == request.args['docx_hash'])
+    if request.args.get('batch_id'):
+        query = query.where(ComparisonRun.batch_id == request.args['batch_id'])
+    since = _date('since')
+    if since:
+        query = query.where(ComparisonRun.created_at >= since)
+    until = _date('until')
+    if until:
+        query = query.where(ComparisonRun.created_at < until)
+    return query
+
+
+def _page(query, serialize):
+    """
+    Resposta paginada (?page= e ?per_page=) com o total de itens.
+    """
+    page = db.paginate(query, max_per_page=HISTORY_MAX_PER_PAGE, error_out=False)
+    return jsonify({
+        'items': [serialize(item) for item in page.items],
+        'page': page.page,
+        'per_page': page.per_page,
+        'total': page.total,
+        'pages': page.pages
+    })
+
+
+@history_bp.errorhandler(ValueError)
+def invalid_filter(e):
+    return jsonify({'error': f'Filtro inválido: {e}'}), 400
+
+
+@history_bp.route('/history/runs', methods=['GET'])
+def list_runs():
+    """
+    Execuções gravadas, das mais recentes para as mais antigas.
+    """
+    query = _filter_runs(db.select(ComparisonRun)).order_by(ComparisonRun.created_at.desc(), ComparisonRun.id.desc())
+    return _page(query, ComparisonRun.to_dict)
+
+
+@history_bp.route('/history/runs/<int:run_id>', methods=['GET'])
+def get_run(run_id):
+    run = db.get_or_404(ComparisonRun, run_id)
+    return jsonify(run.to_dict())
+
+
+@history_bp.route('/history/runs/<int:run_id>/rows', methods=['GET'])
+def list_run_rows(run_id):
+    """
+    Linhas de uma execução na ordem do documento; ?status= filtra pelo status.
+    """
+    db.get_or_404(ComparisonRun, run_id)
+    query = db.select(ComparisonRow).where(ComparisonRow.run_id == run_id)
+    if request.args.get('status'):
+        query = query.where(ComparisonRow.status == _status(request.args['status']))
+    return _page(query.order_by(ComparisonRow.position), ComparisonRow.to_dict)
+
+
+@history_bp.route('/history/runs/<int:run_id>/elements', methods=['GET'])
+def list_run_elements(run_id):
+    db.get_or_404(ComparisonRun, run_id)
+    query = db.select(PageElement).where(PageElement.run_id == run_id).order_by(PageElement.position)
+    return _page(query, PageElement.to_dict)
+
+
+@history_bp.route('/history/rows', methods=['GET'])
+def list_rows():
+    """
+    Linhas de todas as execuções que passam pelos filtros (ex.: ?url=...&status=missing),
+    das execuções mais recentes para as mais antigas, com a URL e a data da execução.
+    """
+    query = _filter_runs(
+        db.select(ComparisonRow).join(ComparisonRow.run).options(contains_eager(ComparisonRow.run))
+    )
+    if request.args.get('status'):
+        query = query.where(ComparisonRow.status == _status(request.args['status']))
+    query = query.order_by(ComparisonRun.created_at.desc(), ComparisonRun.id.desc(), ComparisonRow.position)
+    return _page(query, lambda row: {
+        **row.to_dict(),
+        'web_url': row.run.web_url,
+        'docx_name': row.run.docx_name,
+        'created_at': row.run.created_at.isoformat()
+    })
+
+
+@history_bp.route('/history/trend', methods=['GET'])
+def score_trend():
+    """
+    Evolução dos resultados ao longo do tempo para uma URL e/ou um documento (?url=, ?docx_hash=):
+    um ponto por execução, em ordem cronológica (as `limit` mais recentes, 100 por padrão).
+    """
+    if not request.args.get('url') and not request.args.get('docx_hash'):
+        return jsonify({'error': 'Informe url ou docx_hash'}), 400
+    limit = min(int(request.args.get('limit', 100)), HISTORY_MAX_PER_PAGE)
+    query = _filter_runs(db.select(ComparisonRun)).order_by(ComparisonRun.created_at.desc(), ComparisonRun.id.desc()).limit(limit)
+    runs = reversed(db.session.scalars(query).all())
+    return jsonify({
+        'points': [
+            {
+                'run_id': run.id,
+                'created_at': run.created_at.isoformat(),
+                'exact_percent': (run.exact / run.total * 100) if run.total > 0 else 0,
+                'avg_similarity': run.avg_similarity,
+                'summary': run.to_dict()['summary']
+            }
+            for run in runs
+        ]
+    })
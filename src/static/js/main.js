@@ -1,6 +1,124 @@
 // JavaScript para o Comparador de Documentos e Web
 
 document.addEventListener('DOMContentLoaded', function() {
+    // Linha da tabela de comparação
+    function comparisonRow(item) {
+        const row = document.createElement('tr');
+        
+        // Adicionar classe de status à linha
+        if (item.status === 'Exato') {
+            row.classList.add('status-exact');
+        } else if (item.status === 'Similar') {
+            row.classList.add('status-similar');
+        } else if (item.status === 'Parcial') {
+            row.classList.add('status-partial');
+        } else {
+            row.classList.add('status-missing');
+        }
+        
+        // Criar células
+        const docTextCell = document.createElement('td');
+        docTextCell.textContent = item.doc_text;
+        docTextCell.className = 'text-cell';
+        
+        const webTextCell = document.createElement('td');
+        webTextCell.textContent = item.web_text || 'Não encontrado';
+        webTextCell.className = 'text-cell';
+        
+        const statusCell = document.createElement('td');
+        statusCell.textContent = item.status;
+        
+        const similarityCell = document.createElement('td');
+        similarityCell.textContent = item.similarity !== null ? `${(item.similarity * 100).toFixed(2)}%` : 'N/A';
+        
+        // Adicionar células à linha
+        row.appendChild(docTextCell);
+        row.appendChild(webTextCell);
+        row.appendChild(statusCell);
+        row.appendChild(similarityCell);
+        
+        return row;
+    }
+    
+    // Linha da tabela de elementos da página
+    function elementRow(element) {
+        const row = document.createElement('tr');
+        
+        const defCell = document.createElement('td');
+        defCell.textContent = element.definition;
+        
+        const tagCell = document.createElement('td');
+        tagCell.textContent = element.tag;
+        
+        const textCell = document.createElement('td');
+        textCell.textContent = element.text;
+        textCell.className = 'elements-text';
+        
+        const linkCell = document.createElement('td');
+        if (element.link) {
+            const link = document.createElement('a');
+            link.href = element.link;
+            link.textContent = element.link;
+            link.target = '_blank';
+            linkCell.appendChild(link);
+            linkCell.className = 'url-cell';
+        } else {
+            linkCell.textContent = '';
+        }
+        
+        row.appendChild(defCell);
+        row.appendChild(tagCell);
+        row.appendChild(textCell);
+        row.appendChild(linkCell);
+        
+        return row;
+    }
+    
+    // Tabelas de resultado virtualizadas: com milhares de linhas, só as visíveis ficam no DOM
+    const comparisonTableBody = document.getElementById('comparisonTableBody');
+    const comparisonRowCount = document.getElementById('comparisonRowCount');
+    const comparisonTable = comparisonTableBody && new VirtualTable(comparisonTableBody, {
+        renderRow: comparisonRow,
+        columns: 4,
+        estimatedRowHeight: 72,
+        onChange: (shown, total) => {
+            comparisonRowCount.textContent = shown === total ? `${total} linhas` : `${shown} de ${total} linhas`;
+        }
+    });
+    const elementsTableBody = document.getElementById('elementsTableBody');
+    const elementsTable = elementsTableBody && new VirtualTable(elementsTableBody, {
+        renderRow: elementRow,
+        columns: 4
+    });
+    
+    // Filtro por status e ordenação por similaridade, sem redesenhar a tabela inteira
+    const comparisonStatusFilter = document.getElementById('comparisonStatusFilter');
+    if (comparisonTable && comparisonStatusFilter) {
+        comparisonStatusFilter.addEventListener('change', function() {
+            const status = comparisonStatusFilter.value;
+            comparisonTable.setFilter(status ? item => item.status === status : null);
+        });
+    }
+    const similaritySort = document.getElementById('similaritySort');
+    if (comparisonTable && similaritySort) {
+        // Ciclo: ordem do documento -> maior similaridade -> menor similaridade
+        const sortIcons = {'': 'bi-arrow-down-up', desc: 'bi-sort-down', asc: 'bi-sort-up'};
+        const nextSort = {'': 'desc', desc: 'asc', asc: ''};
+        const similarity = item => item.similarity === null ? -1 : item.similarity;
+        similaritySort.addEventListener('click', function() {
+            const order = nextSort[similaritySort.dataset.order || ''];
+            similaritySort.dataset.order = order;
+            similaritySort.querySelector('i').className = `bi ${sortIcons[order]}`;
+            if (order === 'desc') {
+                comparisonTable.setSort((a, b) => similarity(b) - similarity(a));
+            } else if (order === 'asc') {
+                comparisonTable.setSort((a, b) => similarity(a) - similarity(b));
+            } else {
+                comparisonTable.setSort(null);
+            }
+        });
+    }
+    
     // Configuração do formulário de comparação única
     const singleCompareForm = document.getElementById('singleCompareForm');
     if (singleCompareForm) {
@@ -23,6 +141,11 @@ document.addEventListener('DOMContentLoaded', function() {
             const formData = new FormData();
             formData.append('docx_file', docxFile);
             formData.append('web_url', webUrl);
+            if (document.getElementById('noCache').checked) {
+                formData.append('no_cache', '1');
+            }
+            // Processa em segundo plano e acompanha o andamento em /jobs/<id>
+            formData.append('async', '1');
             
             // Enviar requisição para o backend
             fetch('/upload', {
@@ -35,6 +158,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
                 return response.json();
             })
+            .then(data => data.job_id ? waitForJob(data, 'processingStatus', 'cancelProcessing') : data)
             .then(data => {
                 // Ocultar spinner e mostrar resultados
                 document.getElementById('processingSpinner').classList.add('d-none');
@@ -49,48 +173,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 // Configurar link para download do Excel
                 document.getElementById('downloadExcel').href = data.excel_url;
                 
-                // Preencher tabela de comparação
-                const comparisonTableBody = document.getElementById('comparisonTableBody');
-                comparisonTableBody.innerHTML = '';
-                
-                data.comparison.forEach(item => {
-                    const row = document.createElement('tr');
-                    
-                    // Adicionar classe de status à linha
-                    if (item.status === 'Exato') {
-                        row.classList.add('status-exact');
-                    } else if (item.status === 'Similar') {
-                        row.classList.add('status-similar');
-                    } else if (item.status === 'Parcial') {
-                        row.classList.add('status-partial');
-                    } else {
-                        row.classList.add('status-missing');
-                    }
-                    
-                    // Criar células
-                    const docTextCell = document.createElement('td');
-                    docTextCell.textContent = item.doc_text;
-                    docTextCell.className = 'text-cell';
-                    
-                    const webTextCell = document.createElement('td');
-                    webTextCell.textContent = item.web_text || 'Não encontrado';
-                    webTextCell.className = 'text-cell';
-                    
-                    const statusCell = document.createElement('td');
-                    statusCell.textContent = item.status;
-                    
-                    const similarityCell = document.createElement('td');
-                    similarityCell.textContent = item.similarity !== null ? `${(item.similarity * 100).toFixed(2)}%` : 'N/A';
-                    
-                    // Adicionar células à linha
-                    row.appendChild(docTextCell);
-                    row.appendChild(webTextCell);
-                    row.appendChild(statusCell);
-                    row.appendChild(similarityCell);
-                    
-                    // Adicionar linha à tabela
-                    comparisonTableBody.appendChild(row);
-                });
+                // Preencher tabela de comparação (só as linhas visíveis vão para o DOM)
+                comparisonTable.setRows(data.comparison);
                 
                 // Preencher tabela de resumo
                 const summaryTableBody = document.getElementById('summaryTableBody');
@@ -116,41 +200,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 });
                 
                 // Preencher tabela de elementos
-                const elementsTableBody = document.getElementById('elementsTableBody');
-                elementsTableBody.innerHTML = '';
-                
-                data.elements.forEach(element => {
-                    const row = document.createElement('tr');
-                    
-                    const defCell = document.createElement('td');
-                    defCell.textContent = element.definition;
-                    
-                    const tagCell = document.createElement('td');
-                    tagCell.textContent = element.tag;
-                    
-                    const textCell = document.createElement('td');
-                    textCell.textContent = element.text;
-                    textCell.className = 'elements-text';
-                    
-                    const linkCell = document.createElement('td');
-                    if (element.link) {
-                        const link = document.createElement('a');
-                        link.href = element.link;
-                        link.textContent = element.link;
-                        link.target = '_blank';
-                        linkCell.appendChild(link);
-                        linkCell.className = 'url-cell';
-                    } else {
-                        linkCell.textContent = '';
-                    }
-                    
-                    row.appendChild(defCell);
-                    row.appendChild(tagCell);
-                    row.appendChild(textCell);
-                    row.appendChild(linkCell);
-                    
-                    elementsTableBody.appendChild(row);
-                });
+                elementsTable.setRows(data.elements);
                 
                 // Exibir avaliação veterinária se disponível
                 if (data.vet_ratings && data.vet_ratings.length > 0) {
@@ -317,92 +367,230 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             
             formData.append('pair_count', pairCount);
+            if (document.getElementById('batchNoCache').checked) {
+                formData.append('no_cache', '1');
+            }
+            // Resultados chegam par a par (NDJSON), na ordem em que ficam prontos
+            formData.append('stream', '1');
             
-            // Mostrar spinner de processamento
+            // Mostrar spinner de processamento e a tabela, que é preenchida aos poucos
             document.getElementById('batchProcessingSpinner').classList.remove('d-none');
-            document.getElementById('batchResults').classList.add('d-none');
+            document.getElementById('batchResults').classList.remove('d-none');
+            document.getElementById('batchResultsTableBody').innerHTML = '';
+            document.getElementById('batchExport').classList.add('d-none');
+            
+            const statusElement = document.getElementById('batchProcessingStatus');
+            const defaultStatus = statusElement.textContent;
+            const controller = new AbortController();
+            const cancelButton = document.getElementById('cancelBatchProcessing');
+            cancelButton.classList.remove('d-none');
+            cancelButton.disabled = false;
+            cancelButton.onclick = function() {
+                cancelButton.disabled = true;
+                controller.abort();
+            };
+            const finish = () => {
+                document.getElementById('batchProcessingSpinner').classList.add('d-none');
+                cancelButton.classList.add('d-none');
+                statusElement.textContent = defaultStatus;
+            };
+            
+            let received = 0;
             
             // Enviar requisição para o backend
             fetch('/batch_upload', {
                 method: 'POST',
-                body: formData
+                body: formData,
+                signal: controller.signal
             })
             .then(response => {
                 if (!response.ok) {
                     throw new Error('Erro ao processar a requisição em lote');
                 }
-                return response.json();
-            })
-            .then(data => {
-                // Ocultar spinner e mostrar resultados
-                document.getElementById('batchProcessingSpinner').classList.add('d-none');
-                document.getElementById('batchResults').classList.remove('d-none');
-                
-                // Preencher tabela de resultados em lote
-                const batchResultsTableBody = document.getElementById('batchResultsTableBody');
-                batchResultsTableBody.innerHTML = '';
-                
-                data.results.forEach((result, index) => {
-                    const row = document.createElement('tr');
-                    
-                    const indexCell = document.createElement('td');
-                    indexCell.textContent = index + 1;
-                    
-                    const titleCell = document.createElement('td');
-                    titleCell.textContent = result.title || `Comparação ${index + 1}`;
-                    
-                    const exactCell = document.createElement('td');
-                    exactCell.textContent = result.summary.exact;
-                    
-                    const similarCell = document.createElement('td');
-                    similarCell.textContent = result.summary.similar;
-                    
-                    const partialCell = document.createElement('td');
-                    partialCell.textContent = result.summary.partial;
-                    
-                    const missingCell = document.createElement('td');
-                    missingCell.textContent = result.summary.missing;
-                    
-                    const totalCell = document.createElement('td');
-                    totalCell.textContent = result.summary.total;
-                    
-                    const actionsCell = document.createElement('td');
-                    
-                    const downloadBtn = document.createElement('a');
-                    downloadBtn.href = result.excel_url;
-                    downloadBtn.className = 'btn btn-sm btn-success me-2';
-                    downloadBtn.innerHTML = '<i class="bi bi-file-earmark-excel"></i> Excel';
-                    
-                    const viewBtn = document.createElement('button');
-                    viewBtn.type = 'button';
-                    viewBtn.className = 'btn btn-sm btn-primary';
-                    viewBtn.innerHTML = '<i class="bi bi-eye"></i> Ver';
-                    viewBtn.dataset.resultId = index;
-                    viewBtn.addEventListener('click', function() {
-                        // Implementar visualização detalhada
-                        alert('Visualização detalhada não implementada');
-                    });
-                    
-                    actionsCell.appendChild(downloadBtn);
-                    actionsCell.appendChild(viewBtn);
-                    
-                    row.appendChild(indexCell);
-                    row.appendChild(titleCell);
-                    row.appendChild(exactCell);
-                    row.appendChild(similarCell);
-                    row.appendChild(partialCell);
-                    row.appendChild(missingCell);
-                    row.appendChild(totalCell);
-                    row.appendChild(actionsCell);
-                    
-                    batchResultsTableBody.appendChild(row);
+                return readNdjson(response, message => {
+                    if (message.done) {
+                        // Exportação do lote inteiro em uma única requisição
+                        if (message.export_urls) {
+                            document.getElementById('batchExportXlsx').href = message.export_urls.xlsx;
+                            document.getElementById('batchExportZip').href = message.export_urls.zip;
+                            document.getElementById('batchExport').classList.remove('d-none');
+                        }
+                        return;
+                    }
+                    if (message.index === undefined) {
+                        throw new Error(message.error || 'Resposta inválida do servidor');
+                    }
+                    received++;
+                    statusElement.textContent = `${received} de ${pairCount} pares concluídos`;
+                    renderBatchRow(message, message.index);
                 });
             })
+            .then(finish)
             .catch(error => {
-                document.getElementById('batchProcessingSpinner').classList.add('d-none');
+                finish();
+                if (error.name === 'AbortError') {
+                    return;
+                }
                 showError('Erro ao processar a comparação em lote: ' + error.message);
             });
         });
+        
+        // Insere a linha respeitando a ordem dos pares, mesmo que cheguem fora de ordem
+        function insertBatchRow(row, index) {
+            const batchResultsTableBody = document.getElementById('batchResultsTableBody');
+            row.dataset.index = index;
+            const next = Array.from(batchResultsTableBody.children).find(other => Number(other.dataset.index) > index);
+            batchResultsTableBody.insertBefore(row, next || null);
+        }
+        
+        // Monta a linha de um par do lote
+        function renderBatchRow(result, index) {
+            const row = document.createElement('tr');
+            
+            const indexCell = document.createElement('td');
+            indexCell.textContent = index + 1;
+            
+            const titleCell = document.createElement('td');
+            titleCell.textContent = result.title || `Comparação ${index + 1}`;
+
+            // Par que falhou (ex.: timeout ao carregar a URL)
+            if (result.error) {
+                const errorCell = document.createElement('td');
+                errorCell.colSpan = 6;
+                errorCell.className = 'text-danger';
+                errorCell.textContent = `Erro: ${result.error}`;
+
+                row.appendChild(indexCell);
+                row.appendChild(titleCell);
+                row.appendChild(errorCell);
+
+                insertBatchRow(row, index);
+                return;
+            }
+
+            const exactCell = document.createElement('td');
+            exactCell.textContent = result.summary.exact;
+            
+            const similarCell = document.createElement('td');
+            similarCell.textContent = result.summary.similar;
+            
+            const partialCell = document.createElement('td');
+            partialCell.textContent = result.summary.partial;
+            
+            const missingCell = document.createElement('td');
+            missingCell.textContent = result.summary.missing;
+            
+            const totalCell = document.createElement('td');
+            totalCell.textContent = result.summary.total;
+            
+            const actionsCell = document.createElement('td');
+            
+            const downloadBtn = document.createElement('a');
+            downloadBtn.href = result.excel_url;
+            downloadBtn.className = 'btn btn-sm btn-success me-2';
+            downloadBtn.innerHTML = '<i class="bi bi-file-earmark-excel"></i> Excel';
+            
+            const viewBtn = document.createElement('button');
+            viewBtn.type = 'button';
+            viewBtn.className = 'btn btn-sm btn-primary';
+            viewBtn.innerHTML = '<i class="bi bi-eye"></i> Ver';
+            viewBtn.dataset.resultId = index;
+            viewBtn.addEventListener('click', function() {
+                // Implementar visualização detalhada
+                alert('Visualização detalhada não implementada');
+            });
+            
+            actionsCell.appendChild(downloadBtn);
+            actionsCell.appendChild(viewBtn);
+            
+            row.appendChild(indexCell);
+            row.appendChild(titleCell);
+            row.appendChild(exactCell);
+            row.appendChild(similarCell);
+            row.appendChild(partialCell);
+            row.appendChild(missingCell);
+            row.appendChild(totalCell);
+            row.appendChild(actionsCell);
+            
+            insertBatchRow(row, index);
+        }
+    }
+    
+    // Lê uma resposta NDJSON e chama onMessage para cada linha assim que ela chega
+    function readNdjson(response, onMessage) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        const read = () => reader.read().then(({done, value}) => {
+            buffer += decoder.decode(value || new Uint8Array(), {stream: !done});
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            lines.filter(line => line.trim()).forEach(line => onMessage(JSON.parse(line)));
+            if (done) {
+                if (buffer.trim()) {
+                    onMessage(JSON.parse(buffer));
+                }
+                return;
+            }
+            return read();
+        });
+        return read();
+    }
+    
+    // Acompanha um job em segundo plano até o fim, exibindo o progresso de cada etapa
+    function waitForJob(job, statusElementId, cancelButtonId) {
+        const statusElement = document.getElementById(statusElementId);
+        const cancelButton = document.getElementById(cancelButtonId);
+        const defaultText = statusElement.textContent;
+        const stageLabels = {render: 'Carregando páginas', compare: 'Comparando'};
+        
+        cancelButton.classList.remove('d-none');
+        cancelButton.disabled = false;
+        cancelButton.onclick = function() {
+            cancelButton.disabled = true;
+            fetch(`/jobs/${job.job_id}/cancel`, {method: 'POST'});
+        };
+        
+        const finish = () => {
+            cancelButton.classList.add('d-none');
+            statusElement.textContent = defaultText;
+        };
+        
+        return new Promise((resolve, reject) => {
+            const poll = () => {
+                fetch(job.status_url)
+                .then(response => {
+                    if (!response.ok) {
+                        throw new Error('Erro ao consultar o andamento do processamento');
+                    }
+                    return response.json();
+                })
+                .then(status => {
+                    if (status.status === 'done') {
+                        finish();
+                        resolve(status.result);
+                    } else if (status.status === 'failed') {
+                        finish();
+                        reject(new Error(status.error || 'Falha no processamento'));
+                    } else if (status.status === 'cancelled') {
+                        finish();
+                        reject(new Error('Processamento cancelado'));
+                    } else {
+                        const progress = status.stage ? status.progress[status.stage] : null;
+                        statusElement.textContent = progress
+                            ? `${stageLabels[status.stage] || status.stage}: ${progress.done} de ${progress.total}`
+                            : 'Aguardando na fila...';
+                        setTimeout(poll, 1000);
+                    }
+                })
+                .catch(error => {
+                    finish();
+                    reject(error);
+                });
+            };
+            poll();
+        });
     }
     
     // Função para exibir erros
@@ -0,0 +1,188 @@
+// Tabela virtualizada: só as linhas visíveis (mais uma margem) ficam no DOM
+//
+// Uso:
+//   const table = new VirtualTable(tbody, {renderRow: item => tr, columns: 4});
+//   table.setRows(items);                               // troca os dados
+//   table.setFilter(item => item.status === 'Exato');   // ou null para todos
+//   table.setSort((a, b) => a.similarity - b.similarity); // ou null para a ordem original
+//
+// As linhas podem ter alturas diferentes: a altura de cada item é medida quando ele é exibido
+// e os demais usam a média das alturas já medidas. Filtrar e ordenar só recalculam a lista de
+// índices visíveis; nenhuma linha fora da janela é criada.
+class VirtualTable {
+    constructor(tbody, options) {
+        this.tbody = tbody;
+        this.renderRow = options.renderRow;
+        this.columns = options.columns;
+        this.overscan = options.overscan || 8;
+        this.estimatedRowHeight = options.estimatedRowHeight || 48;
+        this.onChange = options.onChange || null;
+
+        // A rolagem acontece no contêiner da tabela (ver .virtual-scroll em styles.css)
+        this.container = tbody.closest('.table-responsive');
+        this.container.classList.add('virtual-scroll');
+        this.head = tbody.parentElement.querySelector('thead');
+
+        this.rows = [];
+        this.view = [];
+        this.filter = null;
+        this.sort = null;
+        this.heights = new Map();
+        this.measuredTotal = 0;
+        this.offsets = null;
+        this.frame = null;
+        this.rendered = null;
+
+        this.topSpacer = this.spacerRow();
+        this.bottomSpacer = this.spacerRow();
+
+        const schedule = () => this.scheduleRender();
+        this.container.addEventListener('scroll', schedule, {passive: true});
+        window.addEventListener('resize', schedule);
+        // Abas ocultas não têm altura: desenha de novo quando a aba é exibida
+        document.addEventListener('shown.bs.tab', schedule);
+    }
+
+    spacerRow() {
+        const row = document.createElement('tr');
+        row.className = 'virtual-spacer';
+        const cell = document.createElement('td');
+        cell.colSpan = this.columns;
+        row.appendChild(cell);
+        return row;
+    }
+
+    setRows(rows) {
+        this.rows = rows;
+        this.heights = new Map();
+        this.measuredTotal = 0;
+        this.refresh();
+    }
+
+    setFilter(filter) {
+        this.filter = filter;
+        this.refresh();
+    }
+
+    setSort(sort) {
+        this.sort = sort;
+        this.refresh();
+    }
+
+    // Recalcula os índices exibidos (filtro e ordenação) e volta ao topo
+    refresh() {
+        const view = [];
+        this.rows.forEach((item, index) => {
+            if (!this.filter || this.filter(item)) {
+                view.push(index);
+            }
+        });
+        if (this.sort) {
+            // Ordenação estável: empates mantêm a ordem original
+            view.sort((a, b) => this.sort(this.rows[a], this.rows[b]) || a - b);
+        }
+        this.view = view;
+        this.offsets = null;
+        this.rendered = null;
+        this.container.scrollTop = 0;
+        this.render();
+        if (this.onChange) {
+            this.onChange(this.view.length, this.rows.length);
+        }
+    }
+
+    scheduleRender() {
+        if (this.frame === null) {
+            this.frame = requestAnimationFrame(() => {
+                this.frame = null;
+                this.render();
+            });
+        }
+    }
+
+    rowHeight(index) {
+        const height = this.heights.get(index);
+        if (height !== undefined) {
+            return height;
+        }
+        return this.heights.size ? this.measuredTotal / this.heights.size : this.estimatedRowHeight;
+    }
+
+    // offsets[i] = topo da i-ésima linha exibida; offsets[view.length] = altura total
+    computeOffsets() {
+        const offsets = new Float64Array(this.view.length + 1);
+        for (let i = 0; i < this.view.length; i++) {
+            offsets[i + 1] = offsets[i] + this.rowHeight(this.view[i]);
+        }
+        this.offsets = offsets;
+    }
+
+    // Primeira linha cujo fim passa de `y` (busca binária)
+    indexAt(y) {
+        const offsets = this.offsets;
+        let low = 0;
+        let high = this.view.length;
+        while (low < high) {
+            const middle = (low + high) >> 1;
+            if (offsets[middle + 1] <= y) {
+                low = middle + 1;
+            } else {
+                high = middle;
+            }
+        }
+        return low;
+    }
+
+    render() {
+        if (!this.offsets) {
+            this.computeOffsets();
+        }
+        const headHeight = this.head ? this.head.offsetHeight : 0;
+        const viewport = this.container.clientHeight || window.innerHeight;
+        const top = Math.max(0, this.container.scrollTop - headHeight);
+
+        let start = Math.max(0, this.indexAt(top) - this.overscan);
+        // Início sempre par, para as listras da tabela não trocarem durante a rolagem
+        start -= start % 2;
+        const end = Math.min(this.view.length, this.indexAt(top + viewport) + 1 + this.overscan);
+        if (this.rendered && this.rendered.start === start && this.rendered.end === end) {
+            // A janela não mudou: as linhas no DOM continuam valendo
+            return;
+        }
+
+        const fragment = document.createDocumentFragment();
+        fragment.appendChild(this.topSpacer);
+        const rendered = [];
+        for (let i = start; i < end; i++) {
+            const row = this.renderRow(this.rows[this.view[i]]);
+            rendered.push(row);
+            fragment.appendChild(row);
+        }
+        fragment.appendChild(this.bottomSpacer);
+        this.topSpacer.style.height = `${this.offsets[start]}px`;
+        this.bottomSpacer.style.height = `${this.offsets[this.view.length] - this.offsets[end]}px`;
+        this.tbody.replaceChildren(fragment);
+        this.rendered = {start: start, end: end};
+
+        // Mede as linhas exibidas; se alguma altura mudou, ajusta os espaçadores
+        let changed = false;
+        rendered.forEach((row, i) => {
+            const height = row.offsetHeight;
+            if (!height) {
+                return;
+            }
+            const index = this.view[start + i];
+            const previous = this.heights.get(index);
+            if (previous !== height) {
+                this.measuredTotal += height - (previous || 0);
+                this.heights.set(index, height);
+                changed = true;
+            }
+        });
+        if (changed) {
+            this.computeOffsets();
+            this.topSpacer.style.height = `${this.offsets[start]}px`;
+            this.bottomSpacer.style.height = `${this.offsets[this.view.length] - this.offsets[end]}px`;
+        }
+    }
+}
@@ -0,0 +1,237 @@
+import os
+import asyncio
+import atexit
+import threading
+from playwright.async_api import async_playwright
+from src.utils.browser_pool import BROWSER_MAX_PAGES, BROWSER_MAX_RSS_MB, _process_tree_rss_mb
+
+# Limites do motor assíncrono (podem ser ajustados por variáveis de ambiente)
+SCRAPE_CONCURRENCY = int(os.environ.get('SCRAPE_CONCURRENCY', 4))
+SCRAPE_URL_TIMEOUT = int(os.environ.get('SCRAPE_URL_TIMEOUT', 90))
+
+
+class AsyncBrowser:
+    """
+    Chromium de longa duração do motor assíncrono, um por worker do gunicorn.
+    - O loop de eventos roda em uma thread própria; cada lote envia a sua corrotina para ele,
+      então lotes simultâneos dividem o mesmo navegador
+    - Cada URL recebe um BrowserContext novo e isolado
+    - Como no BrowserPool, o navegador é reciclado após `max_pages` URLs ou quando a memória
+      do processo (incluindo o Chromium) passa de `max_rss_mb`; o antigo só é fechado quando
+      a última URL aberta nele termina
+    """
+
+    def __init__(self, max_pages=BROWSER_MAX_PAGES, max_rss_mb=BROWSER_MAX_RSS_MB, launch_options=None):
+        self.max_pages = max(1, max_pages)
+        self.max_rss_mb = max_rss_mb
+        self.launch_options = launch_options or {'headless': True}
+        self.pid = os.getpid()
+        self.pages_served = 0
+        self.launches = 0
+        self.last_error = None
+        self._playwright = None
+        self._browser = None
+        # id(navegador) -> [navegador, contextos abertos], incluindo os navegadores aposentados
+        self._open = {}
+        self._launch_lock = None
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='async-browser', daemon=True)
+        self._thread.start()
+
+    def run(self, coro):
+        """
+        Executa a corrotina no loop do navegador e espera o resultado.
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def browser(self):
+        """
+        Navegador atual, aberto na primeira chamada e de novo após uma reciclagem ou queda.
+        """
+        if self._launch_lock is None:
+            self._launch_lock = asyncio.Lock()
+        async with self._launch_lock:
+            if self._browser is not None and not self._browser.is_connected():
+                self._retire()
+            if self._browser is None:
+                try:
+                    if self._playwright is None:
+                        self._playwright = await async_playwright().start()
+                    browser = await self._playwright.chromium.launch(**self.launch_options)
+                except Exception as e:
+                    self.last_error = str(e)
+                    raise
+                self._browser = browser
+                self._open[id(browser)] = [browser, 0]
+                self.launches += 1
+                self.pages_served = 0
+            return self._browser
+
+    async def new_context(self):
+        """
+        Abre um contexto isolado no navegador atual. Retorna (navegador, contexto) para release().
+        """
+        browser = await self.browser()
+        context = await browser.new_context()
+        self._open[id(browser)][1] += 1
+        return browser, context
+
+    async def release(self, browser, context):
+        """
+        Fecha o contexto e recicla o navegador se ele passou dos limites.
+        """
+        try:
+            await context.close()
+        except Exception:
+            pass
+        entry = self._open[id(browser)]
+        entry[1] -= 1
+        if browser is self._browser:
+            self.pages_served += 1
+            if self._should_recycle():
+                self._retire()
+        elif entry[1] == 0:
+            del self._open[id(browser)]
+            try:
+                await browser.close()
+            except Exception:
+                pass
+
+    def _retire(self):
+        # As próximas URLs abrem outro navegador; este é fechado quando o último contexto sair
+        browser = self._browser
+        self._browser = None
+        if browser is not None and self._open[id(browser)][1] == 0:
+            del self._open[id(browser)]
+            self.loop.create_task(self._close(browser))
+
+    async def _close(self, browser):
+        try:
+            await browser.close()
+        except Exception:
+            pass
+
+    def _should_recycle(self):
+        if self.pages_served >= self.max_pages:
+            return True
+        if self.max_rss_mb and _process_tree_rss_mb(os.getpid()) > self.max_rss_mb:
+            return True
+        return False
+
+    def health(self):
+        """
+        Estado do navegador assíncrono (sem abri-lo).
+        """
+        return {
+            'browser_running': self._browser is not None,
+            'open_contexts': sum(count for _, count in self._open.values()),
+            'pages_served': self.pages_served,
+            'launches': self.launches,
+            'last_error': self.last_error
+        }
+
+    def shutdown(self):
+        """
+        Fecha os navegadores e o Playwright e encerra o loop.
+        """
+        async def _shutdown():
+            for browser, _ in list(self._open.values()):
+                await self._close(browser)
+            self._open.clear()
+            self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), self.loop).result(timeout=10)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=10)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_async_browser():
+    """
+    Retorna o navegador assíncrono do processo atual, criando-o na primeira chamada
+    (e de novo após um fork).
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None or _shared.pid != os.getpid():
+            _shared = AsyncBrowser()
+        return _shared
+
+
+async def _scrape_all(shared, urls, handler, concurrency, timeout, on_result, stop):
+    # Falha ao abrir o navegador derruba o lote inteiro, antes de qualquer URL
+    await shared.browser()
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _render_one(url):
+        # Cada URL roda em um contexto isolado do navegador compartilhado
+        try:
+            browser, context = await shared.new_context()
+        except Exception as e:
+            return e
+        try:
+            return await asyncio.wait_for(handler(context, url), timeout)
+        except asyncio.TimeoutError:
+            return TimeoutError(f"Tempo limite de {timeout}s excedido ao carregar {url}")
+        except Exception as e:
+            return e
+        finally:
+            await shared.release(browser, context)
+
+    async def _scrape_one(url):
+        async with semaphore:
+            if stop is not None and stop.is_set():
+                # Lote interrompido: as URLs que ainda não começaram não são abertas
+                result = InterruptedError(f"Carregamento de {url} interrompido")
+            else:
+                result = await _render_one(url)
+        if on_result is not None:
+            # Entregue pelo callback; não fica retido até o fim do lote
+            on_result(url, result)
+            return None
+        return result
+
+    return await asyncio.gather(*(_scrape_one(url) for url in urls))
+
+
+def scrape_many(urls, handler, concurrency=SCRAPE_CONCURRENCY, timeout=SCRAPE_URL_TIMEOUT, on_result=None, stop=None):
+    """
+    Renderiza várias URLs em paralelo com playwright.async_api, no navegador compartilhado
+    do processo (ver AsyncBrowser): não há um Chromium novo por lote.
+    - `handler(context, url)` é uma corrotina que recebe um BrowserContext novo
+    - No máximo `concurrency` páginas abertas ao mesmo tempo por lote
+    - Cada URL tem `timeout` segundos para concluir
+    - URLs repetidas são renderizadas uma única vez
+    - `on_result(url, result)`, se informado, é chamado assim que cada URL termina
+      (na thread do loop de eventos; deve ser rápido). Nesse caso os resultados são
+      entregues só pelo callback e não ficam guardados até o fim do lote
+    - `stop` (threading.Event), se informado e sinalizado, impede que novas URLs comecem;
+      as que já estão abertas terminam e as demais vêm como InterruptedError
+
+    Retorna uma lista na mesma ordem de `urls`. Itens que falharam vêm como
+    instâncias de Exception, para que um par com erro não derrube o lote inteiro.
+    """
+    unique_urls = list(dict.fromkeys(urls))
+    if not unique_urls:
+        return []
+    shared = get_async_browser()
+    results = shared.run(_scrape_all(shared, unique_urls, handler, concurrency, timeout, on_result, stop))
+    if on_result is not None:
+        return []
+    by_url = dict(zip(unique_urls, results))
+    return [by_url[url] for url in urls]
+
+
+@atexit.register
+def _shutdown_browser():
+    if _shared is not None and _shared.pid == os.getpid():
+        _shared.shutdown()
@@ -0,0 +1,80 @@
+import io
+import os
+import re
+import zipfile
+
+# Tamanho dos blocos enviados na exportação de um lote (a resposta sai em chunked transfer encoding)
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 64 * 1024))
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """
+    Destino de escrita não posicionável para o zipfile: acumula os bytes escritos
+    até que sejam retirados com drain(). Por não ser posicionável, o zipfile grava
+    tamanhos e CRC depois dos dados de cada arquivo, sem voltar no que já foi enviado.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_file(path, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Lê um arquivo em blocos de `chunk_size` bytes.
+    """
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def iter_zip(entries, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Gera um arquivo zip em blocos, à medida que ele é montado.
+    `entries` produz (nome no zip, caminho do arquivo) e só é consumido quando o arquivo anterior
+    terminou de ser enviado, então cada relatório pode ser gerado no momento em que entra no zip.
+    A memória usada fica limitada a um bloco por vez, independentemente do tamanho do lote.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, path in entries:
+            with archive.open(name, 'w', force_zip64=True) as target:
+                for chunk in iter_file(path, chunk_size):
+                    target.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # Diretório central, gravado ao fechar o zip
+    yield buffer.drain()
+
+
+def sheet_title(name, used):
+    """
+    Nome de aba válido no Excel (até 31 caracteres, sem []:*?/\\) e único entre `used`.
+    """
+    base = re.sub(r'[\[\]:*?/\\]', '_', name).strip("' ") or 'Par'
+    title = base[:31]
+    counter = 2
+    while title.lower() in used:
+        suffix = f" ({counter})"
+        title = base[:31 - len(suffix)] + suffix
+        counter += 1
+    used.add(title.lower())
+    return title
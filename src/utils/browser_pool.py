@@ -0,0 +1,280 @@
+import os
+import time
+import queue
+import atexit
+import threading
+from concurrent.futures import Future
+from playwright.sync_api import sync_playwright
+
+# Configuração do pool (pode ser ajustada por variáveis de ambiente no Render)
+BROWSER_POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', 1))
+BROWSER_MAX_PAGES = int(os.environ.get('BROWSER_MAX_PAGES', 50))
+BROWSER_MAX_RSS_MB = int(os.environ.get('BROWSER_MAX_RSS_MB', 800))
+BROWSER_TASK_TIMEOUT = int(os.environ.get('BROWSER_TASK_TIMEOUT', 180))
+
+
+def _process_tree_rss_mb(root_pid):
+    """
+    Soma a memória residente (RSS) de um processo e de todos os seus descendentes.
+    Usa /proc; em sistemas sem /proc retorna 0.
+    """
+    try:
+        children = {}
+        rss_pages = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    stat = f.read()
+                with open(f'/proc/{entry}/statm') as f:
+                    statm = f.read().split()
+            except OSError:
+                continue
+            # O nome do processo pode conter espaços; os campos começam após o último ')'
+            ppid = int(stat.rsplit(')', 1)[1].split()[1])
+            children.setdefault(ppid, []).append(int(entry))
+            rss_pages[int(entry)] = int(statm[1])
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+    total = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        total += rss_pages.get(pid, 0)
+        pending.extend(children.get(pid, []))
+    return total * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+class _BrowserSlot(threading.Thread):
+    """
+    Thread dona de uma instância do Playwright e de um Chromium persistente.
+    A API síncrona do Playwright só pode ser usada na thread que a criou,
+    por isso todas as tarefas são executadas aqui dentro.
+    """
+
+    def __init__(self, pool, index):
+        super().__init__(name=f'browser-slot-{index}', daemon=True)
+        self.pool = pool
+        self.index = index
+        self.browser = None
+        self.pages_served = 0
+        self.launches = 0
+        self.last_error = None
+        self.last_used = None
+        self.busy = False
+        # Erro ao iniciar o Playwright (a thread termina) ou ao abrir o Chromium (tentado de novo na próxima tarefa)
+        self.startup_error = None
+        self.launch_error = None
+
+    def run(self):
+        try:
+            playwright = sync_playwright().start()
+        except Exception as e:
+            # Sem Playwright o slot não atende nenhuma tarefa: registra o erro e avisa o pool
+            self.startup_error = self.last_error = str(e)
+            self.pool._slot_failed(e)
+            return
+        try:
+            while True:
+                task = self.pool._tasks.get()
+                if task is None:
+                    break
+                fn, future = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self.busy = True
+                try:
+                    future.set_result(self._execute(playwright, fn))
+                except BaseException as e:
+                    self.last_error = str(e)
+                    future.set_exception(e)
+                finally:
+                    self.busy = False
+                    self.last_used = time.time()
+        finally:
+            self._close_browser()
+            playwright.stop()
+
+    def _ensure_browser(self, playwright):
+        if self.browser is not None and not self.browser.is_connected():
+            self.browser = None
+        if self.browser is None:
+            try:
+                self.browser = playwright.chromium.launch(**self.pool.launch_options)
+            except Exception as e:
+                self.launch_error = str(e)
+                raise
+            self.launch_error = None
+            self.launches += 1
+            self.pages_served = 0
+        return self.browser
+
+    def _execute(self, playwright, fn):
+        browser = self._ensure_browser(playwright)
+        # Um contexto novo por tarefa: cookies, cache e storage isolados entre jobs
+        context = browser.new_context()
+        try:
+            return fn(context)
+        finally:
+            try:
+                context.close()
+            except Exception:
+                pass
+            self.pages_served += 1
+            if self._should_recycle():
+                self._close_browser()
+
+    def _should_recycle(self):
+        if self.pages_served >= self.pool.max_pages:
+            return True
+        if self.pool.max_rss_mb and _process_tree_rss_mb(os.getpid()) > self.pool.max_rss_mb:
+            return True
+        return False
+
+    def _close_browser(self):
+        if self.browser is not None:
+            try:
+                self.browser.close()
+            except Exception:
+                pass
+            self.browser = None
+
+
+class BrowserPool:
+    """
+    Pool de navegadores Chromium de longa duração, um por worker do gunicorn.
+    - Cada tarefa recebe um BrowserContext novo e isolado
+    - O navegador é reciclado após `max_pages` tarefas ou quando a memória
+      do processo (incluindo o Chromium) passa de `max_rss_mb`
+    """
+
+    def __init__(self, size=BROWSER_POOL_SIZE, max_pages=BROWSER_MAX_PAGES,
+                 max_rss_mb=BROWSER_MAX_RSS_MB, launch_options=None):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.max_rss_mb = max_rss_mb
+        self.launch_options = launch_options or {'headless': True}
+        self.pid = os.getpid()
+        self._tasks = queue.Queue()
+        # Exceção que impede o pool de atender (todos os slots falharam ao iniciar)
+        self._failure = None
+        self._lock = threading.Lock()
+        self._slots = [_BrowserSlot(self, i) for i in range(self.size)]
+        for slot in self._slots:
+            slot.start()
+
+    def submit(self, fn):
+        """
+        Agenda `fn(context)` em um dos navegadores do pool e retorna um Future.
+        """
+        future = Future()
+        with self._lock:
+            if self._failure is not None:
+                future.set_exception(self._failure)
+            else:
+                self._tasks.put((fn, future))
+        return future
+
+    def _slot_failed(self, error):
+        """
+        Chamado pelo slot que não conseguiu iniciar. Se nenhum slot ficou de pé, as tarefas
+        na fila e as próximas falham na hora com o erro, em vez de esperar o timeout.
+        """
+        with self._lock:
+            if any(slot.startup_error is None for slot in self._slots):
+                return
+            self._failure = error
+            while True:
+                try:
+                    task = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None and task[1].set_running_or_notify_cancel():
+                    task[1].set_exception(error)
+
+    def run(self, fn, timeout=BROWSER_TASK_TIMEOUT):
+        """
+        Executa `fn(context)` em um dos navegadores do pool e retorna seu resultado.
+        """
+        return self.submit(fn).result(timeout=timeout)
+
+    def health(self, probe=False):
+        """
+        Retorna o estado do pool. Com `probe=True` abre uma página em branco
+        para confirmar que o navegador responde.
+        """
+        status = {
+            'pid': self.pid,
+            'size': self.size,
+            'queued': self._tasks.qsize(),
+            'rss_mb': round(_process_tree_rss_mb(os.getpid()), 1),
+            'max_pages': self.max_pages,
+            'max_rss_mb': self.max_rss_mb,
+            'slots': [
+                {
+                    'alive': slot.is_alive(),
+                    'busy': slot.busy,
+                    'browser_running': slot.browser is not None,
+                    'pages_served': slot.pages_served,
+                    'launches': slot.launches,
+                    'last_used': slot.last_used,
+                    'last_error': slot.last_error,
+                    'startup_error': slot.startup_error,
+                    'launch_error': slot.launch_error
+                }
+                for slot in self._slots
+            ]
+        }
+        status['healthy'] = all(
+            slot['alive'] and slot['startup_error'] is None and slot['launch_error'] is None
+            for slot in status['slots']
+        )
+
+        if probe and status['healthy']:
+            def _probe(context):
+                page = context.new_page()
+                page.goto('about:blank')
+                return context.browser.version
+
+            started = time.time()
+            try:
+                status['browser_version'] = self.run(_probe, timeout=30)
+                status['probe_ms'] = round((time.time() - started) * 1000, 1)
+            except Exception as e:
+                status['healthy'] = False
+                status['probe_error'] = str(e)
+
+        return status
+
+    def shutdown(self):
+        """
+        Fecha todos os navegadores e encerra as threads do pool.
+        """
+        for _ in self._slots:
+            self._tasks.put(None)
+        for slot in self._slots:
+            slot.join(timeout=10)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """
+    Retorna o pool do processo atual, criando-o na primeira chamada.
+    Após um fork (ex.: gunicorn --preload) um novo pool é criado no processo filho.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = BrowserPool()
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None and _pool.pid == os.getpid():
+        _pool.shutdown()
@@ -0,0 +1,82 @@
+import os
+
+# Linhas por página nas seções paginadas da resposta compacta (compact=1)
+COMPACT_PAGE_SIZE = int(os.environ.get('COMPACT_PAGE_SIZE', 500))
+COMPACT_MAX_PAGE_SIZE = int(os.environ.get('COMPACT_MAX_PAGE_SIZE', 5000))
+
+# Colunas de cada seção paginada, na ordem das tuplas guardadas (ver compare_and_store)
+SECTIONS = {
+    'comparison': ('doc_text', 'web_text', 'status', 'similarity'),
+    'elements': ('definition', 'tag', 'text', 'link')
+}
+
+# Colunas com poucos valores distintos, enviadas como códigos inteiros mais um dicionário.
+# Os status têm códigos fixos, iguais em todas as páginas.
+INTERNED = {
+    'comparison': {'status': ("Exato", "Similar", "Parcial", "Não encontrado")},
+    'elements': {'definition': (), 'tag': ()}
+}
+
+
+def page_size(value):
+    """
+    Tamanho de página pedido pelo cliente, limitado a COMPACT_MAX_PAGE_SIZE.
+    """
+    if value is None:
+        return COMPACT_PAGE_SIZE
+    return max(1, min(int(value), COMPACT_MAX_PAGE_SIZE))
+
+
+def parse_cursor(cursor):
+    """
+    Posição de início da página a partir do cursor devolvido em `next_cursor` (vazio = início).
+    """
+    if not cursor:
+        return 0
+    offset = int(cursor)
+    if offset < 0:
+        raise ValueError('cursor inválido')
+    return offset
+
+
+def columnar(section, records, offset=0, limit=COMPACT_PAGE_SIZE):
+    """
+    Uma página de `records` (tuplas na ordem de SECTIONS[section]) em formato colunar:
+    {'columns', 'data': {coluna: valores}, 'dictionaries': {coluna: valores distintos},
+     'offset', 'total', 'next_cursor'}.
+    Nas colunas de INTERNED, `data` traz o índice do valor em `dictionaries`.
+    `next_cursor` é None na última página.
+    """
+    columns = SECTIONS[section]
+    page = records[offset:offset + limit]
+    dictionaries = {}
+    codes = {}
+    for column, values in INTERNED[section].items():
+        dictionaries[column] = list(values)
+        codes[column] = {value: code for code, value in enumerate(values)}
+
+    data = {}
+    for position, column in enumerate(columns):
+        values = [record[position] for record in page]
+        if column in codes:
+            lookup = codes[column]
+            dictionary = dictionaries[column]
+            encoded = []
+            for value in values:
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(dictionary)
+                    dictionary.append(value)
+                encoded.append(code)
+            values = encoded
+        data[column] = values
+
+    end = offset + len(page)
+    return {
+        'columns': list(columns),
+        'data': data,
+        'dictionaries': dictionaries,
+        'offset': offset,
+        'total': len(records),
+        'next_cursor': str(end) if end < len(records) else None
+    }
@@ -0,0 +1,75 @@
+import os
+import gzip
+from flask import request
+
+try:
+    import brotli
+    HAS_BROTLI = True
+except ImportError:  # brotli é opcional; sem ele só gzip é oferecido
+    HAS_BROTLI = False
+
+# Respostas JSON menores que isso vão sem compressão (não compensa o custo)
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 5))
+
+# Tipos comprimidos; NDJSON em streaming e downloads de arquivos não passam por aqui
+COMPRESS_MIMETYPES = ('application/json',)
+
+
+def _accepted(accept_encoding):
+    """
+    Codificações aceitas pelo cliente (ignora as marcadas com q=0).
+    """
+    accepted = set()
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if params in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding):
+    """
+    Melhor codificação aceita: br (se o módulo brotli estiver instalado), depois gzip, ou None.
+    """
+    accepted = _accepted(accept_encoding or '')
+    if HAS_BROTLI and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress_response(response, accept_encoding):
+    """
+    Comprime o corpo de uma resposta JSON já montada conforme o Accept-Encoding do cliente.
+    """
+    response.vary.add('Accept-Encoding')
+    if (response.direct_passthrough or response.is_streamed or response.mimetype not in COMPRESS_MIMETYPES
+            or 'Content-Encoding' in response.headers or not 200 <= response.status_code < 300):
+        return response
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < COMPRESS_MIN_BYTES:
+        return response
+    if encoding == 'br':
+        body = brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    else:
+        body = gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def install_compression(app):
+    """
+    Ativa a negociação de compressão (br/gzip) nas respostas JSON do app.
+    """
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, request.headers.get('Accept-Encoding'))
@@ -0,0 +1,93 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Processos para as etapas presas à CPU (parsing do HTML, comparação e geração do Excel),
+# separados do scraping. 0 executa tudo na própria thread, sem pool.
+# Cada worker do gunicorn tem o seu pool, então o padrão é pequeno: no máximo 2 processos,
+# limitado às CPUs que o processo pode usar.
+CPU_POOL_MAX_DEFAULT = 2
+
+
+def _default_pool_size():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # sched_getaffinity não existe fora do Linux
+        cpus = os.cpu_count() or 1
+    return min(CPU_POOL_MAX_DEFAULT, cpus)
+
+
+CPU_POOL_SIZE = int(os.environ.get('CPU_POOL_SIZE', _default_pool_size()))
+
+# Os processos são criados com 'spawn': o gunicorn roda várias threads por worker e
+# um fork no meio delas pode herdar locks presos
+_CONTEXT = multiprocessing.get_context('spawn')
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_cpu_pool():
+    """
+    Retorna o pool de processos do worker, criando-o na primeira chamada
+    (e de novo após um fork). Retorna None quando CPU_POOL_SIZE é 0.
+    """
+    global _pool, _pool_pid
+    if CPU_POOL_SIZE <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ProcessPoolExecutor(max_workers=CPU_POOL_SIZE, mp_context=_CONTEXT)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _discard_pool(pool):
+    """
+    Descarta um pool quebrado (um processo morreu, ex.: falta de memória); o próximo uso cria outro.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_cpu(fn, *args):
+    """
+    Executa fn(*args) no pool de processos e retorna um Future.
+    `fn` precisa ser uma função de um módulo leve, que não importe o app (ver cpu_tasks), e os argumentos e o retorno atravessam o processo
+    via pickle: passe apenas listas, tuplas e textos (nunca árvores HTML ou objetos do openpyxl).
+    Sem pool, executa na hora e retorna um Future já concluído.
+    """
+    pool = get_cpu_pool()
+    if pool is not None:
+        try:
+            return pool.submit(fn, *args)
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            return get_cpu_pool().submit(fn, *args)
+
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def run_cpu(fn, *args):
+    """
+    Versão bloqueante de submit_cpu: espera e retorna o resultado.
+    """
+    return submit_cpu(fn, *args).result()
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None and _pool_pid == os.getpid():
+        _pool.shutdown(wait=False, cancel_futures=True)
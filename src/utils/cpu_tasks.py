@@ -0,0 +1,429 @@
+import os
+import re
+from bs4 import BeautifulSoup
+from src.utils.lsh import MinHashLSH, MATCH_MODE
+from src.utils.docx_stream import iter_docx_paragraphs
+from src.utils.excel_report import ReportWriter, header_style, fill_style
+from src.utils.report_store import get_report_store, write_report_data
+from src.utils.batch_export import sheet_title
+from src.utils.incremental import paragraph_key, page_index
+
+# Etapas presas à CPU executadas no pool de processos (ver cpu_pool): extração do DOCX, parsing do HTML,
+# comparação e geração do Excel. Os processos do pool importam só este módulo, então ele não pode
+# importar src.main nem nada que crie o app, abra o banco ou carregue o Playwright.
+
+# Funções de processamento de texto
+def clean_text(text):
+    """Limpa o texto removendo espaços extras e caracteres especiais."""
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text)
+    text = text.strip()
+    return text
+
+def extract_docx_text(docx_source):
+    """
+    Extrai texto de um arquivo DOCX (caminho ou conteúdo em bytes): corpo, tabelas,
+    caixas de texto, cabeçalhos e rodapés, lidos em streaming (ver docx_stream).
+    """
+    texts = []
+    for origin, text in iter_docx_paragraphs(docx_source):
+        if text.strip():
+            texts.append(clean_text(text))
+    return texts
+
+def _page_texts(html_content):
+    """Textos dos blocos p, h1-h6 e li do HTML renderizado, via BeautifulSoup (roda no pool de processos)."""
+    return _soup_texts(BeautifulSoup(html_content, 'html5lib'))
+
+def _soup_texts(soup):
+    """Textos dos blocos p, h1-h6 e li de um documento já carregado no BeautifulSoup."""
+    # Extrair textos de elementos específicos
+    texts = []
+    for element in soup.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li']):
+        text = clean_text(element.get_text())
+        if text:
+            texts.append(text)
+    return texts
+
+def _inner_text(element):
+    """Aproximação do innerText.trim() do navegador para um elemento do HTML estático."""
+    return clean_text(element.get_text(" "))
+
+def extract_static_page(html_content):
+    """
+    Extração do HTML estático (sem navegador), no mesmo formato do EXTRACT_SCRIPT do main,
+    mais os textos de _page_texts; o documento é lido uma única vez (roda no pool de processos).
+    Sem CSS aplicado, o texto principal inclui elementos que a página esconderia.
+    Retorna (dados, textos).
+    """
+    soup = BeautifulSoup(html_content, 'html5lib')
+    texts = _soup_texts(soup)
+    
+    metadata = {}
+    for tag in soup.find_all('meta'):
+        name = tag.get('name') or tag.get('property')
+        content = tag.get('content')
+        if name and content:
+            metadata[name] = content
+    
+    # A numeração considera todas as imagens, como no navegador
+    alt_tags = {}
+    for i, img in enumerate(soup.find_all('img')):
+        if img.get('alt') and img.get('src'):
+            alt_tags[f"Image {i + 1}"] = {'alt': img['alt'], 'src': img['src']}
+    
+    elements = []
+    for table in soup.select('.breed-table'):
+        for row in table.find_all('tr'):
+            cells = row.find_all('td')
+            if len(cells) >= 2:
+                elements.append(['Puntuación Veterinaria', 'table', f"{_inner_text(cells[0])}: {_inner_text(cells[1])}", ''])
+    for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
+        elements.append([f"Heading {heading.name}", heading.name, _inner_text(heading), ''])
+    for paragraph in soup.find_all('p'):
+        elements.append(['Paragraph', 'p', _inner_text(paragraph), ''])
+    for link in soup.find_all('a'):
+        elements.append(['Link', 'a', _inner_text(link), link.get('href') or ''])
+    
+    # Texto principal, sem o conteúdo de scripts e estilos (que o innerText também não traz)
+    main = soup.find('main') or soup.find('article') or soup.body
+    main_text = ''
+    if main is not None:
+        for tag in main.find_all(['script', 'style', 'noscript', 'template']):
+            tag.decompose()
+        main_text = main.get_text("\n", strip=True)
+    
+    data = {
+        'title': clean_text(soup.title.get_text()) if soup.title else '',
+        'metadata': metadata,
+        'alt_tags': alt_tags,
+        'elements': elements,
+        'main_text': main_text
+    }
+    return data, texts
+
+def build_token_index(web_texts):
+    """
+    Pré-calcula os conjuntos de palavras dos textos da página, o índice invertido
+    palavra -> posições e o mapa conjunto de palavras -> primeira posição (correspondências exatas).
+    """
+    web_words = [set(web_text.lower().split()) for web_text in web_texts]
+    index = {}
+    exact = {}
+    for position, words in enumerate(web_words):
+        for word in words:
+            index.setdefault(word, []).append(position)
+        if words:
+            exact.setdefault(frozenset(words), position)
+    return web_words, index, exact
+
+def compare_texts(doc_texts, web_texts, stats=None, mode=None, matches=None, snapshot=None):
+    """
+    Compara textos do documento com textos da web.
+    mode='lsh' limita a busca aos candidatos do índice MinHash/LSH (aproximado, para páginas muito grandes);
+    o padrão vem de MATCH_MODE. Se `stats` for um dicionário, recebe quantas linhas foram resolvidas
+    por correspondência exata e pela busca aproximada.
+    Modo incremental: `matches` ({paragraph_key: (posição na página ou None, status, similarity)},
+    ver src/utils/incremental.py) traz resultados já calculados para esta página; esses parágrafos
+    são reaproveitados (contados em 'reused') e os demais são comparados e acrescentados a `matches`;
+    um parágrafo repetido no próprio documento é comparado de novo, não conta como reaproveitado. Com `snapshot`
+    (versão da página), os índices da página ficam guardados no processo para os próximos reenvios.
+    """
+    results = []
+    keys = [paragraph_key(doc_text) for doc_text in doc_texts] if matches is not None else None
+    # Só os resultados que vieram do cache contam como reaproveitados; `matches` cresce durante a comparação
+    known = set(matches) if matches is not None else None
+    counters = {'exact_hash': 0, 'fuzzy': 0}
+    if keys is not None:
+        counters['reused'] = 0
+    if keys is not None and all(key in known for key in keys):
+        # Nada a recalcular: nem o índice da página é montado
+        indexes = {'tokens': ([], {}, {})}
+    elif snapshot is not None:
+        indexes = page_index(snapshot, lambda: build_token_index(web_texts))
+    else:
+        indexes = {'tokens': build_token_index(web_texts)}
+    web_words, token_index, exact_index = indexes['tokens']
+    
+    lsh_candidates = None
+    if (mode or MATCH_MODE) == 'lsh':
+        # Só as linhas que não têm correspondência exata (nem resultado reaproveitado) são consultadas no índice
+        pending = [i for i, doc_text in enumerate(doc_texts)
+                   if frozenset(doc_text.lower().split()) not in exact_index
+                   and (keys is None or keys[i] not in known)]
+        if 'lsh' not in indexes:
+            indexes['lsh'] = MinHashLSH().index(web_words)
+        queries = indexes['lsh'].query_many([set(doc_texts[i].lower().split()) for i in pending])
+        lsh_candidates = dict(zip(pending, queries))
+        counters['lsh_candidates'] = sum(len(c) for c in queries)
+    
+    for doc_position, doc_text in enumerate(doc_texts):
+        if keys is not None and keys[doc_position] in known:
+            counters['reused'] += 1
+            position, status, similarity = matches[keys[doc_position]]
+            results.append({
+                "doc_text": doc_text,
+                "web_text": web_texts[position] if position is not None else None,
+                "status": status,
+                "similarity": similarity
+            })
+            continue
+        
+        best_match = None
+        best_position = None
+        best_similarity = 0
+        doc_words = set(doc_text.lower().split())
+        
+        # Mesmo conjunto de palavras = similaridade 1; o primeiro texto com esse conjunto
+        # é o que a busca completa escolheria
+        exact = exact_index.get(frozenset(doc_words))
+        if exact is not None:
+            counters['exact_hash'] += 1
+            if keys is not None:
+                matches[keys[doc_position]] = (exact, "Exato", 1.0)
+            results.append({
+                "doc_text": doc_text,
+                "web_text": web_texts[exact],
+                "status": "Exato",
+                "similarity": 1.0
+            })
+            continue
+        counters['fuzzy'] += 1
+        
+        if lsh_candidates is not None:
+            # Modo aproximado: a métrica exata só é calculada para os candidatos do LSH
+            common_counts = {position: len(doc_words & web_words[position])
+                             for position in lsh_candidates[doc_position]}
+        else:
+            # Só os textos com pelo menos uma palavra em comum podem superar similaridade 0;
+            # a contagem de ocorrências no índice é o tamanho da interseção
+            common_counts = {}
+            for word in doc_words:
+                for position in token_index.get(word, ()):
+                    common_counts[position] = common_counts.get(position, 0) + 1
+        
+        # Ordem original dos textos, para manter o mesmo desempate (primeiro maior valor)
+        for position in sorted(common_counts):
+            # Calcular similaridade simples baseada em palavras comuns
+            similarity = common_counts[position] / max(len(doc_words), len(web_words[position]))
+            
+            if similarity > best_similarity:
+                best_similarity = similarity
+                best_match = web_texts[position]
+                best_position = position
+                if similarity == 1:
+                    break
+        
+        # Determinar status baseado na similaridade
+        if best_similarity >= 0.9:
+            status = "Exato"
+        elif best_similarity >= 0.7:
+            status = "Similar"
+        elif best_similarity >= 0.5:
+            status = "Parcial"
+        else:
+            status = "Não encontrado"
+            best_match = None
+            best_position = None
+            best_similarity = None
+        
+        if keys is not None:
+            matches[keys[doc_position]] = (best_position, status, best_similarity)
+        results.append({
+            "doc_text": doc_text,
+            "web_text": best_match,
+            "status": status,
+            "similarity": best_similarity
+        })
+    
+    if stats is not None:
+        stats.update(counters)
+    return results
+
+def generate_summary(comparison_results):
+    """Gera um resumo dos resultados da comparação."""
+    counts = {
+        "exact": 0,
+        "similar": 0,
+        "partial": 0,
+        "missing": 0
+    }
+    
+    for result in comparison_results:
+        if result["status"] == "Exato":
+            counts["exact"] += 1
+        elif result["status"] == "Similar":
+            counts["similar"] += 1
+        elif result["status"] == "Parcial":
+            counts["partial"] += 1
+        else:
+            counts["missing"] += 1
+    
+    return counts
+
+def generate_summary_table(comparison_results):
+    """Gera uma tabela de resumo para os resultados da comparação."""
+    counts = {
+        "Exato": 0,
+        "Similar": 0,
+        "Parcial": 0,
+        "Não encontrado": 0
+    }
+    
+    for result in comparison_results:
+        counts[result["status"]] += 1
+    
+    total = sum(counts.values())
+    
+    summary_table = {}
+    for status, count in counts.items():
+        percent = (count / total * 100) if total > 0 else 0
+        summary_table[status] = {"count": count, "percent": percent}
+    
+    summary_table["TOTAL"] = {"count": total, "percent": 100}
+    
+    return summary_table
+
+# Estilo de cada status nas abas do relatório Excel (cores da planilha)
+REPORT_STATUS_STYLES = {
+    "Exato": "status_exato",
+    "Similar": "status_similar",
+    "Parcial": "status_parcial",
+    "Não encontrado": "status_nao_encontrado"
+}
+
+def _report_styles():
+    """Estilos nomeados do relatório Excel, registrados uma vez por workbook."""
+    return [
+        header_style("cabecalho", horizontal='center'),
+        fill_style("status_exato", "C6EFCE"),
+        fill_style("status_similar", "FFEB9C"),
+        fill_style("status_parcial", "FFCC99"),
+        fill_style("status_nao_encontrado", "FFC7CE"),
+        fill_style("status_outro", "FFFFFF")
+    ]
+
+def _comparison_sheet(report, title, comparison_results):
+    """Aba de comparação: uma linha por parágrafo, colorida pelo status."""
+    ws_comparison = report.sheet(
+        title, ["Document Text", "Webpage Match", "Status", "Similarity"], [40, 40, 40, 40], "cabecalho"
+    )
+    for result in comparison_results:
+        if result["similarity"] is not None:
+            similarity = f"{result['similarity']:.2%}"
+        else:
+            similarity = "N/A"
+        report.append(
+            ws_comparison,
+            [result["doc_text"], result["web_text"] if result["web_text"] else "Não encontrado", result["status"], similarity],
+            REPORT_STATUS_STYLES.get(result["status"], "status_nao_encontrado")
+        )
+    return ws_comparison
+
+def create_excel_report(excel_path, comparison_results, summary_table, elements, docx_name, web_url):
+    """Cria um relatório Excel com os resultados da comparação, em uma única passada (ver ReportWriter)."""
+    report = ReportWriter(_report_styles())
+    _comparison_sheet(report, "Comparacao", comparison_results)
+    
+    # Aba de resumo
+    ws_summary = report.sheet("Resumo", ["Status", "Quantidade", "Porcentagem"], [20, 20, 20], "cabecalho")
+    for status, info in summary_table.items():
+        report.append(
+            ws_summary,
+            [status, info["count"], f"{info['percent']:.2f}%"],
+            REPORT_STATUS_STYLES.get(status, "status_outro")
+        )
+    
+    # Aba de elementos da página
+    ws_elements = report.sheet("Elementos da Página", ["Definition", "Tag", "Text", "Link"], [20, 10, 60, 40], "cabecalho")
+    for element in elements:
+        report.append(ws_elements, element)
+    
+    return report.save(excel_path)
+
+def compare_and_store(docx_texts, docx_name, web_texts, elements, data_path, web_url, mode, match_stats, matches=None):
+    """
+    Etapa de CPU de uma comparação, executada no pool de processos: compara e grava o resultado
+    compacto usado para gerar o Excel no download (ver report_store).
+    Recebe e retorna só textos, listas, tuplas e dicionários simples; as linhas voltam como
+    (doc_text, web_text, status, similarity), `match_stats` volta com as métricas da comparação
+    e `matches` (modo incremental) volta com os resultados por parágrafo, incluindo os novos.
+    """
+    # Calcular similaridades
+    comparison_results = compare_texts(
+        docx_texts, web_texts, stats=match_stats, mode=mode, matches=matches, snapshot=match_stats.get('page_snapshot')
+    )
+    rows = [(item['doc_text'], item['web_text'], item['status'], item['similarity']) for item in comparison_results]
+    
+    write_report_data(data_path, {
+        'docx_name': docx_name,
+        'web_url': web_url,
+        'rows': rows,
+        'elements': elements
+    })
+    return rows, match_stats, matches
+
+def _stored_results(data):
+    """Linhas da comparação guardada no formato de compare_texts."""
+    return [
+        {
+            'doc_text': doc_text,
+            'web_text': web_text,
+            'status': status,
+            'similarity': similarity
+        }
+        for doc_text, web_text, status, similarity in data['rows']
+    ]
+
+def write_report(data, excel_path):
+    """Gera o relatório Excel a partir do resultado compacto guardado (roda no pool de processos)."""
+    comparison_results = _stored_results(data)
+    return create_excel_report(
+        excel_path,
+        comparison_results,
+        generate_summary_table(comparison_results),
+        data['elements'],
+        data['docx_name'],
+        data['web_url']
+    )
+
+def _pair_number(report_id):
+    """Número do par (como exibido na tela) a partir do id do relatório <batch_id>_<par>."""
+    return int(report_id.rsplit('_', 1)[1]) + 1
+
+def write_batch_report(report_ids, excel_path):
+    """
+    Gera o Excel consolidado de um lote (roda no pool de processos): uma aba "Resumo" com os
+    totais de cada par e uma aba de comparação por par. Os resultados são lidos um de cada vez
+    e as linhas vão direto para o arquivo, então a memória não cresce com o tamanho do lote.
+    """
+    store = get_report_store()
+    report = ReportWriter(_report_styles())
+    statuses = list(REPORT_STATUS_STYLES)
+    ws_summary = report.sheet(
+        "Resumo",
+        ["Par", "Documento", "URL", *statuses, "Total", "% Exato"],
+        [8, 40, 50, 12, 12, 12, 16, 12, 12],
+        "cabecalho"
+    )
+    used = {"resumo"}
+    for report_id in report_ids:
+        data = store.load(report_id)
+        if data is None:
+            continue
+        number = _pair_number(report_id)
+        comparison_results = _stored_results(data)
+        summary_table = generate_summary_table(comparison_results)
+        
+        stem = os.path.splitext(data['docx_name'])[0]
+        _comparison_sheet(report, sheet_title(f"{number:02d} {stem}", used), comparison_results)
+        report.append(ws_summary, [
+            number,
+            data['docx_name'],
+            data['web_url'],
+            *(summary_table[status]["count"] for status in statuses),
+            summary_table["TOTAL"]["count"],
+            f"{summary_table['Exato']['percent']:.2f}%"
+        ])
+    return report.save(excel_path)
@@ -0,0 +1,186 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Memória usada pelos textos extraídos de DOCX guardados no processo (LRU)
+DOCX_CACHE_MAX_BYTES = int(os.environ.get('DOCX_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# Camada opcional em disco, compartilhada entre os workers do gunicorn (vazio = desativada)
+DOCX_CACHE_DIR = os.environ.get('DOCX_CACHE_DIR', '')
+DOCX_CACHE_DISK_MAX_BYTES = int(os.environ.get('DOCX_CACHE_DISK_MAX_BYTES', 200 * 1024 * 1024))
+
+# Faz parte da chave: incremente quando a extração mudar, para não reaproveitar resultados antigos
+EXTRACTION_VERSION = 1
+
+
+def read_docx_bytes(source):
+    """
+    Conteúdo do DOCX a partir de bytes, de um caminho ou de um arquivo aberto.
+    """
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    return source.read()
+
+
+def docx_hash(data):
+    """
+    SHA-256 (hex) do conteúdo do arquivo.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def docx_key(data, variant, digest=None):
+    """
+    Chave do resultado: SHA-256 do arquivo + quem extraiu (`variant`) + EXTRACTION_VERSION.
+    `digest` evita recalcular o SHA-256 quando ele já é conhecido.
+    """
+    return f"{digest or docx_hash(data)}-{variant}-v{EXTRACTION_VERSION}"
+
+
+def _size(texts):
+    return sys.getsizeof(texts) + sum(sys.getsizeof(text) for text in texts)
+
+
+class DocxTextCache:
+    """
+    Cache dos parágrafos extraídos de um DOCX, endereçado pelo conteúdo do arquivo.
+    - Em memória: LRU limitado a `max_bytes`
+    - Em disco (se `directory` for informado): JSON comprimido com gzip, um arquivo por chave,
+      limitado a `disk_max_bytes` removendo os usados há mais tempo
+    - Chamadas simultâneas com a mesma chave esperam uma única extração
+    """
+
+    def __init__(self, max_bytes=DOCX_CACHE_MAX_BYTES, directory=DOCX_CACHE_DIR, disk_max_bytes=DOCX_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get_or_compute(self, key, compute, stats=None):
+        """
+        Retorna a lista de textos da chave, chamando compute() só se ela não estiver em memória nem em disco.
+        Se `stats` for um dicionário, recebe em 'docx_cache' a origem: 'memory', 'disk' ou 'miss'.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            else:
+                future = self._pending.get(key)
+                owner = future is None
+                if owner:
+                    future = self._pending[key] = Future()
+
+        if entry is not None:
+            texts, status = entry[0], 'memory'
+        elif not owner:
+            # Outra thread já está extraindo o mesmo arquivo
+            texts, status = future.result(), 'memory'
+        else:
+            try:
+                texts, status = self._load(key), 'disk'
+                if texts is None:
+                    texts, status = list(compute()), 'miss'
+                    self._write(key, texts)
+            except Exception as e:
+                with self._lock:
+                    del self._pending[key]
+                future.set_exception(e)
+                raise
+            with self._lock:
+                self._remember(key, texts)
+                del self._pending[key]
+            future.set_result(texts)
+
+        if stats is not None:
+            stats['docx_cache'] = status
+        return texts
+
+    def _remember(self, key, texts):
+        size = _size(texts)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (texts, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                texts = json.load(f)
+            # Atualiza o mtime para a política LRU
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+        return texts
+
+    def _write(self, key, texts):
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump(texts, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        files = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json.gz'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_docx_cache():
+    """
+    Retorna o cache de textos de DOCX do processo, criando-o na primeira chamada.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DocxTextCache()
+        return _cache
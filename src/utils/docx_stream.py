@@ -0,0 +1,165 @@
+import io
+import posixpath
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+try:
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:  # lxml é opcional; sem ele os eventos vêm do ElementTree e são filtrados em Python
+    HAS_LXML = False
+
+# Extração de parágrafos de DOCX lendo o XML direto do zip, em streaming, sem montar
+# o modelo de objetos do python-docx. Cobre corpo, tabelas, caixas de texto, cabeçalhos e rodapés.
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_MC = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+_OFFICE_DOCUMENT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+_HEADER = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/header'
+_FOOTER = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/footer'
+
+# Origens estruturais dos parágrafos
+HEADER = 'header'
+BODY = 'body'
+TABLE = 'table'
+TEXTBOX = 'textbox'
+FOOTER = 'footer'
+
+# Elementos de um run e o texto equivalente (mesma conversão do python-docx; w:t e w:br são tratados à parte)
+_RUN_TEXT = {
+    _W + 'tab': '\t',
+    _W + 'ptab': '\t',
+    _W + 'cr': '\n',
+    _W + 'noBreakHyphen': '-',
+}
+
+# Únicas tags que geram eventos na leitura; o texto de cada parágrafo é lido da subárvore no fim dele
+_EVENT_TAGS = (_W + 'p', _W + 'tbl', _W + 'txbxContent', _MC + 'Fallback')
+_EVENT_TAG_SET = frozenset(_EVENT_TAGS)
+
+
+def _relationships(archive, part):
+    """
+    Relacionamentos de uma parte do pacote: lista de (tipo, caminho da parte de destino).
+    """
+    folder, name = posixpath.split(part)
+    rels_path = posixpath.join(folder, '_rels', name + '.rels')
+    try:
+        data = archive.read(rels_path)
+    except KeyError:
+        return []
+    rels = []
+    for _, rel in iterparse(io.BytesIO(data)):
+        if rel.tag == _REL + 'Relationship' and rel.get('TargetMode') != 'External':
+            target = rel.get('Target', '')
+            if target.startswith('/'):
+                target = target.lstrip('/')
+            else:
+                target = posixpath.normpath(posixpath.join(folder, target))
+            rels.append((rel.get('Type'), target))
+    return rels
+
+
+def _events(stream):
+    """
+    Eventos de início e fim apenas das tags de _EVENT_TAGS.
+    """
+    if HAS_LXML:
+        return etree.iterparse(stream, events=('start', 'end'), tag=_EVENT_TAGS, resolve_entities=False)
+    return ((event, elem) for event, elem in iterparse(stream, events=('start', 'end')) if elem.tag in _EVENT_TAG_SET)
+
+
+def _release(elem):
+    """
+    Descarta a subárvore de um elemento já processado (e, com lxml, os irmãos anteriores já processados),
+    para que a memória não cresça com o tamanho do documento.
+    """
+    elem.clear()
+    if HAS_LXML:
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def _paragraph_text(paragraph):
+    """
+    Texto dos runs de um parágrafo, incluindo hyperlinks, inserções e campos.
+    Parágrafos de caixas de texto internas já foram descartados ao terminar.
+    """
+    parts = []
+    for run in paragraph.iter(_W + 'r'):
+        for child in run:
+            tag = child.tag
+            if tag == _W + 't':
+                parts.append(child.text or '')
+            elif tag == _W + 'br':
+                if child.get(_W + 'type', 'textWrapping') == 'textWrapping':
+                    parts.append('\n')
+            elif tag in _RUN_TEXT:
+                parts.append(_RUN_TEXT[tag])
+    return ''.join(parts)
+
+
+def _iter_part(archive, part, origin):
+    """
+    Percorre uma parte (document.xml, header*.xml ou footer*.xml) e gera (origem, texto) por parágrafo.
+    - Parágrafos de caixas de texto saem separados, antes do parágrafo que as contém
+    - mc:Fallback é ignorado (repete o conteúdo de mc:Choice, ex.: a mesma caixa de texto em VML)
+    """
+    tables = 0
+    textboxes = 0
+    fallback = 0
+    with archive.open(part) as stream:
+        for event, elem in _events(stream):
+            tag = elem.tag
+            if tag == _MC + 'Fallback':
+                if event == 'start':
+                    fallback += 1
+                else:
+                    fallback -= 1
+                    _release(elem)
+            elif fallback:
+                continue
+            elif tag == _W + 'tbl':
+                if event == 'start':
+                    tables += 1
+                else:
+                    tables -= 1
+                    _release(elem)
+            elif tag == _W + 'txbxContent':
+                textboxes += 1 if event == 'start' else -1
+            elif event == 'end':
+                text = _paragraph_text(elem)
+                _release(elem)
+                if origin != BODY:
+                    yield origin, text
+                elif textboxes:
+                    yield TEXTBOX, text
+                elif tables:
+                    yield TABLE, text
+                else:
+                    yield BODY, text
+
+
+def iter_docx_paragraphs(source):
+    """
+    Gera (origem, texto) para cada parágrafo do DOCX, em ordem: cabeçalhos, documento e rodapés.
+    `source` pode ser um caminho, um arquivo aberto ou o conteúdo em bytes.
+    A origem é HEADER, BODY, TABLE, TEXTBOX ou FOOTER; parágrafos vazios também são gerados.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as archive:
+        document = next(
+            (target for rel_type, target in _relationships(archive, '') if rel_type == _OFFICE_DOCUMENT),
+            'word/document.xml'
+        )
+        rels = _relationships(archive, document)
+        headers = sorted({target for rel_type, target in rels if rel_type == _HEADER})
+        footers = sorted({target for rel_type, target in rels if rel_type == _FOOTER})
+        for part in headers:
+            yield from _iter_part(archive, part, HEADER)
+        yield from _iter_part(archive, document, BODY)
+        for part in footers:
+            yield from _iter_part(archive, part, FOOTER)
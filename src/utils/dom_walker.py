@@ -0,0 +1,218 @@
+import re
+from bisect import bisect_left, bisect_right
+from heapq import merge
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:  # lxml é opcional; sem ele o web_scraper usa o caminho com html.parser
+    HAS_LXML = False
+
+# Textos dentro destas tags não entram em get_text() do BeautifulSoup
+# (Script, Stylesheet, TemplateString, RubyTextString, RubyParenthesisString)
+STRING_CONTAINERS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+
+# Tags registradas durante a travessia
+TRACKED_TAGS = frozenset([
+    'a', 'table', 'tr', 'td', 'div', 'main', 'body', 'img', 'footer', 'title', 'meta',
+    'script', 'style', 'noscript', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'p', 'li', 'span', 'strong', 'b', 'em', 'i'
+])
+
+
+class Node:
+    """
+    Elemento registrado na travessia.
+    - pos/last: índices em pré-ordem do elemento e do seu último descendente
+    - start/end: intervalo dos fragmentos de texto do elemento em PageIndex.frags
+    """
+    __slots__ = ('element', 'tag', 'pos', 'last', 'start', 'end')
+
+    def __init__(self, element, tag, pos, start):
+        self.element = element
+        self.tag = tag
+        self.pos = pos
+        self.start = start
+        self.last = pos
+        self.end = start
+
+    def get(self, attr, default=None):
+        return self.element.get(attr, default)
+
+    def classes(self):
+        return self.element.get('class', '').split()
+
+    def contains(self, other):
+        return self.pos < other.pos <= self.last
+
+
+class PageIndex:
+    """
+    Percorre a árvore lxml uma única vez e registra:
+    - os fragmentos de texto visíveis (já com strip), na ordem do documento
+    - os elementos de TRACKED_TAGS com seus intervalos de posição e de texto
+
+    O texto de qualquer elemento é então um recorte contíguo de `frags`,
+    equivalente a tag.get_text(sep, strip=True) do BeautifulSoup, sem novas travessias.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.frags = []
+        self.nodes = {tag: [] for tag in TRACKED_TAGS}
+        self._positions = {}
+        self._count = 0
+        self.root_node = self._walk(root, False)
+
+    def _add(self, text):
+        text = text.strip()
+        if text:
+            self.frags.append(text)
+
+    def _walk(self, element, excluded):
+        tag = element.tag
+        node = Node(element, tag, self._count, len(self.frags))
+        self._count += 1
+        if tag in TRACKED_TAGS:
+            self.nodes[tag].append(node)
+
+        excluded = excluded or tag in STRING_CONTAINERS
+        if element.text and not excluded:
+            self._add(element.text)
+        for child in element:
+            # Comentários e instruções de processamento têm tag não textual; só o tail conta
+            if isinstance(child.tag, str):
+                self._walk(child, excluded)
+            if child.tail and not excluded:
+                self._add(child.tail)
+
+        node.last = self._count - 1
+        node.end = len(self.frags)
+        return node
+
+    def first(self, tag):
+        nodes = self.nodes[tag]
+        return nodes[0] if nodes else None
+
+    def find_all(self, *tags, within=None):
+        """
+        Elementos das tags indicadas na ordem do documento, opcionalmente apenas
+        os descendentes de `within` (como find_all do BeautifulSoup).
+        """
+        if len(tags) == 1:
+            found = self._slice(tags[0], within)
+        else:
+            found = list(merge(*(self._slice(tag, within) for tag in tags), key=lambda n: n.pos))
+        return found
+
+    def _slice(self, tag, within):
+        nodes = self.nodes[tag]
+        if within is None:
+            return nodes
+        positions = self._positions.get(tag)
+        if positions is None:
+            positions = self._positions[tag] = [n.pos for n in nodes]
+        return nodes[bisect_right(positions, within.pos):bisect_right(positions, within.last)]
+
+    def text(self, node, separator=" ", removed=()):
+        """
+        Texto do elemento, como get_text(separator, strip=True).
+        `removed` é uma lista ordenada de intervalos (start, end) de fragmentos a ignorar,
+        usada para simular elementos removidos com decompose().
+        """
+        if not removed:
+            return separator.join(self.frags[node.start:node.end])
+        parts = []
+        current = node.start
+        # Os intervalos não se sobrepõem; só o anterior ao início pode cobrir parte do elemento
+        i = max(0, bisect_left(removed, (node.start, node.start)) - 1)
+        while i < len(removed) and removed[i][0] < node.end:
+            start, end = removed[i]
+            if end > current:
+                parts.extend(self.frags[current:max(current, start)])
+                current = end
+            i += 1
+        parts.extend(self.frags[current:node.end])
+        return separator.join(parts)
+
+    def text_length(self, node):
+        """
+        Tamanho de get_text(strip=True), sem montar a string.
+        """
+        return sum(len(frag) for frag in self.frags[node.start:node.end])
+
+
+class Exclusion:
+    """
+    Conjunto de elementos tratados como removidos (equivalente a decompose() no BeautifulSoup).
+    - covers(node): o elemento é um dos removidos ou está dentro de um deles
+    - ranges: intervalos de fragmentos a ignorar em PageIndex.text()
+    """
+
+    def __init__(self, nodes):
+        # Só os elementos mais externos; ficam ordenados e sem sobreposição
+        self.nodes = []
+        for node in sorted(nodes, key=lambda n: n.pos):
+            if not self.nodes or not self.nodes[-1].contains(node):
+                self.nodes.append(node)
+        self._positions = [n.pos for n in self.nodes]
+        self.ranges = [(n.start, n.end) for n in self.nodes if n.end > n.start]
+
+    def covers(self, node):
+        i = bisect_right(self._positions, node.pos) - 1
+        return i >= 0 and self.nodes[i].last >= node.pos
+
+    def __add__(self, nodes):
+        return Exclusion(self.nodes + list(nodes))
+
+
+def index_html(html):
+    """
+    Faz o parse do HTML com lxml e indexa o documento em uma única travessia.
+    """
+    return PageIndex(parse_html(html))
+
+
+def element_text(element, separator=" "):
+    """
+    Texto de um elemento lxml ou de uma Tag do BeautifulSoup, como get_text(separator, strip=True).
+    """
+    if HAS_LXML and isinstance(element, etree._Element):
+        index = PageIndex(element)
+        return index.text(index.root_node, separator)
+    return element.get_text(separator, strip=True)
+
+
+def parse_html(html):
+    """
+    Converte o HTML em uma árvore lxml.html (o elemento <html> raiz).
+    """
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # Strings com declaração de encoding XML precisam ser passadas como bytes
+        return lxml.html.document_fromstring(html.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+
+
+def element_to_html(element):
+    """
+    Serializa um elemento lxml (ou uma Tag do BeautifulSoup) em HTML.
+    """
+    if element is None:
+        return ''
+    if HAS_LXML and isinstance(element, etree._Element):
+        return lxml.html.tostring(element, encoding='unicode')
+    return str(element)
+
+
+def element_from_html(html):
+    """
+    Reconstrói o elemento serializado por element_to_html.
+    """
+    match = re.match(r'\s*<([a-zA-Z][a-zA-Z0-9]*)', html or '')
+    if not match:
+        return None
+    root = parse_html(html)
+    tag = match.group(1).lower()
+    return root if tag == 'html' else root.find(f'.//{tag}')
@@ -0,0 +1,73 @@
+from copy import copy
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, Font, PatternFill, Alignment
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+
+
+def header_style(name, fill_color=None, horizontal=None):
+    """
+    Estilo nomeado de cabeçalho: negrito, com preenchimento e alinhamento opcionais.
+    """
+    style = NamedStyle(name=name, font=Font(bold=True))
+    if fill_color:
+        style.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
+    if horizontal:
+        style.alignment = Alignment(horizontal=horizontal)
+    return style
+
+
+def fill_style(name, color):
+    """
+    Estilo nomeado de linha: fonte padrão da planilha com preenchimento sólido.
+    """
+    return NamedStyle(
+        name=name,
+        font=copy(DEFAULT_FONT),
+        fill=PatternFill(start_color=color, end_color=color, fill_type="solid")
+    )
+
+
+class ReportWriter:
+    """
+    Relatório Excel gravado em uma única passada, no modo write-only do openpyxl.
+    - As linhas vão direto para o arquivo à medida que são adicionadas; nada fica em memória por célula
+    - Os estilos são NamedStyle registrados uma vez no workbook e apenas referenciados pelas células
+    - Larguras de coluna são definidas ao criar a aba (no modo write-only não dá para mudar depois)
+    Os estilos são criados a cada relatório: um NamedStyle fica preso ao workbook em que foi registrado.
+    """
+
+    def __init__(self, styles=()):
+        self.workbook = Workbook(write_only=True)
+        for style in styles:
+            self.workbook.add_named_style(style)
+
+    def sheet(self, title, headers, widths, header_style=None):
+        """
+        Cria uma aba com a linha de cabeçalho. `widths` lista a largura de cada coluna (None mantém a padrão).
+        """
+        ws = self.workbook.create_sheet(title)
+        for col, width in enumerate(widths, 1):
+            if width is not None:
+                ws.column_dimensions[get_column_letter(col)].width = width
+        self.append(ws, headers, header_style)
+        return ws
+
+    def append(self, ws, values, style=None):
+        """
+        Adiciona uma linha; com `style`, todas as células da linha recebem o estilo nomeado.
+        """
+        if style is None:
+            ws.append(list(values))
+            return
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(ws, value)
+            cell.style = style
+            cells.append(cell)
+        ws.append(cells)
+
+    def save(self, path):
+        self.workbook.save(path)
+        return path
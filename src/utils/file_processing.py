@@ -1,19 +1,52 @@
-import os
 import pandas as pd
-from docx import Document
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils.dataframe import dataframe_to_rows
+from src.utils.docx_stream import iter_docx_paragraphs
+from src.utils.docx_cache import get_docx_cache, docx_key, read_docx_bytes
+from src.utils.excel_report import ReportWriter, header_style, fill_style
 
-def load_docx_text(path):
+def load_docx_text(source):
     """
-    Carrega e processa o texto de um arquivo DOCX.
+    Carrega e processa o texto de um arquivo DOCX (caminho, arquivo aberto ou conteúdo em bytes).
+    Inclui tabelas, caixas de texto, cabeçalhos e rodapés (ver docx_stream).
+    O resultado fica no cache por conteúdo (ver docx_cache): o mesmo arquivo não é lido de novo.
     """
-    doc = Document(path)
-    return [p.text for p in doc.paragraphs if p.text.strip()]
+    data = read_docx_bytes(source)
+    texts = get_docx_cache().get_or_compute(
+        docx_key(data, 'file_processing'),
+        lambda: [text for origin, text in iter_docx_paragraphs(data) if text.strip()]
+    )
+    return list(texts)
+
+# Cores da aba de comparação por status
+STATUS_COLORS = {
+    "Exact": "C6EFCE",  # Verde
+    "Similar": "FFEB9C",  # Amarelo
+    "Partial": "F4B084",  # Laranja
+    "Missing": "F8CBAD"   # Vermelho claro
+}
+
+
+def _report_styles():
+    """
+    Estilos nomeados do relatório: cabeçalho e um preenchimento por status (branco para os demais).
+    """
+    styles = [header_style("cabecalho", fill_color="D9E1F2"), fill_style("status_outro", "FFFFFF")]
+    for status, color in STATUS_COLORS.items():
+        styles.append(fill_style(f"status_{status.lower()}", color))
+    return styles
+
+
+def _rows(df):
+    """
+    Linhas do DataFrame como listas, com NaN como célula vazia (como faz o to_excel).
+    """
+    for row in df.astype(object).where(pd.notna(df), None).itertuples(index=False, name=None):
+        yield list(row)
+
 
 def save_to_excel(df_compare, df_summary, df_elements, filename):
     """
     Salva os resultados da comparação em um arquivo Excel com formatação de cores.
+    O arquivo é gravado em uma única passada, já com os estilos (ver ReportWriter).
     
     Args:
         df_compare: DataFrame com os resultados da comparação
@@ -21,11 +54,17 @@ def save_to_excel(df_compare, df_summary, df_elements, filename):
         df_elements: DataFrame com os elementos HTML coletados
         filename: Nome do arquivo Excel a ser salvo
     """
-    # Cria um escritor Excel
-    writer = pd.ExcelWriter(filename, engine='openpyxl')
-    
-    # Salva cada DataFrame em uma aba separada com nomes em português
-    df_compare.to_excel(writer, sheet_name='Comparacao', index=False)
+    report = ReportWriter(_report_styles())
+    
+    # Aba de comparação, com as linhas coloridas pelo status
+    ws = report.sheet("Comparacao", list(df_compare.columns), [25] * len(df_compare.columns), "cabecalho")
+    status_idx = list(df_compare.columns).index("Status") if "Status" in df_compare.columns else None
+    for row in _rows(df_compare):
+        if status_idx is None:
+            report.append(ws, row)
+            continue
+        status = row[status_idx]
+        report.append(ws, row, f"status_{status.lower()}" if status in STATUS_COLORS else "status_outro")
     
     # Renomear colunas do resumo para português
     if 'Status' in df_summary.columns and 'Quantidade' in df_summary.columns and 'Porcentagem' in df_summary.columns:
@@ -36,80 +75,17 @@ def save_to_excel(df_compare, df_summary, df_elements, filename):
             'Percentage': 'Porcentagem'
         })
     
-    df_summary.to_excel(writer, sheet_name='Resumo', index=False)
+    ws = report.sheet("Resumo", list(df_summary.columns), [25] * len(df_summary.columns), "cabecalho")
+    for row in _rows(df_summary):
+        report.append(ws, row)
     
     # Converte a lista de elementos HTML para DataFrame
     if isinstance(df_elements, list):
         df_elements = pd.DataFrame(df_elements, columns=['Definition', 'Tag', 'Text', 'Link'])
     
-    df_elements.to_excel(writer, sheet_name='Elementos da Página', index=False)
-    
-    # Salva o arquivo Excel para aplicar formatação
-    writer.close()
-    
-    # Aplicar formatação de cores
-    from openpyxl import load_workbook
-    wb = load_workbook(filename)
-    
-    # Formatar aba de comparação
-    ws = wb['Comparacao']
-    
-    # Estilizar cabeçalho
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-    
-    # Ajustar largura das colunas
-    for col in ws.columns:
-        ws.column_dimensions[col[0].column_letter].width = 25
-    
-    # Colorir células por status
-    color_map = {
-        "Exact": "C6EFCE",  # Verde
-        "Similar": "FFEB9C",  # Amarelo
-        "Partial": "F4B084",  # Laranja
-        "Missing": "F8CBAD"   # Vermelho claro
-    }
-    
-    # Encontrar índice da coluna Status
-    status_idx = None
-    for i, cell in enumerate(ws[1]):
-        if cell.value == "Status":
-            status_idx = i + 1
-            break
-    
-    if status_idx:
-        for row_idx, row in enumerate(ws.iter_rows(min_row=2), 2):
-            status = row[status_idx - 1].value
-            fill_color = color_map.get(status, "FFFFFF")
-            for cell in row:
-                cell.fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
-    
-    # Formatar aba de resumo
-    ws = wb['Resumo']
-    
-    # Estilizar cabeçalho
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-    
-    # Ajustar largura das colunas
-    for col in ws.columns:
-        ws.column_dimensions[col[0].column_letter].width = 25
-    
-    # Formatar aba de elementos da página
-    ws = wb['Elementos da Página']
-    
-    # Estilizar cabeçalho
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-        cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-    
-    # Ajustar largura das colunas
-    for col in ws.columns:
-        ws.column_dimensions[col[0].column_letter].width = 25
-    
-    # Salvar o arquivo com formatação
-    wb.save(filename)
+    ws = report.sheet("Elementos da Página", list(df_elements.columns), [25] * len(df_elements.columns), "cabecalho")
+    for row in _rows(df_elements):
+        report.append(ws, row)
     
+    report.save(filename)
     return filename
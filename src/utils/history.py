@@ -0,0 +1,120 @@
+import os
+from sqlalchemy import insert, select, or_
+from sqlalchemy.exc import SQLAlchemyError
+from src.models.user import db
+from src.models.comparison import ComparisonRun, ComparisonRow, PageElement, url_hash
+
+# Histórico das comparações (consultado em /history); com 0 nada é gravado
+HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', '1') == '1'
+HISTORY_DATABASE_URL = os.environ.get(
+    'HISTORY_DATABASE_URL',
+    'sqlite:///' + os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'history.sqlite3')
+)
+
+# Colunas de contagem de ComparisonRun para cada status da comparação
+_STATUS_COLUMNS = {
+    "Exato": "exact",
+    "Similar": "similar",
+    "Parcial": "partial",
+    "Não encontrado": "missing"
+}
+
+
+def init_history(app):
+    """
+    Configura o banco do histórico no app (Flask-SQLAlchemy) e cria as tabelas que faltarem.
+    """
+    app.config.setdefault('SQLALCHEMY_DATABASE_URI', HISTORY_DATABASE_URL)
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite:///'):
+        os.makedirs(os.path.dirname(app.config['SQLALCHEMY_DATABASE_URI'][len('sqlite:///'):]) or '.', exist_ok=True)
+        # Vários workers do gunicorn gravam no mesmo arquivo
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {'connect_args': {'timeout': 30}})
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+
+
+def record_comparison(app, report_id, upload_name, web_url, rows, elements, docx_hash, batch_id=None):
+    """
+    Grava uma comparação concluída no histórico: a execução com os totais e, em inserções em lote,
+    as linhas (doc_text, web_text, status, similarity) e os elementos da página.
+    Retorna o id da execução, ou None se o histórico está desativado ou a gravação falhou
+    (o histórico nunca interrompe uma comparação).
+    """
+    if not HISTORY_ENABLED:
+        return None
+    counts = dict.fromkeys(_STATUS_COLUMNS.values(), 0)
+    for _, _, status, _ in rows:
+        counts[_STATUS_COLUMNS.get(status, 'missing')] += 1
+    total = len(rows)
+    avg_similarity = sum(similarity or 0 for _, _, _, similarity in rows) / total if total else 0.0
+
+    with app.app_context():
+        try:
+            run = ComparisonRun(
+                report_id=report_id,
+                batch_id=batch_id,
+                web_url=web_url,
+                web_url_hash=url_hash(web_url),
+                docx_name=upload_name,
+                docx_hash=docx_hash,
+                total=total,
+                avg_similarity=avg_similarity,
+                **counts
+            )
+            db.session.add(run)
+            db.session.flush()
+            if rows:
+                db.session.execute(insert(ComparisonRow), [
+                    {
+                        'run_id': run.id,
+                        'position': position,
+                        'doc_text': doc_text,
+                        'web_text': web_text,
+                        'status': status,
+                        'similarity': similarity
+                    }
+                    for position, (doc_text, web_text, status, similarity) in enumerate(rows)
+                ])
+            if elements:
+                db.session.execute(insert(PageElement), [
+                    {
+                        'run_id': run.id,
+                        'position': position,
+                        'definition': definition,
+                        'tag': tag,
+                        'text': text,
+                        'link': link
+                    }
+                    for position, (definition, tag, text, link) in enumerate(elements)
+                ])
+            db.session.commit()
+            return run.id
+        except SQLAlchemyError:
+            db.session.rollback()
+            return None
+
+
+def latest_report_id(app, web_url, docx_name, exclude_batch_id=None):
+    """
+    Id do relatório da comparação mais recente registrada para a URL com o mesmo documento
+    (`docx_name`), ou None. Com `exclude_batch_id`, as comparações desse lote são ignoradas.
+    """
+    if not HISTORY_ENABLED:
+        return None
+    query = select(ComparisonRun.report_id).where(
+        ComparisonRun.web_url_hash == url_hash(web_url),
+        ComparisonRun.web_url == web_url,
+        ComparisonRun.docx_name == docx_name
+    )
+    if exclude_batch_id is not None:
+        query = query.where(or_(ComparisonRun.batch_id.is_(None), ComparisonRun.batch_id != exclude_batch_id))
+    with app.app_context():
+        try:
+            return db.session.scalar(
+                query
+                .order_by(ComparisonRun.created_at.desc(), ComparisonRun.id.desc())
+                .limit(1)
+            )
+        except SQLAlchemyError:
+            return None
@@ -0,0 +1,217 @@
+import os
+import sys
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Comparação incremental (incremental=1): resultados por parágrafo guardados por versão da página,
+# para que o reenvio de um briefing revisado só recalcule os parágrafos novos ou alterados.
+MATCH_CACHE_MAX_BYTES = int(os.environ.get('MATCH_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+# Camada opcional em disco, compartilhada entre os workers do gunicorn (vazio = desativada)
+MATCH_CACHE_DIR = os.environ.get('MATCH_CACHE_DIR', '')
+
+# Índices de páginas mantidos em cada processo por versão da página, para não remontá-los
+# a cada reenvio (0 = desativado)
+PAGE_INDEX_CACHE_SIZE = int(os.environ.get('PAGE_INDEX_CACHE_SIZE', 4))
+
+# Faz parte da versão da página: incremente quando compare_texts mudar o resultado
+MATCH_VERSION = 1
+
+_page_indexes = OrderedDict()
+_page_indexes_lock = threading.Lock()
+
+
+def paragraph_key(doc_text):
+    """
+    Hash do conteúdo normalizado do parágrafo: o conjunto de palavras em minúsculas, que é tudo
+    o que compare_texts usa. Parágrafos que só diferem em espaços, caixa ou ordem das palavras
+    têm a mesma chave e, portanto, o mesmo resultado.
+    """
+    words = ' '.join(sorted(set(doc_text.lower().split())))
+    return hashlib.sha1(words.encode('utf-8')).hexdigest()
+
+
+def page_snapshot(web_texts, mode):
+    """
+    Versão da página comparada: SHA-256 dos textos + modo de busca + MATCH_VERSION.
+    Se a página mudar, todos os parágrafos são comparados de novo.
+    """
+    digest = hashlib.sha256()
+    for text in web_texts:
+        digest.update(text.encode('utf-8'))
+        digest.update(b'\x00')
+    return f"{digest.hexdigest()}-{mode}-v{MATCH_VERSION}"
+
+
+def page_index(snapshot, build):
+    """
+    Índices da versão da página `snapshot` no processo: {'tokens': build()}, montado só na primeira vez.
+    Quem chama pode guardar no mesmo dicionário outros índices da página (ex.: 'lsh').
+    """
+    if PAGE_INDEX_CACHE_SIZE <= 0:
+        return {'tokens': build()}
+    with _page_indexes_lock:
+        entry = _page_indexes.get(snapshot)
+        if entry is not None:
+            _page_indexes.move_to_end(snapshot)
+            return entry
+    entry = {'tokens': build()}
+    with _page_indexes_lock:
+        _page_indexes[snapshot] = entry
+        while len(_page_indexes) > PAGE_INDEX_CACHE_SIZE:
+            _page_indexes.popitem(last=False)
+    return entry
+
+
+def _size(matches):
+    return sys.getsizeof(matches) + sum(sys.getsizeof(key) + 120 for key in matches)
+
+
+class MatchCache:
+    """
+    Resultados por parágrafo de cada versão de página: {paragraph_key: (posição do trecho na página
+    ou None, status, similarity)}.
+    - Em memória: LRU por versão de página, limitado a `max_bytes`
+    - Em disco (se `directory` for informado): JSON comprimido com gzip, um arquivo por versão
+    """
+
+    def __init__(self, max_bytes=MATCH_CACHE_MAX_BYTES, directory=MATCH_CACHE_DIR):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def known(self, snapshot, keys):
+        """
+        Resultados já calculados para as chaves `keys` nesta versão da página.
+        """
+        with self._lock:
+            entry = self._entries.get(snapshot)
+            if entry is not None:
+                self._entries.move_to_end(snapshot)
+        matches = entry[0] if entry is not None else self._load(snapshot)
+        if matches is None:
+            return {}
+        if entry is None:
+            with self._lock:
+                self._remember(snapshot, matches)
+        return {key: matches[key] for key in keys if key in matches}
+
+    def update(self, snapshot, matches):
+        """
+        Acrescenta os resultados de uma comparação aos já guardados para a versão da página.
+        """
+        with self._lock:
+            entry = self._entries.get(snapshot)
+        merged = dict(entry[0]) if entry is not None else (self._load(snapshot) or {})
+        if all(key in merged for key in matches):
+            return
+        merged.update(matches)
+        with self._lock:
+            self._remember(snapshot, merged)
+        self._write(snapshot, merged)
+
+    def _remember(self, snapshot, matches):
+        previous = self._entries.pop(snapshot, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        size = _size(matches)
+        if size > self.max_bytes:
+            return
+        self._entries[snapshot] = (matches, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def _path(self, snapshot):
+        return os.path.join(self.directory, f"{snapshot}.json.gz")
+
+    def _load(self, snapshot):
+        if not self.directory:
+            return None
+        try:
+            with gzip.open(self._path(snapshot), 'rt', encoding='utf-8') as f:
+                return {key: tuple(value) for key, value in json.load(f).items()}
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, snapshot, matches):
+        if not self.directory:
+            return
+        path = self._path(snapshot)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump(matches, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+
+def status_delta(rows, base_rows, base_report_id):
+    """
+    O que mudou em relação à comparação anterior (`base_rows`), parágrafo a parágrafo (por paragraph_key):
+    - added: parágrafos novos ou alterados, com o status atual
+    - changed: mesmo parágrafo com status diferente (a página mudou)
+    - removed: parágrafos que saíram do documento
+    - unchanged: quantos continuam iguais
+    """
+    base = {}
+    for doc_text, _, status, similarity in base_rows:
+        base.setdefault(paragraph_key(doc_text), (doc_text, status, similarity))
+
+    added = []
+    changed = []
+    unchanged = 0
+    seen = set()
+    for position, (doc_text, _, status, similarity) in enumerate(rows):
+        key = paragraph_key(doc_text)
+        seen.add(key)
+        previous = base.get(key)
+        if previous is None:
+            added.append({'position': position, 'doc_text': doc_text, 'status': status, 'similarity': similarity})
+        elif previous[1] != status:
+            changed.append({
+                'position': position,
+                'doc_text': doc_text,
+                'status': status,
+                'similarity': similarity,
+                'previous_status': previous[1],
+                'previous_similarity': previous[2]
+            })
+        else:
+            unchanged += 1
+
+    removed = [
+        {'doc_text': doc_text, 'status': status, 'similarity': similarity}
+        for key, (doc_text, status, similarity) in base.items()
+        if key not in seen
+    ]
+    return {
+        'base_report_id': base_report_id,
+        'added': added,
+        'changed': changed,
+        'removed': removed,
+        'unchanged': unchanged
+    }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_match_cache():
+    """
+    Retorna o cache de resultados por parágrafo do processo, criando-o na primeira chamada.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MatchCache()
+        return _cache
@@ -0,0 +1,342 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Fila de jobs em segundo plano (comparações e lotes), persistida em SQLite
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_DB_PATH = os.environ.get(
+    'JOB_DB_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'jobs.sqlite3')
+)
+# Jobs concluídos há mais tempo que isso são apagados da tabela
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 7 * 24 * 3600))
+# Intervalo (segundos) em que as etapas longas verificam se o cancelamento foi pedido
+JOB_CANCEL_POLL = float(os.environ.get('JOB_CANCEL_POLL', 1))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATUSES = (DONE, FAILED, CANCELLED)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    stage TEXT,
+    progress TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status);
+"""
+
+
+# Funções de cada tipo de job e da limpeza dos jobs que não chegam a rodar (ver register_job)
+JOB_HANDLERS = {}
+JOB_CLEANUPS = {}
+
+
+class JobCancelled(Exception):
+    """
+    Lançada dentro do job quando o cancelamento foi solicitado.
+    """
+
+
+def register_job(kind, fn, cleanup=None):
+    """
+    Registra a função que executa os jobs do tipo `kind`.
+    fn(job) recebe um JobContext e retorna o resultado (serializável em JSON).
+    cleanup(params), se informada, libera os recursos de um job cancelado ainda na fila,
+    que não chega a executar fn (ex.: o upload gravado para ele).
+    """
+    JOB_HANDLERS[kind] = fn
+    if cleanup is not None:
+        JOB_CLEANUPS[kind] = cleanup
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner):
+    """
+    Verifica se o processo dono de um job em execução ainda existe (apenas no mesmo host).
+    """
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    Tabela de jobs em SQLite. Cada operação abre sua própria conexão, o que permite
+    o uso a partir de várias threads e de vários processos do gunicorn.
+    """
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _execute(self, sql, args=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, args).rowcount
+        finally:
+            conn.close()
+
+    def _query(self, sql, args=()):
+        conn = self._connect()
+        try:
+            return conn.execute(sql, args).fetchall()
+        finally:
+            conn.close()
+
+    def create(self, kind, params):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            'INSERT INTO jobs (id, kind, status, params, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+            (job_id, kind, QUEUED, json.dumps(params), now, now)
+        )
+        return job_id
+
+    def get(self, job_id):
+        rows = self._query('SELECT * FROM jobs WHERE id = ?', (job_id,))
+        return dict(rows[0]) if rows else None
+
+    def claim(self, job_id, owner):
+        """
+        Passa o job de 'queued' para 'running' de forma atômica.
+        Retorna False se outro worker já o pegou ou se ele foi cancelado.
+        """
+        now = time.time()
+        return self._execute(
+            'UPDATE jobs SET status = ?, owner = ?, started_at = ?, updated_at = ? WHERE id = ? AND status = ?',
+            (RUNNING, owner, now, now, job_id, QUEUED)
+        ) == 1
+
+    def update_progress(self, job_id, stage, progress):
+        self._execute(
+            'UPDATE jobs SET stage = ?, progress = ?, updated_at = ? WHERE id = ?',
+            (stage, json.dumps(progress), time.time(), job_id)
+        )
+
+    def finish(self, job_id, status, result=None, error=None):
+        now = time.time()
+        self._execute(
+            'UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ? WHERE id = ?',
+            (status, json.dumps(result) if result is not None else None, error, now, now, job_id)
+        )
+
+    def request_cancel(self, job_id):
+        """
+        Jobs na fila são cancelados na hora; jobs em execução recebem o pedido
+        e param no próximo ponto de verificação.
+        Retorna o status em que o job estava (QUEUED ou RUNNING) ou None se ele já tinha terminado.
+        """
+        now = time.time()
+        if self._execute(
+            'UPDATE jobs SET status = ?, finished_at = ?, updated_at = ? WHERE id = ? AND status = ?',
+            (CANCELLED, now, now, job_id, QUEUED)
+        ):
+            return QUEUED
+        if self._execute(
+            'UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = ?',
+            (now, job_id, RUNNING)
+        ):
+            return RUNNING
+        return None
+
+    def cancel_requested(self, job_id):
+        rows = self._query('SELECT cancel_requested FROM jobs WHERE id = ?', (job_id,))
+        return bool(rows and rows[0]['cancel_requested'])
+
+    def recover(self):
+        """
+        Devolve à fila os jobs cujo processo dono morreu (reinício ou deploy)
+        e retorna os ids de todos os jobs pendentes.
+        """
+        for row in self._query('SELECT id, owner FROM jobs WHERE status = ?', (RUNNING,)):
+            if not _owner_alive(row['owner']):
+                self._execute(
+                    'UPDATE jobs SET status = ?, owner = NULL, updated_at = ? WHERE id = ? AND status = ? AND owner IS ?',
+                    (QUEUED, time.time(), row['id'], RUNNING, row['owner'])
+                )
+        return [row['id'] for row in self._query('SELECT id FROM jobs WHERE status = ? ORDER BY created_at', (QUEUED,))]
+
+    def purge(self, older_than=JOB_RETENTION):
+        self._execute(
+            f'DELETE FROM jobs WHERE status IN ({",".join("?" * len(FINISHED_STATUSES))}) AND finished_at < ?',
+            (*FINISHED_STATUSES, time.time() - older_than)
+        )
+
+
+class JobContext:
+    """
+    Interface entregue à função do job: parâmetros, progresso por etapa e cancelamento.
+    """
+
+    def __init__(self, store, job_id, params):
+        self.store = store
+        self.id = job_id
+        self.params = params
+        self.progress = {}
+        self._stage = None
+        self._lock = threading.Lock()
+
+    def stage(self, name, total):
+        """
+        Inicia uma etapa com `total` itens. Verifica o cancelamento antes de começar.
+        """
+        self.check_cancelled()
+        with self._lock:
+            self._stage = name
+            self.progress[name] = {'done': 0, 'total': total}
+            self.store.update_progress(self.id, name, self.progress)
+
+    def advance(self, name, count=1):
+        """
+        Marca `count` itens da etapa como concluídos. Pode ser chamada de outras threads.
+        """
+        with self._lock:
+            self.progress[name]['done'] += count
+            self.store.update_progress(self.id, self._stage, self.progress)
+
+    def check_cancelled(self):
+        if self.store.cancel_requested(self.id):
+            raise JobCancelled()
+
+
+class JobManager:
+    """
+    Executa jobs em um pool limitado de threads (JOB_WORKERS), com as funções de JOB_HANDLERS.
+    Ao ser criado, reenfileira os jobs que ficaram pendentes antes de um reinício.
+    """
+
+    def __init__(self, store=None, workers=JOB_WORKERS):
+        self.store = store or JobStore()
+        self.owner = _owner()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='job')
+        self._recover()
+
+    def submit(self, kind, params):
+        job_id = self.store.create(kind, params)
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def _recover(self):
+        # Com vários workers, todos reenfileiram os mesmos ids; claim() garante que só um executa cada job
+        self.store.purge()
+        for job_id in self.store.recover():
+            self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        if not self.store.claim(job_id, self.owner):
+            return
+        job = self.store.get(job_id)
+        context = JobContext(self.store, job_id, json.loads(job['params']))
+        try:
+            result = JOB_HANDLERS[job['kind']](context)
+        except JobCancelled:
+            self.store.finish(job_id, CANCELLED)
+        except Exception as e:
+            self.store.finish(job_id, FAILED, error=str(e))
+        else:
+            self.store.finish(job_id, DONE, result=result)
+
+    def status(self, job_id):
+        """
+        Estado do job para a API: status, etapa atual, progresso por etapa e resultado.
+        """
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        return {
+            'id': job['id'],
+            'kind': job['kind'],
+            'status': job['status'],
+            'stage': job['stage'],
+            'progress': json.loads(job['progress']),
+            'cancel_requested': bool(job['cancel_requested']),
+            'result': json.loads(job['result']) if job['result'] else None,
+            'error': job['error'],
+            'created_at': job['created_at'],
+            'started_at': job['started_at'],
+            'finished_at': job['finished_at']
+        }
+
+    def cancel(self, job_id):
+        previous = self.store.request_cancel(job_id)
+        if previous is None:
+            return False
+        if previous == QUEUED:
+            # Cancelado na fila: a função do job não vai rodar e liberar os recursos dele
+            job = self.store.get(job_id)
+            cleanup = JOB_CLEANUPS.get(job['kind'])
+            if cleanup is not None:
+                cleanup(json.loads(job['params']))
+        return True
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_manager = None
+_manager_pid = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """
+    Retorna o gerenciador de jobs do processo, criando-o na primeira chamada
+    (e de novo após um fork, já que as threads não são herdadas).
+    """
+    global _manager, _manager_pid
+    with _manager_lock:
+        if _manager is None or _manager_pid != os.getpid():
+            _manager = JobManager()
+            _manager_pid = os.getpid()
+        return _manager
+
+
+def _shutdown_manager():
+    if _manager is not None and _manager_pid == os.getpid():
+        _manager.shutdown()
+
+
+atexit.register(_shutdown_manager)
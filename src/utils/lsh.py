@@ -0,0 +1,122 @@
+import os
+import zlib
+import numpy as np
+
+# Modo de correspondência de compare_texts: 'exact' (índice invertido, resultado exato)
+# ou 'lsh' (MinHash + LSH, aproximado, para páginas e lotes com dezenas de milhares de blocos)
+MATCH_MODE = os.environ.get('MATCH_MODE', 'exact')
+
+# Ajuste de recall × latência:
+# - mais permutações = estimativa melhor e assinaturas mais caras
+# - mais bandas (com menos linhas cada) = mais candidatos e maior recall
+# A probabilidade de um par com Jaccard J virar candidato é 1 - (1 - J^linhas)^bandas.
+# Padrão: 128 permutações em 32 bandas de 4 linhas (J=0,6 -> 99%, J=0,5 -> 87%, J=0,3 -> 23%).
+# Com 64 bandas de 2 linhas o recall é quase total, mas textos com palavras comuns geram
+# candidatos demais e o ganho sobre o modo exato desaparece.
+LSH_NUM_PERM = int(os.environ.get('LSH_NUM_PERM', 128))
+LSH_BANDS = int(os.environ.get('LSH_BANDS', 32))
+
+# Funções de hash multiply-shift: ((a*x + b) mod 2^64) >> 32, valores de 32 bits
+_SHIFT = np.uint64(32)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Multiplicador usado para combinar as linhas de uma banda em uma chave de 64 bits
+_KEY_MULTIPLIER = np.uint64(0x100000001B3)
+
+# Quantidade de palavras processadas por vez ao calcular assinaturas (limita a memória)
+_CHUNK_TOKENS = 16384
+
+
+class MinHashLSH:
+    """
+    Índice LSH de conjuntos de palavras.
+    - Cada conjunto vira uma assinatura MinHash com `num_perm` valores
+    - A assinatura é dividida em `bands` bandas; conjuntos com alguma banda idêntica
+      caem no mesmo bucket e são candidatos a correspondência
+    A similaridade real dos candidatos deve ser recalculada por quem consulta o índice.
+    """
+
+    def __init__(self, num_perm=LSH_NUM_PERM, bands=LSH_BANDS, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm precisa ser múltiplo de bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.RandomState(seed)
+        # `a` ímpar, como exige o esquema multiply-shift
+        self._a = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self._buckets = []
+
+    def signatures(self, token_sets):
+        """
+        Assinaturas MinHash de vários conjuntos de uma vez (uma linha por conjunto).
+        Conjuntos vazios ficam com a linha no valor máximo e não colidem com nada útil.
+        As palavras são reduzidas a 32 bits com CRC32, e não com hash(), que muda a cada processo
+        (PYTHONHASHSEED): as assinaturas são as mesmas no app, nos processos do pool e entre execuções.
+        """
+        result = np.full((len(token_sets), self.num_perm), _MAX_HASH, dtype=np.uint64)
+        start = 0
+        while start < len(token_sets):
+            # Agrupa conjuntos até somar _CHUNK_TOKENS palavras
+            end = start
+            hashes = []
+            offsets = []
+            rows = []
+            total = 0
+            while end < len(token_sets) and (total < _CHUNK_TOKENS or not hashes):
+                tokens = token_sets[end]
+                if tokens:
+                    offsets.append(total)
+                    rows.append(end)
+                    hashes.extend(zlib.crc32(token.encode('utf-8')) for token in tokens)
+                    total += len(tokens)
+                end += 1
+            if hashes:
+                values = np.array(hashes, dtype=np.uint64)[:, None]
+                # O estouro em uint64 é o próprio "mod 2^64" do multiply-shift
+                with np.errstate(over='ignore'):
+                    permuted = (values * self._a + self._b) >> _SHIFT
+                result[rows] = np.minimum.reduceat(permuted, offsets, axis=0)
+            start = end
+        return result
+
+    def band_keys(self, signatures):
+        """
+        Reduz cada banda da assinatura a uma chave uint64 (uma coluna por banda).
+        """
+        bands = signatures.reshape(len(signatures), self.bands, self.rows)
+        keys = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for row in range(self.rows):
+                keys = (keys * _KEY_MULTIPLIER) ^ bands[:, :, row]
+        return keys
+
+    def index(self, token_sets):
+        """
+        Indexa os conjuntos; a posição de cada um na lista é o identificador retornado nas consultas.
+        Cada banda vira um vetor ordenado de chaves, consultado com busca binária.
+        """
+        positions = np.array([i for i, tokens in enumerate(token_sets) if tokens], dtype=np.int64)
+        keys = self.band_keys(self.signatures([token_sets[i] for i in positions]))
+        self._buckets = []
+        for band in range(self.bands):
+            order = np.argsort(keys[:, band], kind='stable')
+            self._buckets.append((keys[order, band], positions[order]))
+        return self
+
+    def query_many(self, token_sets):
+        """
+        Para cada conjunto, as posições indexadas que dividem pelo menos um bucket com ele.
+        """
+        results = [set() for _ in token_sets]
+        if not self._buckets or not token_sets:
+            return results
+        keys = self.band_keys(self.signatures(token_sets))
+        for band, (sorted_keys, positions) in enumerate(self._buckets):
+            left = np.searchsorted(sorted_keys, keys[:, band], side='left')
+            right = np.searchsorted(sorted_keys, keys[:, band], side='right')
+            for i in np.nonzero(right > left)[0]:
+                if token_sets[i]:
+                    results[i].update(positions[left[i]:right[i]].tolist())
+        return results
@@ -0,0 +1,189 @@
+import os
+import time
+import gzip
+import json
+import hashlib
+import threading
+import requests
+
+# Cache em disco das páginas renderizadas (HTML final + dados extraídos)
+PAGE_CACHE_DIR = os.environ.get(
+    'PAGE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'pages')
+)
+PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 900))
+PAGE_CACHE_MAX_BYTES = int(os.environ.get('PAGE_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+PAGE_CACHE_REVALIDATE_TIMEOUT = int(os.environ.get('PAGE_CACHE_REVALIDATE_TIMEOUT', 5))
+
+
+def cache_validators(headers):
+    """
+    Extrai ETag e Last-Modified dos cabeçalhos da resposta principal da página.
+    """
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    return {
+        'etag': headers.get('etag'),
+        'last_modified': headers.get('last-modified')
+    }
+
+
+class PageCache:
+    """
+    Cache endereçado por conteúdo (URL + configurações de renderização).
+    - Entradas em JSON comprimido com gzip, uma por arquivo
+    - Válidas por `ttl` segundos; depois disso, se a origem enviou ETag ou
+      Last-Modified, uma requisição HEAD condicional decide se a entrada ainda serve
+    - Tamanho total limitado a `max_bytes`, removendo as entradas usadas há mais tempo (LRU).
+      O diretório só é varrido quando um contador aproximado dos bytes gravados passa do limite,
+      não a cada gravação
+    """
+
+    def __init__(self, directory=PAGE_CACHE_DIR, ttl=PAGE_CACHE_TTL, max_bytes=PAGE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        # Tamanho aproximado do diretório: medido na primeira gravação e somado a cada put.
+        # Sobrescritas e gravações de outros processos o desviam, mas a varredura do _evict o corrige
+        self._approx_bytes = None
+
+    def key(self, url, settings):
+        raw = json.dumps({'url': url, 'settings': settings}, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def get(self, url, settings):
+        """
+        Retorna a entrada armazenada para a URL ou None.
+        O campo 'cache_status' indica 'hit' ou 'revalidated'.
+        """
+        path = self._path(self.key(url, settings))
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        status = 'hit'
+        if time.time() - entry['stored_at'] > self.ttl:
+            if not self._revalidate(url, entry):
+                return None
+            entry['stored_at'] = time.time()
+            self._write(path, entry)
+            status = 'revalidated'
+        else:
+            # Atualiza o mtime para a política LRU
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+        entry['cache_status'] = status
+        return entry
+
+    def put(self, url, settings, data, validators=None):
+        """
+        Armazena os dados extraídos de uma página.
+        """
+        entry = {
+            'url': url,
+            'settings': settings,
+            'stored_at': time.time(),
+            'etag': (validators or {}).get('etag'),
+            'last_modified': (validators or {}).get('last_modified'),
+            'data': data
+        }
+        size = self._write(self._path(self.key(url, settings)), entry)
+        with self._lock:
+            if self._approx_bytes is None:
+                self._approx_bytes = self._scan()[1]
+            else:
+                self._approx_bytes += size
+            over_limit = self._approx_bytes > self.max_bytes
+        if over_limit:
+            self._evict()
+
+    def _write(self, path, entry):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+            json.dump(entry, f, ensure_ascii=False)
+        size = os.path.getsize(tmp_path)
+        os.replace(tmp_path, path)
+        return size
+
+    def _revalidate(self, url, entry):
+        """
+        Confirma com um HEAD condicional que a página não mudou desde que foi armazenada.
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        if not headers:
+            return False
+        try:
+            response = requests.head(url, headers=headers, allow_redirects=True,
+                                     timeout=PAGE_CACHE_REVALIDATE_TIMEOUT)
+        except requests.RequestException:
+            return False
+        if response.status_code == 304:
+            return True
+        if response.status_code != 200:
+            return False
+        current = cache_validators(response.headers)
+        if entry.get('etag') and current['etag']:
+            return current['etag'] == entry['etag']
+        if entry.get('last_modified') and current['last_modified']:
+            return current['last_modified'] == entry['last_modified']
+        return False
+
+    def _scan(self):
+        """
+        Lista as entradas do diretório. Retorna ([(mtime, tamanho, caminho)], total em bytes).
+        """
+        files = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json.gz'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        return files, total
+
+    def _evict(self):
+        with self._lock:
+            files, total = self._scan()
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                total -= size
+            self._approx_bytes = total
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """
+    Retorna o cache de páginas do processo, criando-o na primeira chamada.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache()
+        return _cache
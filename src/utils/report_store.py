@@ -0,0 +1,126 @@
+import os
+import re
+import gzip
+import json
+import threading
+from src.utils.uploads import ARTIFACTS_DIR
+
+# Resultados das comparações em formato compacto e os relatórios Excel gerados a partir deles
+REPORTS_DIR = os.environ.get('REPORTS_DIR', os.path.join(ARTIFACTS_DIR, 'reports'))
+
+# Ids aceitos (vêm da URL de download); impede caminhos fora de REPORTS_DIR
+_REPORT_ID = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def write_report_data(path, data):
+    """
+    Grava o resultado compacto de uma comparação (JSON comprimido com gzip).
+    Pode ser chamada no pool de processos; a escrita é atômica.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+class ReportStore:
+    """
+    Guarda o resultado de cada comparação e gera o relatório Excel só no primeiro download.
+    - <id>.json.gz: linhas da comparação e elementos da página, gravados ao fim da comparação
+    - <id>.xlsx: relatório gerado sob demanda e reaproveitado nos downloads seguintes
+    Nos lotes o id de cada par é <batch_id>_<par>, o que permite exportar o lote inteiro.
+    """
+
+    def __init__(self, directory=REPORTS_DIR):
+        self.directory = directory
+        self._locks = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def valid_id(self, report_id):
+        return bool(_REPORT_ID.match(report_id or ''))
+
+    def data_path(self, report_id):
+        return os.path.join(self.directory, f"{report_id}.json.gz")
+
+    def workbook_path(self, report_id):
+        return os.path.join(self.directory, f"{report_id}.xlsx")
+
+    def batch(self, batch_id):
+        """
+        Ids dos relatórios de um lote (<batch_id>_<par>), na ordem dos pares.
+        """
+        if not self.valid_id(batch_id):
+            return []
+        pattern = re.compile(rf'^{re.escape(batch_id)}_(\d+)\.json\.gz$')
+        found = []
+        for name in os.listdir(self.directory):
+            match = pattern.match(name)
+            if match:
+                found.append((int(match.group(1)), name[:-len('.json.gz')]))
+        return [report_id for _, report_id in sorted(found)]
+
+    def load(self, report_id):
+        """
+        Resultado compacto do relatório ou None se ele não existe.
+        """
+        if not self.valid_id(report_id):
+            return None
+        try:
+            with gzip.open(self.data_path(report_id), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def workbook(self, report_id, render):
+        """
+        Caminho do relatório Excel, gerando-o com render(data, path) se ainda não existir.
+        Downloads simultâneos do mesmo relatório esperam uma única geração.
+        Retorna None se não há resultado guardado com esse id.
+        """
+        if not self.valid_id(report_id):
+            return None
+        path = self.workbook_path(report_id)
+        if os.path.exists(path):
+            return path
+        with self._lock:
+            lock = self._locks.setdefault(report_id, threading.Lock())
+        with lock:
+            try:
+                if os.path.exists(path):
+                    return path
+                data = self.load(report_id)
+                if data is None:
+                    return None
+                tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.xlsx"
+                try:
+                    render(data, tmp_path)
+                    os.replace(tmp_path, path)
+                except Exception:
+                    # Geração que falhou no meio não deixa arquivo parcial em REPORTS_DIR
+                    try:
+                        os.remove(tmp_path)
+                    except OSError:
+                        pass
+                    raise
+                return path
+            finally:
+                # Quem chegar depois já encontra o arquivo: o lock deste id não é mais necessário
+                with self._lock:
+                    if self._locks.get(report_id) is lock:
+                        del self._locks[report_id]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_report_store():
+    """
+    Retorna o armazenamento de relatórios do processo, criando-o na primeira chamada.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReportStore()
+        return _store
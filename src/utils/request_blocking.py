@@ -0,0 +1,168 @@
+import os
+import json
+from urllib.parse import urlparse
+
+# Bloqueio de requisições desnecessárias durante a renderização.
+# Desative com REQUEST_BLOCKING=0.
+REQUEST_BLOCKING = os.environ.get('REQUEST_BLOCKING', '1') != '0'
+
+# Tipos de recurso que a extração nunca usa (alt e src vêm do DOM, não dos bytes da imagem)
+BLOCKED_RESOURCE_TYPES = ['image', 'media', 'font']
+
+# Hosts de anúncios, analytics e tracking de terceiros
+TRACKER_HOSTS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googleadservices.com',
+    'googlesyndication.com',
+    'doubleclick.net',
+    'adservice.google.com',
+    'connect.facebook.net',
+    'facebook.com/tr',
+    'hotjar.com',
+    'clarity.ms',
+    'bat.bing.com',
+    'snap.licdn.com',
+    'ads.linkedin.com',
+    'analytics.tiktok.com',
+    'ct.pinterest.com',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'adsrvr.org',
+    'criteo.com',
+    'criteo.net',
+    'taboola.com',
+    'outbrain.com',
+    'nr-data.net',
+    'js-agent.newrelic.com',
+    'cdn.segment.com',
+    'api.segment.io',
+    'cdn.cookielaw.org',
+    'geolocation.onetrust.com',
+]
+
+# Regras por site, indexadas pelo domínio (também vale para subdomínios). Exemplo:
+# {"purina.es": {"allow_types": ["font"], "allow_hosts": ["cdn.purina.es"], "block_hosts": ["chat.example.com"]}}
+# Podem ser carregadas de um arquivo JSON indicado em REQUEST_BLOCKING_PROFILES.
+SITE_PROFILES = {}
+
+_profiles_path = os.environ.get('REQUEST_BLOCKING_PROFILES')
+if _profiles_path and os.path.exists(_profiles_path):
+    with open(_profiles_path, encoding='utf-8') as f:
+        SITE_PROFILES.update(json.load(f))
+
+
+def _host_matches(host, path, patterns):
+    """
+    Verifica se o host (e opcionalmente o caminho) corresponde a algum dos padrões.
+    Padrões são domínios ("hotjar.com", vale para subdomínios) ou domínio + caminho ("facebook.com/tr").
+    """
+    for pattern in patterns:
+        domain, _, prefix = pattern.partition('/')
+        if host != domain and not host.endswith('.' + domain):
+            continue
+        if not prefix or path.startswith('/' + prefix):
+            return True
+    return False
+
+
+def profile_for(url):
+    """
+    Monta o perfil de bloqueio para a página `url`, combinando os padrões globais
+    com as regras de SITE_PROFILES do domínio correspondente.
+    """
+    host = (urlparse(url).hostname or '').lower()
+    block_types = set(BLOCKED_RESOURCE_TYPES)
+    block_hosts = list(TRACKER_HOSTS)
+    deny_hosts = []
+    allow_hosts = []
+
+    for domain, rules in SITE_PROFILES.items():
+        if not _host_matches(host, '', [domain.lower()]):
+            continue
+        block_types |= set(rules.get('block_types', []))
+        block_types -= set(rules.get('allow_types', []))
+        deny_hosts.extend(rules.get('block_hosts', []))
+        allow_hosts.extend(rules.get('allow_hosts', []))
+
+    return {
+        'enabled': REQUEST_BLOCKING,
+        'block_types': block_types,
+        'block_hosts': block_hosts,
+        'deny_hosts': deny_hosts,
+        'allow_hosts': allow_hosts
+    }
+
+
+def block_reason(profile, resource_type, request_url):
+    """
+    Retorna o motivo do bloqueio ('image', 'tracker', 'denied', ...) ou None se a
+    requisição deve seguir normalmente.
+    """
+    if not profile['enabled'] or resource_type == 'document':
+        return None
+    parsed = urlparse(request_url)
+    if parsed.scheme not in ('http', 'https'):
+        return None
+    host = (parsed.hostname or '').lower()
+    if _host_matches(host, parsed.path, profile['allow_hosts']):
+        return None
+    if _host_matches(host, parsed.path, profile['deny_hosts']):
+        return 'denied'
+    if resource_type in profile['block_types']:
+        return resource_type
+    if _host_matches(host, parsed.path, profile['block_hosts']):
+        return 'tracker'
+    return None
+
+
+def _count(stats, reason):
+    if reason is None:
+        stats['allowed_requests'] = stats.get('allowed_requests', 0) + 1
+        return
+    stats['blocked_requests'] = stats.get('blocked_requests', 0) + 1
+    by_type = stats.setdefault('blocked_by_type', {})
+    by_type[reason] = by_type.get(reason, 0) + 1
+
+
+def install_request_blocking(page, url, stats):
+    """
+    Registra o bloqueio de requisições em uma página da API síncrona do Playwright.
+    Os contadores de requisições bloqueadas/permitidas são acumulados em `stats`.
+    """
+    profile = profile_for(url)
+    stats.setdefault('blocked_requests', 0)
+    stats.setdefault('allowed_requests', 0)
+    if not profile['enabled']:
+        return
+
+    def _handle(route):
+        reason = block_reason(profile, route.request.resource_type, route.request.url)
+        _count(stats, reason)
+        if reason:
+            route.abort()
+        else:
+            route.continue_()
+
+    page.route('**/*', _handle)
+
+
+async def install_request_blocking_async(page, url, stats):
+    """
+    Versão de install_request_blocking para a API assíncrona do Playwright.
+    """
+    profile = profile_for(url)
+    stats.setdefault('blocked_requests', 0)
+    stats.setdefault('allowed_requests', 0)
+    if not profile['enabled']:
+        return
+
+    async def _handle(route):
+        reason = block_reason(profile, route.request.resource_type, route.request.url)
+        _count(stats, reason)
+        if reason:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await page.route('**/*', _handle)
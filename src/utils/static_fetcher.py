@@ -0,0 +1,88 @@
+import os
+import re
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# Busca da página via HTTP simples antes de recorrer ao navegador.
+# Desative com STATIC_FETCH=0.
+STATIC_FETCH = os.environ.get('STATIC_FETCH', '1') != '0'
+STATIC_FETCH_TIMEOUT = int(os.environ.get('STATIC_FETCH_TIMEOUT', 15))
+STATIC_MIN_TEXT_CHARS = int(os.environ.get('STATIC_MIN_TEXT_CHARS', 500))
+
+HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+        '(KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+    ),
+    'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'es-ES,es;q=0.9,pt-BR;q=0.8,en;q=0.7',
+}
+
+# Sinais de que o HTML entregue pelo servidor é só a casca de uma aplicação JavaScript
+JS_APP_MARKERS = [
+    ('empty_app_root', re.compile(r'<div[^>]+id=["\'](?:root|app|__next|__nuxt)["\'][^>]*>\s*</div>', re.I)),
+    ('noscript_warning', re.compile(r'<noscript>[^<]*(?:enable|habilit|activ)\w*\s+(?:o\s+|el\s+)?javascript', re.I)),
+    ('angular_app', re.compile(r'<[^>]+\sng-app[\s=>]', re.I)),
+]
+
+_local = threading.local()
+
+
+def _session():
+    """
+    Sessão HTTP por thread, com pool de conexões keep-alive reaproveitado entre chamadas.
+    """
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=1)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _local.session = session
+    return session
+
+
+def fetch_static(url, timeout=STATIC_FETCH_TIMEOUT):
+    """
+    Baixa o HTML da página sem executar JavaScript.
+    Retorna (html, headers). Lança requests.RequestException em caso de erro
+    ou se a resposta não for HTML.
+    """
+    response = _session().get(url, timeout=timeout)
+    response.raise_for_status()
+    content_type = response.headers.get('Content-Type', '')
+    if 'html' not in content_type.lower():
+        raise requests.RequestException(f"Conteúdo não é HTML: {content_type}")
+    if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+        # requests assume ISO-8859-1 quando o servidor não informa o charset
+        response.encoding = response.apparent_encoding
+    return response.text, dict(response.headers)
+
+
+def js_app_marker(html):
+    """
+    Retorna o nome do primeiro marcador de aplicação JavaScript encontrado no HTML ou None.
+    """
+    for name, pattern in JS_APP_MARKERS:
+        if pattern.search(html):
+            return name
+    return None
+
+
+def escalation_reason(html, main_text):
+    """
+    Decide se o HTML estático está incompleto e a página precisa do navegador.
+    `main_text` é o texto do container principal extraído desse HTML.
+    Retorna o motivo (para calibrar a heurística) ou None se o HTML estático basta.
+    """
+    marker = js_app_marker(html)
+    if marker:
+        return marker
+    if len(main_text) < STATIC_MIN_TEXT_CHARS:
+        return 'short_main_text'
+    # Páginas de raça com acordeão, mas sem a tabela no HTML, carregam a tabela via JS
+    if 'accordion--text-v2' in html and 'breed-table' not in html:
+        return 'missing_breed_table'
+    return None
@@ -1,4 +1,5 @@
 import re
+import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
@@ -26,7 +27,8 @@ def safe_best_match(query, candidates):
     Evita erro "empty vocabulary" quando nenhum texto útil é encontrado.
     """
     query = clean_text(query.lower())
-    candidates_clean = [clean_text(c.lower()) for c in candidates if clean_text(c)]
+    candidates = [c for c in candidates if clean_text(c)]
+    candidates_clean = [clean_text(c.lower()) for c in candidates]
     if not query or not candidates_clean:
         return "", 0.0
 
@@ -40,92 +42,201 @@ def safe_best_match(query, candidates):
     except ValueError:
         return "", 0.0
 
-def compare_texts(docx_list, html_list, metadata, alt_tags):
+def fit_vectorizer(corpus):
+    """
+    Ajusta um único TfidfVectorizer para todos os textos de uma comparação.
+    Retorna None quando não sobra vocabulário (textos vazios ou só stop words).
+    """
+    corpus = [c for c in corpus if c]
+    if not corpus:
+        return None
+    try:
+        return TfidfVectorizer(stop_words='english').fit(corpus)
+    except ValueError:
+        return None
+
+def similarity_matrix(queries, candidates, vectorizer):
+    """
+    Matriz esparsa consultas × candidatos com a similaridade de cosseno.
+    Os vetores TF-IDF já saem normalizados (norma L2), então o cosseno é o produto escalar.
+    """
+    return (vectorizer.transform(queries) @ vectorizer.transform(candidates).T).tocsr()
+
+def best_matches(queries, candidates, vectorizer):
+    """
+    Versão em lote de safe_best_match: limpa e vetoriza os candidatos uma vez,
+    transforma todas as consultas juntas e calcula a matriz de similaridade em uma
+    única multiplicação. Retorna uma lista de (best_text, similarity) por consulta.
+    """
+    clean_queries = [clean_text(q.lower()) for q in queries]
+    kept = [c for c in candidates if clean_text(c)]
+    if vectorizer is None or not kept or not any(clean_queries):
+        return [("", 0.0)] * len(queries)
+
+    sims = similarity_matrix(clean_queries, [clean_text(c.lower()) for c in kept], vectorizer)
+    best_idx = np.asarray(sims.argmax(axis=1)).ravel()
+    best_sim = sims.max(axis=1).toarray().ravel()
+    return [
+        (kept[best_idx[i]], float(best_sim[i])) if clean_queries[i] else ("", 0.0)
+        for i in range(len(queries))
+    ]
+
+def exact_index(candidates):
+    """
+    Mapa texto normalizado (mesma limpeza de safe_best_match) -> primeiro candidato com esse texto.
+    """
+    index = {}
+    for c in candidates:
+        key = clean_text(c.lower()) if isinstance(c, str) else ""
+        if key and key not in index:
+            index[key] = c
+    return index
+
+def match_status(score):
+    if score >= 0.85:
+        return "Exact"
+    elif score >= 0.75:
+        return "Similar"
+    elif score >= 0.4:
+        return "Partial"
+    return "Missing"
+
+def compare_texts(docx_list, html_list, metadata, alt_tags, stats=None):
     """
     Compara textos do documento DOCX com conteúdo HTML e metadados.
+    Parágrafos que aparecem na página com o mesmo texto normalizado são resolvidos
+    por um mapa de hashes, sem vetorização, desde que não tenham nenhum termo em comum com os
+    metadados (nesse caso, como antes, a comparação com os metadados vem primeiro). O restante é vetorizado uma única vez e cada
+    grupo de consultas (alt tags, metadados, blocos HTML) é resolvido com uma multiplicação de matrizes.
+    O IDF é calculado sobre todos os textos da comparação, e não mais por consulta: as notas mudam
+    um pouco em relação à comparação texto a texto, e em empates ou quase-empates o bloco escolhido
+    também pode mudar.
+    Se `stats` for um dicionário, recebe quantas linhas cada etapa resolveu.
     """
-    results = []
+    ignore_prefixes = [
+        "in dit artikel", "title tag:", "meta description:", "og title:", "og description:",
+        "[alt text da imagem]", "alt tag :", "title tag", "meta description",
+        "open graph title", "open graph description", "-- meta --", "en:", "be-fr:",
+        "guide des races de chiens", "alt-tag:", "-- meta –", "title tag"
+    ]
+    counters = {'exact_hash': 0, 'metadata_exact': 0, 'fuzzy': 0}
+    alt_index = exact_index(alt_tags)
+    html_index = exact_index(html_list or [])
+    # Termos dos metadados: um parágrafo sem nenhum deles tem similaridade 0 com todos os metadados
+    analyzer = TfidfVectorizer(stop_words='english').build_analyzer()
+    meta_terms = set()
+    for v in metadata.values():
+        if v.strip():
+            meta_terms.update(analyzer(clean_text(v.lower())))
 
+    # 1) Classifica os parágrafos, mantendo a ordem do documento.
+    #    Correspondências exatas já viram resultado; o resto fica para a etapa aproximada.
+    alt_queries = []
+    text_queries = []
+    order = []
     for doc_text in docx_list:
         if not doc_text.strip():
             continue
         clean_doc = clean_text(doc_text.strip().lower())
-        ignore_prefixes = [
-            "in dit artikel", "title tag:", "meta description:", "og title:", "og description:",
-            "[alt text da imagem]", "alt tag :", "title tag", "meta description",
-            "open graph title", "open graph description", "-- meta --", "en:", "be-fr:",
-            "guide des races de chiens", "alt-tag:", "-- meta –", "title tag"
-        ]
         if any(clean_doc.startswith(p) for p in ignore_prefixes):
             continue
         # "alt-tag" block
         if clean_doc.startswith("alt-tag"):
             original_alt = doc_text.split(":", 1)[1].strip()
-            match_text, score = safe_best_match(original_alt, alt_tags)
-            if score >= 0.85:
-                status = "Exact"
-            elif score >= 0.75:
-                status = "Similar"
-            elif score >= 0.4:
-                status = "Partial"
+            exact = alt_index.get(clean_text(original_alt.lower()))
+            if exact is not None:
+                counters['exact_hash'] += 1
+                order.append(('exact', (original_alt, exact)))
             else:
-                status = "Missing"
+                order.append(('alt', len(alt_queries)))
+                alt_queries.append(original_alt)
+            continue
+        # Os metadados têm prioridade sobre os blocos da página: a correspondência exata com um
+        # bloco só é usada direto quando o parágrafo não pode passar de 0.85 com nenhum metadado
+        if any(v and doc_text.strip() == v.strip() for v in metadata.values()):
+            counters['metadata_exact'] += 1
+        else:
+            exact = html_index.get(clean_doc)
+            if exact is not None and not meta_terms.intersection(analyzer(clean_doc)):
+                counters['exact_hash'] += 1
+                order.append(('exact', (doc_text, exact)))
+                continue
+        order.append(('text', len(text_queries)))
+        text_queries.append(doc_text)
+    counters['fuzzy'] = len(alt_queries) + len(text_queries) - counters['metadata_exact']
+
+    # 2) Vocabulário e IDF comuns aos textos que sobraram
+    meta_keys = [k for k, v in metadata.items() if v.strip()]
+    meta_values = [metadata[k] for k in meta_keys]
+    vectorizer = None
+    if alt_queries or text_queries:
+        vectorizer = fit_vectorizer(
+            [clean_text(t.lower()) for t in alt_queries + text_queries + list(html_list or []) + meta_values + list(alt_tags)]
+        )
+
+    alt_matches = best_matches(alt_queries, alt_tags, vectorizer)
+    html_matches = best_matches(text_queries, html_list, vectorizer) if html_list else [("", 0.0)] * len(text_queries)
+    meta_sims = None
+    if vectorizer is not None and meta_keys and text_queries:
+        meta_sims = similarity_matrix(
+            [clean_text(q.lower()) for q in text_queries],
+            [clean_text(v.lower()) for v in meta_values],
+            vectorizer
+        ).toarray()
+
+    # 3) Monta os resultados na ordem original
+    results = []
+    for kind, i in order:
+        if kind == 'exact':
+            doc_text, match_text = i
             results.append({
-                "Document Text": original_alt,
+                "Document Text": doc_text,
                 "Webpage Match": match_text,
-                "Status": status,
+                "Status": "Exact",
+                "Similarity": 100.0
+            })
+            continue
+        if kind == 'alt':
+            match_text, score = alt_matches[i]
+            results.append({
+                "Document Text": alt_queries[i],
+                "Webpage Match": match_text,
+                "Status": match_status(score),
                 "Similarity": round(score * 100, 1)
             })
             continue
+        doc_text = text_queries[i]
         # Check exact match in metadata
         meta_type = next((k for k, v in metadata.items() if v and doc_text.strip() == v.strip()), None)
         if not meta_type:
             best_meta = ""
             best_score = 0.0
-            for k, v in metadata.items():
-                if not v.strip():
-                    continue
-                _, sim = safe_best_match(doc_text, [v])
+            for j, k in enumerate(meta_keys):
+                sim = meta_sims[i, j] if meta_sims is not None else 0.0
                 if sim > best_score:
                     best_score = sim
                     best_meta = k
             if best_score > 0.85:
                 meta_type = best_meta
         if meta_type:
-            sim_meta = safe_best_match(doc_text, [metadata[meta_type]])[1]
-            if sim_meta >= 0.85:
-                status = "Exact"
-            elif sim_meta >= 0.75:
-                status = "Similar"
-            elif sim_meta >= 0.4:
-                status = "Partial"
-            else:
-                status = "Missing"
+            sim_meta = float(meta_sims[i, meta_keys.index(meta_type)]) if meta_sims is not None and meta_type in meta_keys else 0.0
             results.append({
                 "Document Text": doc_text,
                 "Webpage Match": metadata[meta_type],
-                "Status": status,
+                "Status": match_status(sim_meta),
                 "Similarity": round(sim_meta * 100, 1)
             })
             continue
         # Otherwise compare against HTML blocks
-        match_html, score_html = "", 0.0
-        if html_list:
-            match_html, score_html = safe_best_match(doc_text, html_list)
-        if score_html >= 0.85:
-            status = "Exact"
-        elif score_html >= 0.75:
-            status = "Similar"
-        elif score_html >= 0.4:
-            status = "Partial"
-        else:
-            status = "Missing"
+        match_html, score_html = html_matches[i]
         results.append({
             "Document Text": doc_text,
             "Webpage Match": match_html,
-            "Status": status,
+            "Status": match_status(score_html),
             "Similarity": round(score_html * 100, 1)
         })
+    if stats is not None:
+        stats.update(counters)
     return pd.DataFrame(results)
 
 def generate_summary(df):
@@ -0,0 +1,68 @@
+import os
+import uuid
+import shutil
+from tempfile import SpooledTemporaryFile
+from flask import Request
+from werkzeug.utils import secure_filename
+
+# Uploads ficam em memória até este tamanho; acima disso o buffer vai para um arquivo
+# temporário anônimo (apagado ao fechar), nunca para static/
+UPLOAD_SPOOL_MAX_BYTES = int(os.environ.get('UPLOAD_SPOOL_MAX_BYTES', 32 * 1024 * 1024))
+
+# Armazenamento dos artefatos persistidos (fora de static/, portanto não servido pelo Flask)
+ARTIFACTS_DIR = os.environ.get(
+    'ARTIFACTS_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'artifacts')
+)
+# Com 1, todo DOCX enviado é guardado em ARTIFACTS_DIR (por padrão só com keep_upload=1 no formulário)
+UPLOAD_PERSIST = os.environ.get('UPLOAD_PERSIST', '0') == '1'
+
+
+class SpooledUploadRequest(Request):
+    """
+    Request do Flask cujos arquivos enviados ficam em um buffer em memória
+    de até UPLOAD_SPOOL_MAX_BYTES, em vez do limite padrão de 500 KB do Werkzeug.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledTemporaryFile(max_size=UPLOAD_SPOOL_MAX_BYTES, mode='rb+')
+
+
+def read_upload(file_storage):
+    """
+    Lê o arquivo enviado direto do buffer da requisição, sem gravá-lo em disco.
+    Retorna {'filename', 'data'}; `data` (bytes) é aceito por extract_docx_text.
+    """
+    return {
+        'filename': secure_filename(file_storage.filename or '') or 'documento.docx',
+        'data': file_storage.read()
+    }
+
+
+def persist_upload(upload, keep=False):
+    """
+    Grava o upload em ARTIFACTS_DIR/uploads/<uuid>/ e retorna {'filename', 'path', 'keep'},
+    serializável em JSON (usado pelos jobs em segundo plano, que precisam sobreviver a um reinício).
+    Com keep=False o arquivo é apagado por discard_upload assim que a comparação termina.
+    """
+    directory = os.path.join(ARTIFACTS_DIR, 'uploads', uuid.uuid4().hex)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, upload['filename'])
+    with open(path, 'wb') as f:
+        f.write(upload['data'])
+    return {'filename': upload['filename'], 'path': path, 'keep': keep}
+
+
+def upload_source(upload):
+    """
+    Conteúdo (bytes) ou caminho do DOCX, no formato aceito por extract_docx_text.
+    """
+    return upload['data'] if 'data' in upload else upload['path']
+
+
+def discard_upload(upload):
+    """
+    Apaga um upload persistido só para a execução do job; uploads mantidos de propósito ficam.
+    """
+    if 'path' in upload and not upload.get('keep'):
+        shutil.rmtree(os.path.dirname(upload['path']), ignore_errors=True)
@@ -1,6 +1,15 @@
+import os
 import re
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
+from src.utils.browser_pool import get_browser_pool
+from src.utils.request_blocking import install_request_blocking, install_request_blocking_async, REQUEST_BLOCKING
+from src.utils.page_cache import get_page_cache, cache_validators
+from src.utils.static_fetcher import fetch_static, escalation_reason, STATIC_FETCH, STATIC_MIN_TEXT_CHARS
+from src.utils.async_scraper import scrape_many, SCRAPE_CONCURRENCY, SCRAPE_URL_TIMEOUT
+from src.utils.dom_walker import HAS_LXML, Exclusion, index_html, element_text, element_to_html, element_from_html
 
 def clean_text(text):
     """
@@ -67,45 +76,273 @@ def collect_html_elements(main):
     # Ignore <a> tags to avoid collecting anchors
     return elements
 
-def load_url_text(url):
+# Orçamento máximo para a página "assentar" e janela sem atividade que a considera estável
+SETTLE_BUDGET_MS = int(os.environ.get('SETTLE_BUDGET_MS', 8000))
+SETTLE_QUIET_MS = int(os.environ.get('SETTLE_QUIET_MS', 300))
+
+# Executado dentro da página em uma única chamada:
+# - observa mutações do DOM e novos recursos de rede para detectar quando a página parou de mudar
+# - rola até o final enquanto a altura da página continuar crescendo
+# - expande todos os acordeões de uma vez
+SETTLE_SCRIPT = """
+async ({budget, quiet, accordionSelector}) => {
+    const start = performance.now();
+    const deadline = start + budget;
+    let lastActivity = start;
+    const touch = () => { lastActivity = performance.now(); };
+    const sleep = ms => new Promise(resolve => setTimeout(resolve, ms));
+    const frame = () => new Promise(resolve => requestAnimationFrame(() => resolve()));
+
+    const mutations = new MutationObserver(touch);
+    mutations.observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+    let resources = null;
+    try {
+        resources = new PerformanceObserver(touch);
+        resources.observe({type: 'resource', buffered: false});
+    } catch (e) {
+        resources = null;
+    }
+
+    const settle = async () => {
+        while (performance.now() < deadline) {
+            if (performance.now() - lastActivity >= quiet) {
+                return true;
+            }
+            await sleep(50);
+        }
+        return false;
+    };
+
+    let scrolls = 0;
+    let height = -1;
+    while (performance.now() < deadline && document.body.scrollHeight !== height) {
+        height = document.body.scrollHeight;
+        // Passa pelo meio da página para disparar lazy-loading baseado em IntersectionObserver
+        for (const fraction of [1 / 3, 1 / 2, 1]) {
+            window.scrollTo(0, height * fraction);
+            await frame();
+        }
+        scrolls++;
+        touch();
+        await settle();
+    }
+
+    const accordions = Array.from(document.querySelectorAll(accordionSelector));
+    for (const accordion of accordions) {
+        try {
+            accordion.click();
+        } catch (e) {}
+    }
+    let settled = true;
+    if (accordions.length) {
+        touch();
+        settled = await settle();
+    }
+
+    mutations.disconnect();
+    if (resources) {
+        resources.disconnect();
+    }
+    return {
+        settle_ms: Math.round(performance.now() - start),
+        scrolls: scrolls,
+        accordions: accordions.length,
+        settled: settled && performance.now() < deadline
+    };
+}
+"""
+
+# Versão da extração (parse_page_html e dados gravados), parte da chave do cache de páginas:
+# incrementar ao mudar o que é extraído, para não reaproveitar páginas da versão anterior
+EXTRACT_VERSION = 1
+
+def _settle_args():
+    return {
+        'budget': SETTLE_BUDGET_MS,
+        'quiet': SETTLE_QUIET_MS,
+        'accordionSelector': 'a.accordion--text-v2'
+    }
+
+def _cache_settings():
+    """
+    Configurações que influenciam o resultado da renderização e fazem parte da chave do cache.
+    """
+    return {
+        'scraper': 'web_scraper',
+        'extract_version': EXTRACT_VERSION,
+        'settle_budget_ms': SETTLE_BUDGET_MS,
+        'settle_quiet_ms': SETTLE_QUIET_MS,
+        'request_blocking': REQUEST_BLOCKING,
+        'static_fetch': STATIC_FETCH,
+        'static_min_text_chars': STATIC_MIN_TEXT_CHARS
+    }
+
+def _cached_page(url, stats):
+    """
+    Busca a página no cache em disco. Retorna a mesma tupla de load_url_text ou None.
+    """
+    entry = get_page_cache().get(url, _cache_settings())
+    if entry is None:
+        return None
+    data = entry['data']
+    if stats is not None:
+        stats.update(data['render_stats'])
+        stats['cache'] = entry['cache_status']
+    main = element_from_html(data['main_html']) if HAS_LXML else BeautifulSoup(data['main_html'], 'html.parser').find()
+    return data['texts'], main, data['metadata'], data['alt_tags'], data['title'], data['elements']
+
+def _store_page(url, html, page, render_stats, validators, use_cache, stats):
+    """
+    Grava a página processada no cache e preenche `stats`.
+    """
+    texts, main, metadata, alt_tags, title, elements = page
+    get_page_cache().put(url, _cache_settings(), {
+        'html': html,
+        'texts': texts,
+        'main_html': element_to_html(main),
+        'metadata': metadata,
+        'alt_tags': alt_tags,
+        'title': title,
+        'elements': elements,
+        'render_stats': render_stats
+    }, validators)
+    if stats is not None:
+        stats.update(render_stats)
+        stats['cache'] = 'miss' if use_cache else 'bypass'
+    return page
+
+def _try_static(url):
+    """
+    Primeira camada: GET simples + extração com parse_page_html.
+    Retorna (html, page, render_stats, validators); page é None quando é preciso escalar para o navegador.
+    """
+    if not STATIC_FETCH:
+        return None, None, {'tier': 'browser'}, None
+    started = time.time()
+    try:
+        html, headers = fetch_static(url)
+        page = parse_page_html(html)
+        reason = escalation_reason(html, element_text(page[1]) if page[1] is not None else '')
+    except requests.RequestException as e:
+        return None, None, {'tier': 'browser', 'escalation_reason': f"http_error: {e}"}, None
+    except Exception as e:
+        return None, None, {'tier': 'browser', 'escalation_reason': f"parse_error: {e}"}, None
+    static_ms = round((time.time() - started) * 1000, 1)
+    if reason:
+        return None, None, {'tier': 'browser', 'escalation_reason': reason, 'static_ms': static_ms}, None
+    return html, page, {'tier': 'static', 'static_ms': static_ms}, cache_validators(headers)
+
+def load_url_text(url, stats=None, use_cache=True):
     """
     Carrega e processa o texto de uma URL.
-    - Renderiza JS via Playwright, espera por network idle
-    - Rola até o final para carregar conteúdo dinâmico
+    - Reaproveita o resultado do cache em disco quando disponível (use_cache=False força nova renderização)
+    - Tenta primeiro o HTML estático (GET simples); só usa o navegador se o conteúdo parecer incompleto
+    - Renderiza JS via Playwright (navegador compartilhado do pool), sem baixar imagens, fontes e trackers
+    - Rola até o final e abre os acordeões, esperando apenas até o DOM e a rede estabilizarem
     - Extrai título do acordeão "Puntuación Veterinaria" via <a class="accordion--text-v2">
     - Extrai tabela dentro de div específica
     - Coleta todos os blocos de texto úteis, ignorando "Previous Next"
+
+    Se `stats` for um dicionário, ele recebe as métricas da renderização
+    (ex.: cache, tier, escalation_reason, settle_ms, blocked_requests, blocked_by_type).
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-        page.goto(url, timeout=60000)
+    if use_cache:
+        page = _cached_page(url, stats)
+        if page is not None:
+            return page
+
+    html, page, tier_stats, validators = _try_static(url)
+    if page is not None:
+        return _store_page(url, html, page, tier_stats, validators, use_cache, stats)
+
+    def _render(context):
+        render_stats = dict(tier_stats)
+        page = context.new_page()
+        # Imagens, fontes, mídia e trackers não são baixados (ver request_blocking)
+        install_request_blocking(page, url, render_stats)
+        response = page.goto(url, timeout=60000)
         page.wait_for_load_state("networkidle")
-        
-        # Rolar a página várias vezes para garantir carregamento de conteúdo dinâmico
-        for _ in range(3):
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight/3)")
-            page.wait_for_timeout(500)
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight/2)")
-            page.wait_for_timeout(500)
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            page.wait_for_timeout(1000)
-        
-        # Tentar clicar em elementos de acordeão que possam conter a tabela
-        try:
-            accordions = page.query_selector_all("a.accordion--text-v2")
-            for accordion in accordions:
-                try:
-                    accordion.click()
-                    page.wait_for_timeout(500)
-                except:
-                    pass
-        except:
-            pass
-        
-        html = page.content()
-        browser.close()
+        render_stats.update(page.evaluate(SETTLE_SCRIPT, _settle_args()))
+        return page.content(), render_stats, cache_validators(response.headers if response else None)
+
+    # O navegador fica aberto no pool do worker; cada chamada recebe um contexto isolado
+    html, render_stats, validators = get_browser_pool().run(_render)
+    return _store_page(url, html, parse_page_html(html), render_stats, validators, use_cache, stats)
+
+async def _render_async(context, url):
+    """
+    Versão assíncrona da renderização de load_url_text, usada no processamento em lote.
+    """
+    render_stats = {}
+    page = await context.new_page()
+    await install_request_blocking_async(page, url, render_stats)
+    response = await page.goto(url, timeout=60000)
+    await page.wait_for_load_state("networkidle")
+    render_stats.update(await page.evaluate(SETTLE_SCRIPT, _settle_args()))
+    return await page.content(), render_stats, cache_validators(response.headers if response else None)
+
+def load_urls_text(urls, concurrency=SCRAPE_CONCURRENCY, timeout=SCRAPE_URL_TIMEOUT, stats=None, use_cache=True):
+    """
+    Carrega várias URLs em paralelo e processa cada uma como load_url_text.
+    Apenas as URLs ausentes do cache são buscadas; o navegador só é usado
+    para as que não puderam ser resolvidas pelo HTML estático.
+    Retorna uma lista na ordem de `urls`; URLs que falharam vêm como Exception.
+    Se `stats` for uma lista, recebe um dicionário de métricas por URL.
+    """
+    results = [None] * len(urls)
+    url_stats = [{} for _ in urls]
+    if use_cache:
+        for i, url in enumerate(urls):
+            results[i] = _cached_page(url, url_stats[i])
+
+    pending = [i for i, page in enumerate(results) if page is None]
+    tier_stats = {}
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        static_results = list(executor.map(_try_static, [urls[i] for i in pending]))
+    for i, (html, page, page_stats, validators) in zip(pending, static_results):
+        tier_stats[i] = page_stats
+        if page is not None:
+            results[i] = _store_page(urls[i], html, page, page_stats, validators, use_cache, url_stats[i])
+
+    pending = [i for i in pending if results[i] is None]
+    rendered = scrape_many([urls[i] for i in pending], _render_async, concurrency=concurrency, timeout=timeout)
+    for i, page in zip(pending, rendered):
+        if isinstance(page, Exception):
+            results[i] = page
+            url_stats[i].update(tier_stats[i])
+            continue
+        html, render_stats, validators = page
+        render_stats.update(tier_stats[i])
+        results[i] = _store_page(urls[i], html, parse_page_html(html), render_stats, validators, use_cache, url_stats[i])
+
+    if stats is not None:
+        stats.extend(url_stats)
+    return results
+
+# Chaves das avaliações veterinárias procuradas nos textos extraídos
+VET_RATING_KEYS = ["Perro familiar", "Necesidad de ejercicio", "Fácil de adiestrar",
+                   "Tolera quedarse solo", "Le gustan otras mascotas",
+                   "Nivel de energía", "Necesidades de aseo", "Muda"]
+
+def parse_page_html(html):
+    """
+    Extrai textos, metadados, alt tags, título e elementos do HTML renderizado.
+    Usa uma única travessia com lxml quando disponível; senão, o BeautifulSoup com html.parser.
+    Retorna (texts, main, metadata, alt_tags, title, elements). `main` é o container principal:
+    um elemento lxml.html com lxml, uma Tag do BeautifulSoup sem ele. Para ler ou serializar,
+    use dom_walker.element_text e dom_walker.element_to_html, que aceitam os dois.
+    """
+    if HAS_LXML:
+        parsed = _parse_with_lxml(html)
+    else:
+        parsed = _parse_with_soup(html)
+    return _add_vet_ratings(*parsed)
 
+def _parse_with_soup(html):
+    """
+    Extração com BeautifulSoup (html.parser), uma busca na árvore por tipo de dado.
+    Retorna (texts, main, metadata, alt_tags, title, elements, fallback_rows).
+    """
     soup = BeautifulSoup(html, 'html.parser')
     texts = []
     
@@ -191,31 +428,152 @@ def load_url_text(url):
     # Coleta elementos HTML para a terceira aba
     elements = collect_html_elements(main)
     
-    # Adiciona elementos específicos da tabela de avaliação veterinária
+    def fallback_rows():
+        # Linhas das tabelas de avaliação que sobraram depois da limpeza do main
+        for table in vet_tables:
+            for row in table.find_all("tr"):
+                cells = row.find_all("td")
+                if len(cells) >= 2:
+                    yield cells[0].get_text(" ", strip=True), cells[1].get_text(" ", strip=True)
+    
+    return texts, main, metadata, alt_tags, title, elements, fallback_rows
+
+def _parse_with_lxml(html):
+    """
+    Mesma extração de _parse_with_soup, mas com uma única travessia da árvore lxml
+    (dom_walker.PageIndex). Textos, elementos, alt tags, metadados e linhas da tabela
+    de avaliação saem dos intervalos registrados na travessia, sem novas buscas.
+    Retorna (texts, main, metadata, alt_tags, title, elements, fallback_rows).
+    """
+    index = index_html(html)
+    texts = []
+    
+    # 1) Títulos dos acordeões
+    for a_tag in index.find_all("a"):
+        if 'accordion--text-v2' in a_tag.classes():
+            raw = clean_text(index.text(a_tag))
+            if raw:
+                texts.append(raw)
+    
+    # 2) Tabela de avaliação veterinária, com as mesmas três estratégias
+    vet_tables = [table for table in index.find_all("table")
+                  if any('breed' in cls.lower() for cls in table.classes())]
+    
+    if not vet_tables:
+        for div in index.find_all("div"):
+            class_attr = div.get('class', '')
+            if 'text-image' in class_attr or 'clearfix' in class_attr or 'field' in class_attr:
+                vet_tables.extend(index.find_all("table", within=div))
+    
+    if not vet_tables:
+        for table in index.find_all("table"):
+            rows = index.find_all("tr", within=table)
+            if len(rows) >= 3:
+                cells = index.find_all("td", within=rows[0])
+                if len(cells) == 2:
+                    first_cell = clean_text(index.text(cells[0]))
+                    second_cell = clean_text(index.text(cells[1]))
+                    if first_cell and second_cell and ('/' in second_cell or ':' in first_cell):
+                        vet_tables.append(table)
+    
+    for table in vet_tables:
+        for row in index.find_all("tr", within=table):
+            cells = index.find_all("td", within=row)
+            if len(cells) >= 2:
+                key = clean_text(index.text(cells[0]))
+                value = clean_text(index.text(cells[1]))
+                if key and value:
+                    texts.append(f"{key}: {value}")
+                    texts.append(key)
+    
+    # 3) Metadados, alt tags e container principal
+    title_node = index.first("title")
+    page_title = (title_node.element.text or '') if title_node is not None else ''
+    metadata = {
+        "Title Tag": page_title.strip(),
+        "Meta Description": _meta_content(index, "name", "description"),
+        "Open Graph Title": _meta_content(index, "property", "og:title"),
+        "Open Graph Description": _meta_content(index, "property", "og:description")
+    }
+    main = index.first("main")
+    if main is None or index.text_length(main) < 50:
+        main = index.first("body")
+    alt_tags = [img.get("alt").strip() for img in index.find_all("img", within=main) if img.get("alt")]
+    
+    # 4) Scripts, styles e noscript do main são ignorados (e removidos da árvore no final)
+    scripts = Exclusion(index.find_all('script', 'style', 'noscript', within=main))
+    
+    # 5) Blocos de texto do main
+    for tag in index.find_all('h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li', 'span', 'div', within=main):
+        if scripts.covers(tag):
+            continue
+        raw_text = index.text(tag, " ", scripts.ranges)
+        if "Previous Next" in raw_text or "Anterior Siguiente" in raw_text:
+            continue
+        txt = clean_text(raw_text)
+        if txt:
+            texts.append(txt)
+    
+    title = page_title.strip() if title_node is not None else "page"
+    
+    # Elementos da terceira aba, ignorando o primeiro footer do main (como collect_html_elements)
+    footers = [f for f in index.find_all('footer', within=main) if not scripts.covers(f)]
+    dropped = scripts + footers[:1]
+    elements = []
+    groups = [('Heading', [f'h{i}']) for i in range(1, 7)] + [('Bold', ['strong', 'b']), ('Italic', ['em', 'i'])]
+    for kind, tags in groups:
+        for tag in index.find_all(*tags, within=main):
+            if dropped.covers(tag):
+                continue
+            text = clean_text(index.text(tag, " ", dropped.ranges))
+            if text:
+                elements.append([kind, tags[0] if kind == 'Heading' else '', text, ''])
+    
+    def fallback_rows():
+        for table in vet_tables:
+            if dropped.covers(table):
+                continue
+            for row in index.find_all("tr", within=table):
+                if dropped.covers(row):
+                    continue
+                cells = [cell for cell in index.find_all("td", within=row) if not dropped.covers(cell)]
+                if len(cells) >= 2:
+                    yield index.text(cells[0], " ", dropped.ranges), index.text(cells[1], " ", dropped.ranges)
+    
+    rows = list(fallback_rows())
+    
+    # Aplica as remoções na árvore para que `main` fique igual ao do caminho com BeautifulSoup
+    for node in dropped.nodes:
+        node.element.drop_tree()
+    
+    return texts, main.element, metadata, alt_tags, title, elements, lambda: rows
+
+def _meta_content(index, attr, value):
+    for meta in index.find_all("meta"):
+        if meta.get(attr) == value:
+            return (meta.get('content') or '').strip()
+    return ""
+
+def _add_vet_ratings(texts, main, metadata, alt_tags, title, elements, fallback_rows):
+    """
+    Etapa final comum aos dois parsers: avaliações veterinárias encontradas nos textos,
+    nas linhas das tabelas ou, em último caso, os valores padrão.
+    """
     vet_ratings = []
     
     # Busca manual por textos que parecem ser avaliações veterinárias
-    vet_rating_texts = []
     for text in texts:
-        if any(key in text for key in ["Perro familiar", "Necesidad de ejercicio", "Fácil de adiestrar", 
-                                      "Tolera quedarse solo", "Le gustan otras mascotas", 
-                                      "Nivel de energía", "Necesidades de aseo", "Muda"]):
+        if any(key in text for key in VET_RATING_KEYS):
             if ":" in text and "/" in text:
-                vet_rating_texts.append(text)
-                key = text.split(":")[0].strip()
-                value = text.split(":")[1].strip()
                 vet_ratings.append(['Puntuación Veterinaria', 'rating', text, ''])
     
     # Se não encontrou nada, tenta extrair diretamente do HTML
     if not vet_ratings:
-        for table in vet_tables:
-            for row in table.find_all("tr"):
-                cells = row.find_all("td")
-                if len(cells) >= 2:
-                    key = clean_text(cells[0].get_text(" ", strip=True))
-                    value = clean_text(cells[1].get_text(" ", strip=True))
-                    if key and value:
-                        vet_ratings.append(['Puntuación Veterinaria', 'rating', f"{key}: {value}", ''])
+        for raw_key, raw_value in fallback_rows():
+            key = clean_text(raw_key)
+            value = clean_text(raw_value)
+            if key and value:
+                vet_ratings.append(['Puntuación Veterinaria', 'rating', f"{key}: {value}", ''])
     
     # Adiciona os elementos da tabela de avaliação à lista de elementos
     elements.extend(vet_ratings)
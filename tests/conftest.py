@@ -0,0 +1,21 @@
+import os
+import sys
+import tempfile
+
+# Permite rodar `pytest` a partir da raiz do repositório e importar o pacote `src`
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Caches, artefatos e bancos dos testes ficam em um diretório temporário, definidos antes de
+# qualquer import de src (os módulos leem as variáveis de ambiente ao serem importados)
+_TMP = tempfile.mkdtemp(prefix='comparador-tests-')
+os.environ.update({
+    'JOB_DB_PATH': os.path.join(_TMP, 'jobs.sqlite3'),
+    'PAGE_CACHE_DIR': os.path.join(_TMP, 'pages'),
+    'ARTIFACTS_DIR': os.path.join(_TMP, 'artifacts'),
+    'DOCX_CACHE_DIR': os.path.join(_TMP, 'docx'),
+    'MATCH_CACHE_DIR': os.path.join(_TMP, 'matches'),
+    'HISTORY_DATABASE_URL': 'sqlite:///' + os.path.join(_TMP, 'history.sqlite3'),
+    # Etapas de CPU na própria thread e nenhuma requisição HTTP real
+    'CPU_POOL_SIZE': '0',
+    'STATIC_FETCH': '0',
+})
@@ -0,0 +1,93 @@
+import threading
+import pytest
+from src.utils import async_scraper
+from src.utils.async_scraper import AsyncBrowser, scrape_many
+
+
+class _FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+
+    async def close(self):
+        self.browser.contexts -= 1
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.contexts = 0
+        self.closed = False
+
+    def is_connected(self):
+        return not self.closed
+
+    async def new_context(self):
+        self.contexts += 1
+        return _FakeContext(self)
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeChromium:
+    def __init__(self):
+        self.browsers = []
+
+    async def launch(self, **options):
+        self.browsers.append(_FakeBrowser())
+        return self.browsers[-1]
+
+
+class _FakePlaywright:
+    def __init__(self):
+        self.chromium = _FakeChromium()
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    playwright = _FakePlaywright()
+    monkeypatch.setattr(async_scraper, 'async_playwright', lambda: playwright)
+    browser = AsyncBrowser(max_pages=3, max_rss_mb=0)
+    monkeypatch.setattr(async_scraper, '_shared', browser)
+    yield browser, playwright.chromium
+    browser.shutdown()
+
+
+async def _handler(context, url):
+    if url.endswith('/erro'):
+        raise ValueError(url)
+    return url.upper()
+
+
+def test_batches_share_one_browser(shared):
+    browser, chromium = shared
+    assert scrape_many(['https://a/1', 'https://a/2'], _handler) == ['HTTPS://A/1', 'HTTPS://A/2']
+    assert scrape_many(['https://b/1'], _handler) == ['HTTPS://B/1']
+    assert len(chromium.browsers) == 1
+    assert browser.launches == 1
+
+
+def test_browser_is_recycled_after_max_pages(shared):
+    browser, chromium = shared
+    urls = [f'https://a/{i}' for i in range(7)]
+    assert scrape_many(urls, _handler, concurrency=1) == [url.upper() for url in urls]
+    assert len(chromium.browsers) == 3
+    # Os navegadores aposentados são fechados quando o último contexto sai
+    assert [b.closed for b in chromium.browsers] == [True, True, False]
+    assert all(b.contexts == 0 for b in chromium.browsers)
+
+
+def test_errors_and_stop_are_per_url(shared):
+    results = scrape_many(['https://a/erro', 'https://a/ok'], _handler)
+    assert isinstance(results[0], ValueError) and results[1] == 'HTTPS://A/OK'
+
+    stop = threading.Event()
+    stop.set()
+    delivered = []
+    scrape_many(['https://a/1', 'https://a/2'], _handler, on_result=lambda url, result: delivered.append(result), stop=stop)
+    assert len(delivered) == 2 and all(isinstance(r, InterruptedError) for r in delivered)
@@ -0,0 +1,87 @@
+import io
+import os
+import zipfile
+import pytest
+from openpyxl import load_workbook
+from src.main import app
+from src.utils.batch_export import iter_zip, sheet_title
+from src.utils.report_store import get_report_store, write_report_data
+
+BATCH_ID = 'batch_export_test'
+
+
+def _pair(docx_name, web_url, statuses):
+    return {
+        'docx_name': docx_name,
+        'web_url': web_url,
+        'rows': [[f'Parágrafo {i}', f'Bloco {i}', status, 1.0 if status == 'Exato' else None]
+                 for i, status in enumerate(statuses)],
+        'elements': [['Heading h1', 'h1', 'Labrador', '']],
+    }
+
+
+@pytest.fixture(scope='module')
+def client():
+    store = get_report_store()
+    # Pares 0 e 2 do lote (o par 1 falhou e não tem resultado guardado)
+    write_report_data(store.data_path(f'{BATCH_ID}_0'),
+                      _pair('labrador.docx', 'https://example.com/labrador', ['Exato', 'Exato', 'Não encontrado']))
+    write_report_data(store.data_path(f'{BATCH_ID}_2'),
+                      _pair('labrador.docx', 'https://example.com/labrador-2', ['Similar', 'Exato']))
+    return app.test_client()
+
+
+def test_zip_export_has_one_workbook_per_pair(client):
+    response = client.get(f'/export/{BATCH_ID}.zip')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/zip'
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert archive.namelist() == ['par_01.xlsx', 'par_03.xlsx']
+        workbook = load_workbook(io.BytesIO(archive.read('par_03.xlsx')), read_only=True)
+        assert workbook.sheetnames == ['Comparacao', 'Resumo', 'Elementos da Página']
+        rows = list(workbook['Comparacao'].iter_rows(values_only=True))
+        assert rows[0] == ('Document Text', 'Webpage Match', 'Status', 'Similarity')
+        assert [row[2] for row in rows[1:]] == ['Similar', 'Exato']
+
+
+def test_xlsx_export_has_summary_and_one_sheet_per_pair(client):
+    response = client.get(f'/export/{BATCH_ID}.xlsx')
+
+    assert response.status_code == 200
+    workbook = load_workbook(io.BytesIO(response.data), read_only=True)
+    # Uma aba por par, com o número do par (como na tela) antes do nome do documento
+    assert workbook.sheetnames == ['Resumo', '01 labrador', '03 labrador']
+    summary = list(workbook['Resumo'].iter_rows(values_only=True))
+    assert summary[0][:3] == ('Par', 'Documento', 'URL')
+    assert summary[1][:7] == (1, 'labrador.docx', 'https://example.com/labrador', 2, 0, 0, 1)
+    assert summary[2][:7] == (3, 'labrador.docx', 'https://example.com/labrador-2', 1, 1, 0, 0)
+    # Nenhum arquivo temporário fica para trás
+    assert not [name for name in os.listdir(get_report_store().directory) if name.endswith('.tmp.xlsx')]
+
+
+def test_unknown_batch_or_format_is_404(client):
+    assert client.get('/export/batch_inexistente.zip').status_code == 404
+    assert client.get(f'/export/{BATCH_ID}.csv').status_code == 404
+
+
+def test_iter_zip_streams_entries_in_order(tmp_path):
+    paths = []
+    for i, content in enumerate([b'a' * 200000, b'b' * 10]):
+        path = tmp_path / f'{i}.bin'
+        path.write_bytes(content)
+        paths.append(str(path))
+
+    chunks = list(iter_zip([('a.bin', paths[0]), ('b.bin', paths[1])], chunk_size=4096))
+    assert len(chunks) > 2
+    with zipfile.ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+        assert archive.read('a.bin') == b'a' * 200000
+        assert archive.read('b.bin') == b'b' * 10
+
+
+def test_sheet_title_is_valid_and_unique():
+    used = set()
+    assert sheet_title('01 a/b:c', used) == '01 a_b_c'
+    long_name = 'x' * 40
+    assert sheet_title(long_name, used) == 'x' * 31
+    assert sheet_title(long_name, used) == 'x' * 27 + ' (2)'
@@ -0,0 +1,79 @@
+import io
+import os
+import json
+import pytest
+import src.main as main
+
+DOCX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'src', 'static', 'uploads', 'test_docx.docx')
+
+PAGE = (
+    ['Labrador Retriever', 'O labrador é um cão amigável e ativo.'],
+    'Labrador Retriever\nO labrador é um cão amigável e ativo.',
+    {'description': 'Guia do labrador'},
+    {},
+    'Labrador',
+    [['Heading h1', 'h1', 'Labrador Retriever', '']]
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def fake_iter_urls_text(urls, use_cache=True, stop=None):
+        # A segunda URL termina antes da primeira; a terceira falha
+        yield 1, PAGE, {'tier': 'static'}
+        yield 0, PAGE, {'tier': 'browser'}
+        yield 2, TimeoutError('Tempo limite excedido'), {}
+
+    monkeypatch.setattr(main, 'iter_urls_text', fake_iter_urls_text)
+    return main.app.test_client()
+
+
+def _docx():
+    with open(DOCX_PATH, 'rb') as f:
+        return io.BytesIO(f.read())
+
+
+def test_stream_sends_one_json_line_per_pair_then_done(client):
+    data = {'pair_count': '3', 'stream': '1'}
+    for i in range(3):
+        data[f'docx_file_{i}'] = (_docx(), f'briefing_{i}.docx')
+        data[f'web_url_{i}'] = f'https://example.com/{i}'
+    response = client.post('/batch_upload', data=data, content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    body = response.get_data(as_text=True)
+    # Cada linha é um JSON completo terminado em \n, sem linhas vazias
+    assert body.endswith('\n')
+    lines = [json.loads(line) for line in body.split('\n')[:-1]]
+    assert len(lines) == 4
+
+    # Os pares chegam na ordem em que ficam prontos, cada um com o índice original
+    by_index = {line['index']: line for line in lines[:3]}
+    assert sorted(by_index) == [0, 1, 2]
+    assert by_index[1]['title'] == 'briefing_1.docx e https://example.com/1'
+    assert by_index[1]['render_stats']['tier'] == 'static'
+    assert by_index[0]['render_stats']['tier'] == 'browser'
+    assert by_index[0]['comparison']
+    assert by_index[2]['error'] == 'Tempo limite excedido'
+    done = lines[3]
+    assert done['done'] is True
+    assert done['count'] == 3
+    assert done['export_urls'] == {'zip': f"/export/{done['batch_id']}.zip",
+                                   'xlsx': f"/export/{done['batch_id']}.xlsx"}
+
+
+def test_stream_reports_batch_failure_as_last_line(client, monkeypatch):
+    def failing_iter_urls_text(urls, use_cache=True, stop=None):
+        raise RuntimeError('navegador indisponível')
+        yield
+
+    monkeypatch.setattr(main, 'iter_urls_text', failing_iter_urls_text)
+    data = {'pair_count': '1', 'stream': '1', 'docx_file_0': (_docx(), 'briefing.docx'),
+            'web_url_0': 'https://example.com/'}
+    response = client.post('/batch_upload', data=data, content_type='multipart/form-data')
+
+    lines = response.get_data(as_text=True).split('\n')
+    assert lines[-1] == ''
+    assert [json.loads(line) for line in lines[:-1]] == [{'error': 'navegador indisponível'}]
@@ -0,0 +1,75 @@
+import time
+import pytest
+from src.utils import browser_pool
+from src.utils.browser_pool import BrowserPool
+
+
+class _FailingStart:
+    def start(self):
+        raise RuntimeError('playwright indisponível')
+
+
+class _FakeChromium:
+    def launch(self, **options):
+        raise RuntimeError('chromium não abriu')
+
+
+class _FakePlaywright:
+    chromium = _FakeChromium()
+
+    def stop(self):
+        pass
+
+
+class _FakeStart:
+    def start(self):
+        return _FakePlaywright()
+
+
+def _wait_dead(pool):
+    for slot in pool._slots:
+        slot.join(timeout=5)
+
+
+def test_startup_failure_fails_tasks_fast(monkeypatch):
+    monkeypatch.setattr(browser_pool, 'sync_playwright', lambda: _FailingStart())
+    pool = BrowserPool(size=2)
+    _wait_dead(pool)
+
+    started = time.time()
+    with pytest.raises(RuntimeError, match='playwright indisponível'):
+        pool.run(lambda context: None, timeout=30)
+    assert time.time() - started < 5
+
+    health = pool.health()
+    assert health['healthy'] is False
+    assert all(slot['startup_error'] == 'playwright indisponível' for slot in health['slots'])
+
+
+def test_queued_tasks_fail_when_every_slot_fails(monkeypatch):
+    starting = []
+
+    class _SlowFailingStart:
+        def start(self):
+            starting.append(1)
+            time.sleep(0.2)
+            raise RuntimeError('playwright indisponível')
+
+    monkeypatch.setattr(browser_pool, 'sync_playwright', lambda: _SlowFailingStart())
+    pool = BrowserPool(size=1)
+    future = pool.submit(lambda context: None)
+    with pytest.raises(RuntimeError):
+        future.result(timeout=5)
+
+
+def test_launch_failure_marks_slot_unhealthy(monkeypatch):
+    monkeypatch.setattr(browser_pool, 'sync_playwright', lambda: _FakeStart())
+    pool = BrowserPool(size=1)
+    with pytest.raises(RuntimeError, match='chromium não abriu'):
+        pool.run(lambda context: None, timeout=5)
+
+    health = pool.health()
+    assert health['healthy'] is False
+    assert health['slots'][0]['alive'] is True
+    assert health['slots'][0]['launch_error'] == 'chromium não abriu'
+    pool.shutdown()
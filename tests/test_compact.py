@@ -0,0 +1,89 @@
+import pytest
+from src.utils.compact import columnar, page_size, parse_cursor, COMPACT_MAX_PAGE_SIZE
+from src.utils.report_store import get_report_store, write_report_data
+
+ROWS = [
+    (f'Parágrafo {i}', f'Bloco {i}' if i % 3 else None, ('Exato', 'Similar', 'Não encontrado')[i % 3], 1.0 if i % 3 == 0 else 0.8)
+    for i in range(7)
+]
+ELEMENTS = [('Heading h1', 'h1', 'Labrador', ''), ('Link', 'a', 'Raças', '/racas'), ('Heading h1', 'h1', 'Outro', '')]
+
+
+def _decode(page):
+    # Reconstrói as tuplas a partir das colunas e dos dicionários
+    columns = [
+        [page['dictionaries'][column][code] for code in page['data'][column]] if column in page['dictionaries']
+        else page['data'][column]
+        for column in page['columns']
+    ]
+    return list(zip(*columns))
+
+
+def test_following_cursors_returns_every_row_once():
+    decoded = []
+    cursor = None
+    pages = 0
+    while True:
+        page = columnar('comparison', ROWS, parse_cursor(cursor), 3)
+        assert page['total'] == len(ROWS)
+        decoded.extend(_decode(page))
+        pages += 1
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert decoded == ROWS
+
+
+def test_status_codes_are_fixed_across_pages():
+    first = columnar('comparison', ROWS, 0, 3)
+    second = columnar('comparison', ROWS, 3, 3)
+    assert first['dictionaries']['status'] == second['dictionaries']['status'] == \
+        ['Exato', 'Similar', 'Parcial', 'Não encontrado']
+    assert first['data']['status'] == [0, 1, 3]
+
+
+def test_element_dictionaries_hold_only_values_of_the_page():
+    page = columnar('elements', ELEMENTS, 0, 2)
+    assert page['dictionaries'] == {'definition': ['Heading h1', 'Link'], 'tag': ['h1', 'a']}
+    assert page['data']['definition'] == [0, 1]
+    assert page['next_cursor'] == '2'
+    assert _decode(columnar('elements', ELEMENTS, 2, 2)) == [ELEMENTS[2]]
+
+
+def test_cursor_and_page_size_validation():
+    assert parse_cursor(None) == 0
+    assert parse_cursor('') == 0
+    assert parse_cursor('500') == 500
+    with pytest.raises(ValueError):
+        parse_cursor('-1')
+    with pytest.raises(ValueError):
+        parse_cursor('abc')
+    assert page_size('0') == 1
+    assert page_size(str(COMPACT_MAX_PAGE_SIZE * 2)) == COMPACT_MAX_PAGE_SIZE
+    # Cursor além do fim devolve uma página vazia e encerra a paginação
+    page = columnar('comparison', ROWS, 100, 3)
+    assert page['data']['doc_text'] == [] and page['next_cursor'] is None
+
+
+def test_results_route_pages_stored_comparison():
+    from src.main import app
+
+    report_id = 'comparison_compact_test'
+    store = get_report_store()
+    write_report_data(store.data_path(report_id), {
+        'docx_name': 'briefing.docx', 'web_url': 'https://example.com/',
+        'rows': [list(row) for row in ROWS], 'elements': [list(element) for element in ELEMENTS]
+    })
+    client = app.test_client()
+
+    first = client.get(f'/results/{report_id}/comparison?limit=4').get_json()
+    assert first['next_cursor'] == '4'
+    rest = client.get(f"/results/{report_id}/comparison?limit=4&cursor={first['next_cursor']}").get_json()
+    assert rest['next_cursor'] is None
+    assert _decode(first) + _decode(rest) == ROWS
+
+    assert client.get(f'/results/{report_id}/comparison?cursor=-5').status_code == 400
+    assert client.get(f'/results/{report_id}/outra').status_code == 404
+    assert client.get('/results/inexistente/comparison').status_code == 404
@@ -0,0 +1,77 @@
+import os
+import pytest
+from src.main import app
+from src.utils import web_scraper
+
+DOCX_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'src', 'static', 'uploads', 'test_docx.docx')
+
+PAGE_HTML = """
+<html><head><title>Labrador</title><meta name="description" content="Guia do labrador"></head>
+<body><main>
+<h1>Labrador Retriever</h1>
+<p>O labrador é um cão amigável, ativo e muito popular entre as famílias.</p>
+<p>Precisa de exercício diário e de companhia durante boa parte do dia.</p>
+</main></body></html>
+"""
+
+SETTLE = {'settle_ms': 120.0, 'scrolls': 2, 'accordions': 1, 'settled': True}
+
+
+class FakeResponse:
+    headers = {}
+
+
+class FakePage:
+    def route(self, pattern, handler):
+        pass
+
+    def goto(self, url, timeout=None):
+        return FakeResponse()
+
+    def wait_for_load_state(self, state):
+        pass
+
+    def evaluate(self, script, args):
+        return dict(SETTLE)
+
+    def content(self):
+        return PAGE_HTML
+
+
+class FakeContext:
+    def new_page(self):
+        return FakePage()
+
+
+class FakePool:
+    def run(self, fn):
+        return fn(FakeContext())
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(web_scraper, 'get_browser_pool', lambda: FakePool())
+    return app.test_client()
+
+
+def test_upload_reports_settle_stats(client):
+    with open(DOCX_PATH, 'rb') as f:
+        response = client.post('/comparator/upload', data={
+            'docx_file': (f, 'test_docx.docx'),
+            'web_url': 'https://example.com/labrador',
+            'no_cache': '1'
+        }, content_type='multipart/form-data')
+
+    assert response.status_code == 200, response.get_json()
+    body = response.get_json()
+    stats = body['render_stats']
+    assert stats['tier'] == 'browser'
+    assert stats['cache'] == 'bypass'
+    for key, value in SETTLE.items():
+        assert stats[key] == value
+    assert body['comparison']
+
+    download = client.get(body['excel_url'])
+    assert download.status_code == 200
+    assert download.data[:2] == b'PK'
@@ -0,0 +1,69 @@
+import io
+import os
+import pytest
+from src.utils.docx_stream import iter_docx_paragraphs, BODY, TABLE, HEADER, FOOTER
+
+docx = pytest.importorskip('docx')
+from docx.enum.text import WD_BREAK
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'src', 'static', 'uploads', 'test_docx.docx')
+
+
+def _python_docx_texts(document):
+    """Parágrafos do corpo e das células das tabelas na ordem do documento, como lidos pelo python-docx."""
+    texts = []
+    body = document.element.body
+    for child in body.iterchildren():
+        if child.tag.endswith('}p'):
+            texts.append(docx.text.paragraph.Paragraph(child, document).text)
+        elif child.tag.endswith('}tbl'):
+            table = docx.table.Table(child, document)
+            for row in table.rows:
+                for cell in row.cells:
+                    texts.extend(paragraph.text for paragraph in cell.paragraphs)
+    return texts
+
+
+def _build_document():
+    document = docx.Document()
+    section = document.sections[0]
+    section.header.paragraphs[0].text = 'Cabeçalho do briefing'
+    section.footer.paragraphs[0].text = 'Rodapé do briefing'
+    document.add_heading('Labrador Retriever', level=1)
+    paragraph = document.add_paragraph('O labrador é um cão ')
+    paragraph.add_run('amigável').bold = True
+    paragraph.add_run('\tativo')
+    paragraph.add_run().add_break()
+    paragraph.add_run('e sociável.')
+    document.add_paragraph('')
+    table = document.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = 'Muda'
+    table.cell(0, 1).text = '3/5'
+    table.cell(1, 0).text = 'Energia'
+    table.cell(1, 1).text = '4/5'
+    document.add_paragraph('Página seguinte').runs[0].add_break(WD_BREAK.PAGE)
+    document.add_paragraph('Último parágrafo.')
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_body_and_tables_match_python_docx():
+    data = _build_document()
+    streamed = [(origin, text) for origin, text in iter_docx_paragraphs(data)]
+
+    assert [text for origin, text in streamed if origin in (BODY, TABLE)] == \
+        _python_docx_texts(docx.Document(io.BytesIO(data)))
+    assert (TABLE, 'Muda') in streamed
+    assert (BODY, 'O labrador é um cão amigável\tativo\ne sociável.') in streamed
+    assert streamed[0] == (HEADER, 'Cabeçalho do briefing')
+    assert streamed[-1] == (FOOTER, 'Rodapé do briefing')
+
+
+def test_sample_document_matches_python_docx():
+    with open(SAMPLE_PATH, 'rb') as f:
+        data = f.read()
+    streamed = [text for origin, text in iter_docx_paragraphs(data) if origin in (BODY, TABLE)]
+
+    assert streamed == _python_docx_texts(docx.Document(io.BytesIO(data)))
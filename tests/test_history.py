@@ -0,0 +1,34 @@
+from sqlalchemy import inspect
+from src.main import app
+from src.models.user import db
+from src.models.comparison import url_hash
+from src.utils.history import record_comparison, latest_report_id
+
+ROWS = [('Labrador Retriever', 'Labrador Retriever', 'Exato', 1.0), ('Pelagem', None, 'Não encontrado', None)]
+ELEMENTS = [('Heading h1', 'h1', 'Labrador Retriever', '')]
+
+
+def test_runs_are_indexed_and_found_by_url_hash():
+    url = 'https://example.com/racas/labrador?utm_source=' + 'x' * 1500
+    record_comparison(app, 'history_run_1', 'labrador.docx', url, ROWS, ELEMENTS, 'hash-1')
+    record_comparison(app, 'history_run_2', 'labrador.docx', url, ROWS, ELEMENTS, 'hash-1', batch_id='batch_h')
+    record_comparison(app, 'history_run_3', 'labrador.docx', 'https://example.com/outra', ROWS, ELEMENTS, 'hash-1')
+
+    with app.app_context():
+        indexes = {index['name']: index['column_names'] for index in inspect(db.engine).get_indexes('comparison_run')}
+    assert indexes['ix_comparison_run_url_hash_created'] == ['web_url_hash', 'created_at']
+    assert not any(columns[0] == 'web_url' for columns in indexes.values())
+
+    assert latest_report_id(app, url, 'labrador.docx') == 'history_run_2'
+    assert latest_report_id(app, url, 'labrador.docx', exclude_batch_id='batch_h') == 'history_run_1'
+    assert latest_report_id(app, url, 'outro.docx') is None
+
+    response = app.test_client().get('/history/runs', query_string={'url': url})
+    items = response.get_json()['items']
+    assert sorted(item['report_id'] for item in items) == ['history_run_1', 'history_run_2']
+    assert all(item['web_url'] == url for item in items)
+
+
+def test_url_hash_is_fixed_length():
+    assert len(url_hash('https://example.com/')) == 40
+    assert url_hash('https://example.com/a') != url_hash('https://example.com/b')
@@ -0,0 +1,113 @@
+import io
+import pytest
+import src.main as main
+from src.utils.cpu_tasks import compare_texts
+from src.utils.incremental import paragraph_key, status_delta
+
+docx = pytest.importorskip('docx')
+
+WEB_TEXTS = [
+    'O labrador é um cão amigável e ativo.',
+    'A pelagem é curta e densa.',
+    'Precisa de exercício diário.',
+    'Cores: preto, chocolate e amarelo.',
+]
+PAGE = (WEB_TEXTS, '\n'.join(WEB_TEXTS), {}, {}, 'Labrador', [['Heading h1', 'h1', 'Labrador', '']])
+
+
+def _docx_upload(paragraphs, filename='briefing.docx'):
+    document = docx.Document()
+    for text in paragraphs:
+        document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    buffer.seek(0)
+    return buffer, filename
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, 'load_url_text', lambda url, stats=None, use_cache=True: PAGE)
+    return main.app.test_client()
+
+
+def _upload(client, paragraphs, url, **extra):
+    response = client.post('/upload', data={
+        'docx_file': _docx_upload(paragraphs),
+        'web_url': url,
+        'incremental': '1',
+        **extra
+    }, content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_resubmission_only_reports_what_changed(client):
+    url = 'https://example.com/incremental'
+    first = _upload(client, [
+        'O labrador é um cão amigável e ativo.',
+        'A pelagem é curta e densa.',
+        'Texto que sai na revisão.',
+    ], url)
+    # Sem comparação anterior não há delta nem reaproveitamento
+    assert first['delta'] is None
+    assert first['match_stats']['reused'] == 0
+
+    second = _upload(client, [
+        'O labrador é um cão amigável e ativo.',
+        'A pelagem é curta e densa.',
+        'Precisa de exercício diário.',
+    ], url)
+    delta = second['delta']
+    assert delta['base_report_id'] == first['excel_url'].rsplit('/', 1)[1][:-len('.xlsx')]
+    assert [item['doc_text'] for item in delta['added']] == ['Precisa de exercício diário.']
+    assert delta['added'][0]['status'] == 'Exato'
+    assert [item['doc_text'] for item in delta['removed']] == ['Texto que sai na revisão.']
+    assert delta['changed'] == []
+    assert delta['unchanged'] == 2
+    assert second['match_stats']['reused'] == 2
+
+
+def test_same_url_with_other_document_has_no_delta(client):
+    url = 'https://example.com/incremental-2'
+    _upload(client, ['O labrador é um cão amigável e ativo.'], url)
+    other = client.post('/upload', data={
+        'docx_file': _docx_upload(['A pelagem é curta e densa.'], 'outro.docx'),
+        'web_url': url,
+        'incremental': '1'
+    }, content_type='multipart/form-data').get_json()
+    assert other['delta'] is None
+
+
+def test_reused_counts_only_cached_results():
+    doc_texts = ['A pelagem é curta e densa.', 'a pelagem é CURTA e densa.', 'Texto novo sem par.']
+    matches = {paragraph_key('A pelagem é curta e densa.'): (1, 'Exato', 1.0)}
+    stats = {}
+    results = compare_texts(doc_texts, WEB_TEXTS, stats=stats, matches=matches)
+
+    # O segundo parágrafo tem a mesma chave do primeiro: vem do cache, como ele
+    assert stats['reused'] == 2
+    assert [result['status'] for result in results] == ['Exato', 'Exato', 'Não encontrado']
+    assert paragraph_key('Texto novo sem par.') in matches
+
+    # Sem nada no cache, parágrafos repetidos no documento não contam como reaproveitados
+    stats = {}
+    compare_texts(['Precisa de exercício diário.'] * 3, WEB_TEXTS, stats=stats, matches={})
+    assert stats['reused'] == 0
+    assert stats['exact_hash'] == 3
+
+
+def test_status_delta_reports_changed_status():
+    base = [('Precisa de exercício diário.', None, 'Não encontrado', None)]
+    rows = [('Precisa de exercício diário.', 'Precisa de exercício diário.', 'Exato', 1.0)]
+    delta = status_delta(rows, base, 'comparison_base')
+
+    assert delta['changed'] == [{
+        'position': 0,
+        'doc_text': 'Precisa de exercício diário.',
+        'status': 'Exato',
+        'similarity': 1.0,
+        'previous_status': 'Não encontrado',
+        'previous_similarity': None
+    }]
+    assert delta['added'] == [] and delta['removed'] == [] and delta['unchanged'] == 0
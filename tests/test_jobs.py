@@ -0,0 +1,138 @@
+import os
+import time
+import threading
+import pytest
+from src.utils import jobs
+from src.utils.jobs import JobStore, JobManager, register_job, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+
+
+def _wait_status(manager, job_id, statuses, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = manager.status(job_id)
+        if status['status'] in statuses:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} ficou em {manager.status(job_id)['status']}")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    monkeypatch.setattr(jobs, 'JOB_HANDLERS', {})
+    monkeypatch.setattr(jobs, 'JOB_CLEANUPS', {})
+    return jobs
+
+
+def test_job_runs_to_done_with_progress(store, handlers):
+    def run(job):
+        job.stage('render', 2)
+        job.advance('render')
+        job.advance('render')
+        return {'echo': job.params['value']}
+
+    register_job('echo', run)
+    manager = JobManager(store, workers=1)
+    job_id = manager.submit('echo', {'value': 42})
+
+    status = _wait_status(manager, job_id, (DONE, FAILED))
+    assert status['status'] == DONE
+    assert status['result'] == {'echo': 42}
+    assert status['progress'] == {'render': {'done': 2, 'total': 2}}
+    assert status['started_at'] is not None and status['finished_at'] is not None
+    manager.shutdown()
+
+
+def test_job_failure_is_reported(store, handlers):
+    def run(job):
+        raise ValueError('página inválida')
+
+    register_job('broken', run)
+    manager = JobManager(store, workers=1)
+    job_id = manager.submit('broken', {})
+
+    status = _wait_status(manager, job_id, (DONE, FAILED))
+    assert status['status'] == FAILED
+    assert status['error'] == 'página inválida'
+    manager.shutdown()
+
+
+def test_running_job_stops_at_next_check(store, handlers):
+    started = threading.Event()
+
+    def run(job):
+        started.set()
+        while True:
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    register_job('loop', run)
+    manager = JobManager(store, workers=1)
+    job_id = manager.submit('loop', {})
+    assert started.wait(5)
+
+    assert manager.cancel(job_id)
+    status = _wait_status(manager, job_id, (CANCELLED,))
+    assert status['cancel_requested']
+    # Um job já finalizado não pode ser cancelado de novo
+    assert not manager.cancel(job_id)
+    manager.shutdown()
+
+
+def test_queued_job_is_cancelled_and_cleaned_up(store, handlers):
+    release = threading.Event()
+    ran = []
+    cleaned = []
+
+    def block(job):
+        release.wait(5)
+
+    register_job('block', block)
+    register_job('work', lambda job: ran.append(job.id), cleanup=cleaned.append)
+    manager = JobManager(store, workers=1)
+    blocker = manager.submit('block', {})
+    _wait_status(manager, blocker, (RUNNING,))
+    job_id = manager.submit('work', {'docx': {'path': '/tmp/x.docx'}})
+    assert manager.status(job_id)['status'] == QUEUED
+
+    assert manager.cancel(job_id)
+    assert manager.status(job_id)['status'] == CANCELLED
+    assert cleaned == [{'docx': {'path': '/tmp/x.docx'}}]
+
+    release.set()
+    _wait_status(manager, blocker, (DONE,))
+    # O worker chega ao job cancelado, mas claim() não o entrega
+    manager._executor.shutdown(wait=True)
+    assert ran == []
+
+
+def test_interrupted_job_is_recovered_when_manager_starts(store, handlers):
+    register_job('echo', lambda job: {'ok': True})
+    job_id = store.create('echo', {})
+    # Job que estava rodando em um processo que não existe mais
+    assert store.claim(job_id, 'outro-host:1')
+
+    manager = JobManager(store, workers=1)
+    status = _wait_status(manager, job_id, (DONE, FAILED))
+    assert status['status'] == DONE
+    assert status['result'] == {'ok': True}
+    manager.shutdown()
+
+
+def test_queued_cancel_discards_persisted_upload():
+    from src.main import app  # registra os tipos de job do app
+    from src.utils.uploads import persist_upload
+
+    upload = persist_upload({'filename': 'briefing.docx', 'data': b'PK'})
+    assert os.path.exists(upload['path'])
+
+    jobs.JOB_CLEANUPS['comparison']({'docx': upload, 'web_url': 'https://example.com'})
+    assert not os.path.exists(upload['path'])
+
+    pair_upload = persist_upload({'filename': 'par.docx', 'data': b'PK'})
+    jobs.JOB_CLEANUPS['batch_comparison']({'pairs': [[0, pair_upload, 'https://example.com']]})
+    assert not os.path.exists(pair_upload['path'])
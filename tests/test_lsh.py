@@ -0,0 +1,44 @@
+import os
+import sys
+import subprocess
+import textwrap
+from src.utils.lsh import MinHashLSH
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imprime um resumo das assinaturas e dos candidatos de um índice fixo
+SCRIPT = textwrap.dedent("""
+    import hashlib
+    from src.utils.lsh import MinHashLSH
+    web = [set(text.split()) for text in [
+        'o labrador é um cão amigável e ativo',
+        'a pelagem do labrador é curta e densa',
+        'precisa de exercício diário e companhia',
+        'cores preto chocolate e amarelo',
+    ]]
+    doc = [set('o labrador é um cão muito amigável e ativo'.split()), set('pelagem curta e densa'.split())]
+    lsh = MinHashLSH().index(web)
+    print(hashlib.sha256(lsh.signatures(web).tobytes()).hexdigest())
+    print([sorted(c) for c in lsh.query_many(doc)])
+""")
+
+
+def _run(hash_seed):
+    env = dict(os.environ, PYTHONHASHSEED=str(hash_seed))
+    result = subprocess.run([sys.executable, '-c', SCRIPT], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def test_signatures_do_not_depend_on_hash_seed():
+    first = _run(1)
+    assert first == _run(2)
+    assert first.splitlines()[1].startswith('[[0')
+
+
+def test_similar_sets_are_candidates():
+    web = [set('o labrador é um cão amigável e ativo'.split()), set('cores preto chocolate e amarelo'.split())]
+    lsh = MinHashLSH().index(web)
+    candidates = lsh.query_many([set('o labrador é um cão amigável e ativo'.split()), set()])
+    assert 0 in candidates[0]
+    assert candidates[1] == set()
@@ -0,0 +1,46 @@
+import os
+from src.utils.page_cache import PageCache
+
+
+def _entries(cache):
+    return sorted(name for name in os.listdir(cache.directory) if name.endswith('.json.gz'))
+
+
+def test_put_scans_only_when_over_limit(tmp_path, monkeypatch):
+    cache = PageCache(directory=str(tmp_path), ttl=60, max_bytes=10 ** 6)
+    scans = []
+    original_scan = cache._scan
+
+    def counting_scan():
+        scans.append(1)
+        return original_scan()
+
+    monkeypatch.setattr(cache, '_scan', counting_scan)
+    for i in range(5):
+        cache.put(f'https://example.com/{i}', {'v': 1}, {'texts': ['abc'] * 10})
+
+    # Só a primeira gravação mede o diretório; as demais somam ao contador
+    assert len(scans) == 1
+    assert len(_entries(cache)) == 5
+
+
+def test_eviction_keeps_total_under_limit(tmp_path):
+    cache = PageCache(directory=str(tmp_path), ttl=60, max_bytes=10 ** 6)
+    cache.put('https://example.com/0', {'v': 1}, {'texts': ['x']})
+    entry_size = os.path.getsize(os.path.join(cache.directory, _entries(cache)[0]))
+    cache.max_bytes = entry_size * 3
+
+    for i in range(1, 8):
+        cache.put(f'https://example.com/{i}', {'v': 1}, {'texts': ['x']})
+
+    total = sum(os.path.getsize(os.path.join(cache.directory, name)) for name in _entries(cache))
+    assert total <= cache.max_bytes
+    assert 0 < len(_entries(cache)) <= 3
+
+
+def test_settings_are_part_of_the_key(tmp_path):
+    cache = PageCache(directory=str(tmp_path), ttl=60)
+    cache.put('https://example.com/', {'extract_version': 1}, {'texts': ['a']})
+
+    assert cache.get('https://example.com/', {'extract_version': 1})['data'] == {'texts': ['a']}
+    assert cache.get('https://example.com/', {'extract_version': 2}) is None
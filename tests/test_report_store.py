@@ -0,0 +1,85 @@
+import os
+import pytest
+from src.utils.report_store import ReportStore, write_report_data, get_report_store
+
+DATA = {
+    'docx_name': 'briefing.docx',
+    'web_url': 'https://example.com/labrador',
+    'rows': [
+        ['Labrador Retriever', 'Labrador Retriever', 'Exato', 1.0],
+        ['Pelagem curta', None, 'Não encontrado', None],
+    ],
+    'elements': [['Heading h1', 'h1', 'Labrador Retriever', '']],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ReportStore(str(tmp_path))
+    write_report_data(store.data_path('comparison_1'), DATA)
+    return store
+
+
+def test_workbook_is_rendered_once_on_first_request(store):
+    calls = []
+
+    def render(data, path):
+        calls.append(data)
+        with open(path, 'wb') as f:
+            f.write(b'xlsx')
+
+    assert not os.path.exists(store.workbook_path('comparison_1'))
+    path = store.workbook('comparison_1', render)
+    assert path == store.workbook_path('comparison_1')
+    assert store.workbook('comparison_1', render) == path
+    assert calls == [DATA]
+    assert store._locks == {}
+
+
+def test_unknown_or_invalid_ids_are_not_rendered(store):
+    def render(data, path):
+        raise AssertionError('não deveria gerar')
+
+    assert store.workbook('comparison_2', render) is None
+    assert store.workbook('../comparison_1', render) is None
+
+
+def test_failed_render_leaves_no_partial_file(store):
+    def broken(data, path):
+        with open(path, 'wb') as f:
+            f.write(b'parcial')
+        raise RuntimeError('falha no Excel')
+
+    with pytest.raises(RuntimeError):
+        store.workbook('comparison_1', broken)
+    assert sorted(os.listdir(store.directory)) == ['comparison_1.json.gz']
+
+    # A próxima tentativa gera o arquivo normalmente
+    def render(data, path):
+        with open(path, 'wb') as f:
+            f.write(b'xlsx')
+
+    assert store.workbook('comparison_1', render) == store.workbook_path('comparison_1')
+
+
+def test_download_renders_lazily_and_answers_304():
+    from src.main import app
+
+    report_id = 'comparison_test_304'
+    store = get_report_store()
+    write_report_data(store.data_path(report_id), DATA)
+    assert not os.path.exists(store.workbook_path(report_id))
+
+    client = app.test_client()
+    response = client.get(f'/download/{report_id}.xlsx')
+    assert response.status_code == 200
+    assert response.data[:2] == b'PK'
+    assert os.path.exists(store.workbook_path(report_id))
+    etag = response.headers['ETag']
+    mtime = os.path.getmtime(store.workbook_path(report_id))
+
+    again = client.get(f'/download/{report_id}.xlsx', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    # O Excel guardado foi reaproveitado
+    assert os.path.getmtime(store.workbook_path(report_id)) == mtime
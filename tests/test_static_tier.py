@@ -0,0 +1,131 @@
+import pytest
+import src.main as main
+
+LONG_TEXT = ' '.join(['O labrador é um cão amigável, ativo e muito popular entre as famílias.'] * 12)
+
+STATIC_HTML = f"""
+<html><head><title>Labrador</title>
+<meta name="description" content="Guia do labrador"><meta property="og:title" content="Labrador">
+</head><body>
+<img src="/a.png" alt="Filhote"><img src="/b.png">
+<main>
+<h1>Labrador Retriever</h1>
+<p>{LONG_TEXT}</p>
+<table class="breed-table"><tr><td>Muda</td><td>3/5</td></tr></table>
+<a href="/racas">Outras raças</a>
+<script>var hidden = 'não faz parte do texto';</script>
+</main></body></html>
+"""
+
+APP_SHELL_HTML = '<html><head><title>App</title></head><body><div id="root"></div></body></html>'
+
+BROWSER_DATA = {
+    'title': 'Renderizada',
+    'metadata': {},
+    'alt_tags': {},
+    'elements': [['Paragraph', 'p', 'Conteúdo renderizado', '']],
+    'main_text': 'Conteúdo renderizado'
+}
+
+
+class FakeResponse:
+    headers = {}
+
+
+class FakePage:
+    def route(self, pattern, handler):
+        pass
+
+    def goto(self, url, wait_until=None):
+        return FakeResponse()
+
+    def evaluate(self, script):
+        return dict(BROWSER_DATA)
+
+    def content(self):
+        return '<html><body><main><p>Conteúdo renderizado</p></main></body></html>'
+
+
+class FakeContext:
+    def new_page(self):
+        return FakePage()
+
+
+class FakePool:
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, fn):
+        self.calls += 1
+        return fn(FakeContext())
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    """URL -> HTML servido pela camada estática."""
+    served = {}
+
+    def fake_fetch(url):
+        return served[url], {'ETag': '"v1"'}
+
+    monkeypatch.setattr(main, 'STATIC_FETCH', True)
+    monkeypatch.setattr(main, 'fetch_static', fake_fetch)
+    return served
+
+
+def test_static_page_skips_browser(pages, monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(main, 'get_browser_pool', lambda: pool)
+    pages['https://example.com/labrador'] = STATIC_HTML
+
+    stats = {}
+    texts, main_text, metadata, alt_tags, title, elements = main.load_url_text(
+        'https://example.com/labrador', stats=stats, use_cache=False)
+
+    assert pool.calls == 0
+    assert stats['tier'] == 'static'
+    assert title == 'Labrador'
+    assert metadata == {'description': 'Guia do labrador', 'og:title': 'Labrador'}
+    assert alt_tags == {'Image 1': {'alt': 'Filhote', 'src': '/a.png'}}
+    assert ['Puntuación Veterinaria', 'table', 'Muda: 3/5', ''] in elements
+    assert ['Heading h1', 'h1', 'Labrador Retriever', ''] in elements
+    assert ['Link', 'a', 'Outras raças', '/racas'] in elements
+    assert 'Labrador Retriever' in texts
+    assert 'hidden' not in main_text
+
+
+def test_app_shell_escalates_to_browser(pages, monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(main, 'get_browser_pool', lambda: pool)
+    pages['https://example.com/app'] = APP_SHELL_HTML
+
+    stats = {}
+    page = main.load_url_text('https://example.com/app', stats=stats, use_cache=False)
+
+    assert pool.calls == 1
+    assert stats['tier'] == 'browser'
+    assert stats['escalation_reason'] == 'empty_app_root'
+    assert page[4] == 'Renderizada'
+
+
+def test_batch_renders_only_escalated_urls(pages, monkeypatch):
+    pages['https://example.com/labrador'] = STATIC_HTML
+    pages['https://example.com/app'] = APP_SHELL_HTML
+    rendered = []
+
+    def fake_scrape_many(urls, handler, concurrency, timeout, on_result, stop):
+        for url in urls:
+            rendered.append(url)
+            on_result(url, ((BROWSER_DATA['title'], '<html></html>', {}, {}, [], ''), {'blocked_requests': 0}, None))
+
+    monkeypatch.setattr(main, 'scrape_many', fake_scrape_many)
+    urls = ['https://example.com/labrador', 'https://example.com/app']
+    stats = []
+    results = main.load_urls_text(urls, stats=stats, use_cache=False)
+
+    assert rendered == ['https://example.com/app']
+    assert stats[0]['tier'] == 'static'
+    assert stats[1]['tier'] == 'browser'
+    assert stats[1]['escalation_reason'] == 'empty_app_root'
+    assert results[0][4] == 'Labrador'
+    assert results[1][4] == 'Renderizada'
@@ -0,0 +1,135 @@
+import pytest
+
+pytest.importorskip('sklearn')
+pytest.importorskip('pandas')
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+from src.utils.text_processing import clean_text, compare_texts, match_status
+
+# Página e documento de referência: blocos com palavras separadas por pontuação, parágrafos
+# iguais, parecidos e ausentes, alt tags e metadados
+HTML_BLOCKS = [
+    "Labrador Retriever",
+    "Origem: Terra Nova, Canadá.",
+    "Temperamento: amigável, ativo, sociável.",
+    "Pelagem: curta, densa, impermeável.",
+    "Cores: preto, chocolate, amarelo.",
+    "Cuidados: escovação semanal, banho mensal.",
+    "Exercício: caminhada diária, natação, brincadeiras.",
+    "Saúde: displasia, obesidade, otite.",
+]
+METADATA = {
+    "Title Tag": "Labrador Retriever: guia da raça",
+    "Meta Description": "Tudo sobre o labrador: origem, temperamento, cuidados.",
+    "Open Graph Title": "",
+    "Open Graph Description": "",
+}
+ALT_TAGS = ["Filhote, labrador, chocolate.", "Labrador, adulto, nadando."]
+DOCX = [
+    "Labrador Retriever: guia da raça",
+    "Origem: Terra Nova, Canadá.",
+    "Temperamento: amigável, ativo, brincalhão.",
+    "Pelagem: curta, densa.",
+    "Cores: preto, chocolate, amarelo, branco.",
+    "Exercício: caminhada diária, natação.",
+    "Alimentação: ração, porções, controle.",
+    "Alt-tag foto 1: Filhote, labrador, chocolate.",
+    "Alt-tag foto 2: Labrador, adulto, correndo.",
+    "",
+]
+
+
+def _baseline_best_match(query, candidates):
+    # safe_best_match de antes da vetorização, com um TfidfVectorizer por consulta
+    # (e já com o índice do candidato corrigido)
+    query = clean_text(query.lower())
+    candidates = [c for c in candidates if clean_text(c)]
+    candidates_clean = [clean_text(c.lower()) for c in candidates]
+    if not query or not candidates_clean:
+        return "", 0.0
+    try:
+        tfidf = TfidfVectorizer(stop_words='english').fit_transform([query] + candidates_clean)
+    except ValueError:
+        return "", 0.0
+    sims = cosine_similarity(tfidf[0:1], tfidf[1:]).flatten()
+    return candidates[sims.argmax()], float(sims[sims.argmax()])
+
+
+IGNORE_PREFIXES = [
+    "in dit artikel", "title tag:", "meta description:", "og title:", "og description:",
+    "[alt text da imagem]", "alt tag :", "title tag", "meta description",
+    "open graph title", "open graph description", "-- meta --", "en:", "be-fr:",
+    "guide des races de chiens", "alt-tag:", "-- meta –", "title tag"
+]
+
+
+def _baseline_compare(docx_list, html_list, metadata, alt_tags):
+    # compare_texts de antes da vetorização (metadados antes dos blocos da página)
+    rows = []
+    for doc_text in docx_list:
+        if not doc_text.strip():
+            continue
+        clean_doc = clean_text(doc_text.strip().lower())
+        if any(clean_doc.startswith(p) for p in IGNORE_PREFIXES):
+            continue
+        if clean_doc.startswith("alt-tag"):
+            original_alt = doc_text.split(":", 1)[1].strip()
+            match_text, score = _baseline_best_match(original_alt, alt_tags)
+            rows.append((original_alt, match_text, score))
+            continue
+        meta_type = next((k for k, v in metadata.items() if v and doc_text.strip() == v.strip()), None)
+        if not meta_type:
+            best_meta, best_score = "", 0.0
+            for k, v in metadata.items():
+                if not v.strip():
+                    continue
+                sim = _baseline_best_match(doc_text, [v])[1]
+                if sim > best_score:
+                    best_meta, best_score = k, sim
+            if best_score > 0.85:
+                meta_type = best_meta
+        if meta_type:
+            rows.append((doc_text, metadata[meta_type], _baseline_best_match(doc_text, [metadata[meta_type]])[1]))
+            continue
+        rows.append((doc_text, *_baseline_best_match(doc_text, html_list)))
+    return rows
+
+
+def test_vectorized_compare_matches_baseline_on_fixture():
+    expected = _baseline_compare(DOCX, HTML_BLOCKS, METADATA, ALT_TAGS)
+    df = compare_texts(DOCX, HTML_BLOCKS, METADATA, ALT_TAGS)
+
+    assert list(df["Document Text"]) == [doc for doc, _, _ in expected]
+    # Com o IDF comum a toda a comparação, as notas mudam um pouco; neste fixture o texto
+    # escolhido é o mesmo, mas em empates ou quase-empates ele pode mudar
+    assert list(df["Webpage Match"]) == [match for _, match, _ in expected]
+    assert list(df["Status"]) == [match_status(score) for _, _, score in expected]
+    for similarity, (_, _, score) in zip(df["Similarity"], expected):
+        assert similarity == pytest.approx(score * 100, abs=12)
+
+
+def test_compare_counts_resolution_paths():
+    stats = {}
+    compare_texts(DOCX, HTML_BLOCKS, METADATA, ALT_TAGS, stats=stats)
+
+    assert stats['metadata_exact'] == 1
+    # A origem também aparece na descrição da página, então passa pela comparação com os metadados
+    assert stats['exact_hash'] == 1
+    assert stats['fuzzy'] == 7
+
+
+def test_metadata_match_wins_over_exact_html_block():
+    # O título da página também aparece como bloco; o metadado quase igual tem prioridade
+    metadata = dict(METADATA, **{"Title Tag": "Labrador Retriever - guia da raça"})
+    html_blocks = HTML_BLOCKS + ["Labrador Retriever: guia da raça"]
+    docx = ["Labrador Retriever: guia da raça", "Saúde: displasia, obesidade, otite."]
+
+    expected = _baseline_compare(docx, html_blocks, metadata, ALT_TAGS)
+    stats = {}
+    df = compare_texts(docx, html_blocks, metadata, ALT_TAGS, stats=stats)
+
+    assert list(df["Webpage Match"]) == [match for _, match, _ in expected]
+    assert df["Webpage Match"][0] == "Labrador Retriever - guia da raça"
+    # O parágrafo sem termos em comum com os metadados continua no caminho exato
+    assert stats['exact_hash'] == 1
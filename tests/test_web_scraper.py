@@ -0,0 +1,53 @@
+import pytest
+from src.utils import web_scraper
+from src.utils.dom_walker import HAS_LXML, element_text, element_to_html
+
+PAGE_HTML = """
+<html><head><title> Labrador </title>
+<meta name="description" content="Guia do labrador">
+<meta property="og:title" content="Labrador Retriever">
+</head><body>
+<nav><a href="/">Início</a></nav>
+<main>
+<h1>Labrador Retriever</h1>
+<a class="accordion--text-v2" href="#vet">Puntuación Veterinaria</a>
+<div class="field"><table class="breed-table">
+<tr><td>Perro familiar</td><td>5/5</td></tr>
+<tr><td>Muda</td><td>3/5</td></tr>
+</table></div>
+<p>O labrador é um cão <strong>amigável</strong> e <em>ativo</em>, muito popular entre as famílias.</p>
+<ul><li>Pelagem curta</li><li>Porte grande</li></ul>
+<img src="/filhote.png" alt="Filhote de labrador">
+<div>Previous Next</div>
+<script>var ignorado = 1;</script>
+</main></body></html>
+"""
+
+
+@pytest.mark.skipif(not HAS_LXML, reason='lxml não instalado')
+def test_lxml_parser_matches_soup_parser():
+    lxml_page = web_scraper._add_vet_ratings(*web_scraper._parse_with_lxml(PAGE_HTML))
+    soup_page = web_scraper._add_vet_ratings(*web_scraper._parse_with_soup(PAGE_HTML))
+
+    texts, main, metadata, alt_tags, title, elements = lxml_page
+    soup_texts, soup_main, soup_metadata, soup_alt_tags, soup_title, soup_elements = soup_page
+    assert texts == soup_texts
+    assert metadata == soup_metadata
+    assert alt_tags == soup_alt_tags
+    assert title == soup_title
+    assert elements == soup_elements
+    # `main` muda de tipo (lxml x BeautifulSoup), mas o conteúdo é o mesmo
+    assert element_text(main) == element_text(soup_main)
+    assert 'ignorado' not in element_to_html(main)
+
+
+def test_parse_page_html_extracts_page_data():
+    texts, main, metadata, alt_tags, title, elements = web_scraper.parse_page_html(PAGE_HTML)
+
+    assert title == 'Labrador'
+    assert metadata['Meta Description'] == 'Guia do labrador'
+    assert metadata['Open Graph Title'] == 'Labrador Retriever'
+    assert alt_tags == ['Filhote de labrador']
+    assert ['Heading', 'h1', web_scraper.clean_text('Labrador Retriever'), ''] in elements
+    assert any(element[0] == 'Puntuación Veterinaria' for element in elements)
+    assert 'Início' not in element_text(main)